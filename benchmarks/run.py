@@ -0,0 +1,114 @@
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from components.entity import Entity
+from .scenarios import SCENARIOS, Scenario
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Builds the scenario from its seed, runs one warm-up round, then keeps the
+# fastest of `repeats` timed rounds.
+def run_scenario(
+    scenario: Scenario, scale: int, repeats: int, seed: int = 0
+) -> Dict[str, object]:
+    Entity.registry.reset()
+    workload = scenario.setup(random.Random(seed), scale)
+    workload()
+    rounds = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        ops = workload()
+        rounds.append((time.perf_counter_ns() - start, ops))
+    elapsed_ns, ops = min(rounds)
+    return {
+        "name": scenario.name,
+        "unit": scenario.unit,
+        "scale": scale,
+        "seed": seed,
+        "ops": ops,
+        "best_ns": elapsed_ns,
+        "ops_per_sec": ops / (elapsed_ns / 1e9) if elapsed_ns else 0.0,
+        "rounds_ns": [elapsed for elapsed, _ in rounds],
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[str]:
+    old = {result["name"]: result for result in baseline["results"]}
+    lines = []
+    for result in results:
+        before = old.get(result["name"])
+        if before is None or before["scale"] != result["scale"]:
+            continue
+        ratio = result["ops_per_sec"] / before["ops_per_sec"]
+        flag = " REGRESSION" if ratio < 1 - threshold else ""
+        lines.append(f"{result['name']:<12} {ratio:6.2f}x vs baseline{flag}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the simulation core.")
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)}")
+    parser.add_argument("--scale", type=int, default=10000, help="entities per world")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="slowdown reported as regression"
+    )
+    args = parser.parse_args(argv)
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        result = run_scenario(SCENARIOS[name], args.scale, args.repeats, args.seed)
+        results.append(result)
+        print(
+            f"{name:<12} {result['ops_per_sec']:14.1f} {result['unit']}/s "
+            f"best={result['best_ns'] / 1e6:.2f}ms"
+        )
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump(report, out, indent=2)
+
+    regressions = 0
+    if args.compare:
+        with open(args.compare) as baseline:
+            lines = compare(results, json.load(baseline), args.threshold)
+        for line in lines:
+            print(line)
+        regressions = sum(1 for line in lines if line.endswith("REGRESSION"))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
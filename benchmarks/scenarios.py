@@ -0,0 +1,178 @@
+import random
+from typing import Callable, Dict, List
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import Resource
+from components.grid import Grid
+from const import DIRECTION, Command
+from model import DataModel
+from model.modules import CommandDispatcher, TerminalEmulator
+from model.utils import parse_path
+
+
+def make_model(grid: Grid) -> DataModel:
+    return DataModel(
+        CommandDispatcher(TerminalEmulator()), grid, checkpoint_interval=None
+    )
+
+
+# A named, seeded workload. `setup(rng, scale)` builds the world and returns a
+# function that runs one round of the workload and reports how many operations
+# (ticks, lookups, ...) it performed.
+class Scenario:
+    def __init__(
+        self,
+        name: str,
+        unit: str,
+        setup: Callable[[random.Random, int], Callable[[], int]],
+        description: str,
+    ):
+        self.name = name
+        self.unit = unit
+        self.setup = setup
+        self.description = description
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, unit: str, description: str):
+    def decorator(setup: Callable[[random.Random, int], Callable[[], int]]):
+        SCENARIOS[name] = Scenario(name, unit, setup, description)
+        return setup
+
+    return decorator
+
+
+def step_runner(model: DataModel, ticks: int) -> Callable[[], int]:
+    def run() -> int:
+        model.run_ticks(ticks)
+        return ticks
+
+    return run
+
+
+@scenario("crowd", "ticks", "square of robots walking one shared path in lockstep")
+def crowd(rng: random.Random, scale: int) -> Callable[[], int]:
+    side = max(1, int(scale**0.5))
+    path = parse_path("".join(rng.choice("rldu") for _ in range(8)))
+    model = make_model(Grid())
+    for row in range(side):
+        for col in range(side):
+            model.grid.add_entity_at(row, col, Robot(path=path))
+    return step_runner(model, 10)
+
+
+@scenario("seed_loops", "ticks", "run_seed style conveyor loops, one rider each")
+def seed_loops(rng: random.Random, scale: int) -> Callable[[], int]:
+    model = make_model(Grid())
+    loops = max(1, scale // 16)
+    side = 5
+    per_row = max(1, int(loops**0.5))
+    for index in range(loops):
+        top = (index // per_row) * (side + 1)
+        left = (index % per_row) * (side + 1)
+        bottom, right = top + side - 1, left + side - 1
+        model.execute_command(Command(f"line conveyor {top} {left} {top} {right - 1}"))
+        model.execute_command(
+            Command(f"line conveyor {top} {right} {bottom - 1} {right}")
+        )
+        model.execute_command(
+            Command(f"line conveyor {bottom} {right} {bottom} {left + 1}")
+        )
+        model.execute_command(
+            Command(f"line conveyor {bottom} {left} {top + 1} {left}")
+        )
+        offset = rng.randrange(side - 1)
+        model.grid.add_entity_at(top, left + offset, Robot())
+    return step_runner(model, 10)
+
+
+@scenario("factories", "ticks", "robots walking across a field of factories")
+def factories(rng: random.Random, scale: int) -> Callable[[], int]:
+    side = max(2, int(scale**0.5))
+    model = make_model(Grid())
+    resources = list(Resource)
+    for row in range(side):
+        for col in range(side):
+            model.grid.add_entity_at(
+                row, col, Factory(resource_type=rng.choice(resources))
+            )
+    path = [DIRECTION.RIGHT] * (side - 1) + [DIRECTION.LEFT] * (side - 1)
+    for row in range(0, side, 2):
+        model.grid.add_entity_at(row, 0, Robot(path=path))
+    return step_runner(model, 10)
+
+
+@scenario("lookups", "lookups", "get_entity_by_id for random ids")
+def lookups(rng: random.Random, scale: int) -> Callable[[], int]:
+    grid = Grid()
+    ids: List[int] = []
+    for index in range(scale):
+        entity = Conveyor() if index % 2 else Factory()
+        grid.add_entity_at(index // 256, index % 256, entity)
+        ids.append(entity.id)
+    wanted = [rng.choice(ids) for _ in range(10000)]
+
+    def run() -> int:
+        for entity_id in wanted:
+            grid.get_entity_by_id(entity_id)
+        return len(wanted)
+
+    return run
+
+
+@scenario(
+    "churn", "operations", "add, move and remove robots over a field of conveyors"
+)
+def churn(rng: random.Random, scale: int) -> Callable[[], int]:
+    grid = Grid()
+    side = max(2, int(scale**0.5))
+    for row in range(side):
+        for col in range(side):
+            grid.add_entity_at(row, col, Conveyor())
+    cells = [(rng.randrange(side), rng.randrange(side)) for _ in range(2000)]
+
+    def run() -> int:
+        robots = []
+        for row, col in cells:
+            robot = Robot()
+            if not any(isinstance(e, Robot) for e in grid.get_entities_at(row, col)):
+                grid.add_entity_at(row, col, robot)
+                robots.append(robot)
+        # below the field, so moves never land on another robot
+        for robot in robots:
+            row, col = grid.get_coord_of_entity(robot)
+            grid.move_entity(row + side, col, robot)
+        for robot in robots:
+            grid.remove_entity(robot)
+        return 3 * len(robots)
+
+    return run
+
+
+@scenario("fill", "entities", "bulk rectangle fill through the command table")
+def fill(rng: random.Random, scale: int) -> Callable[[], int]:
+    side = max(1, int(scale**0.5))
+
+    def run() -> int:
+        model = make_model(Grid())
+        model.execute_command(Command(f"fill conveyor 0 0 {side - 1} {side - 1} right"))
+        return model.grid.entity_count()
+
+    return run
+
+
+@scenario("programs", "ticks", "spread-out robots sharing one looping program")
+def programs(rng: random.Random, scale: int) -> Callable[[], int]:
+    side = max(1, int(scale**0.5))
+    model = make_model(Grid())
+    for row in range(side):
+        for col in range(side):
+            model.grid.add_entity_at(row * 2, col * 4, Robot())
+    moves = "".join(rng.choice("rl") for _ in range(3))
+    model.execute_command(
+        Command(f"program all forever repeat 2 {moves} end if has wood 1 u end end")
+    )
+    return step_runner(model, 10)
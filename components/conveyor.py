@@ -1,11 +1,13 @@
-from typing import List
+from typing import List, Optional
 
-from components.grid import Grid
+from components.grid import ReservationTable
 from .entity import Entity
+from .registry import EntityRegistry
 from const import DIRECTION
 
 
 class Conveyor(Entity):
+    __slots__ = ("direction",)
     unused_names = [
         "Zippy",
         "Rolly",
@@ -30,8 +32,13 @@ class Conveyor(Entity):
     ]
     used_names: List[str] = []
 
-    def __init__(self, name: str = "", direction: DIRECTION = DIRECTION.RIGHT):
-        super().__init__(name)
+    def __init__(
+        self,
+        name: str = "",
+        direction: DIRECTION = DIRECTION.RIGHT,
+        registry: Optional[EntityRegistry] = None,
+    ):
+        super().__init__(name, registry)
         self.direction: DIRECTION = direction
 
     def process(self, entities: List[Entity]):
@@ -39,6 +46,6 @@ class Conveyor(Entity):
             pass
 
     def move(
-        self, tmp_grid: Grid, row: int, col: int, entities: List["Entity"]
+        self, table: ReservationTable, row: int, col: int, entities: List["Entity"]
     ) -> tuple[int, int]:
         return row, col
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import List, TYPE_CHECKING
+from typing import Iterator, List, Optional, Sequence, TYPE_CHECKING
 import random
 from enum import Enum
 
+from .registry import EntityRegistry
+
 if TYPE_CHECKING:
-    from .grid import Grid
+    from .grid import ReservationTable
 
 
 class Resource(Enum):
@@ -13,39 +15,99 @@ class Resource(Enum):
     STONE = "Stone"
 
 
+RESOURCE_INDEX = {resource: index for index, resource in enumerate(Resource)}
+# shared by every inventory that has never held anything
+EMPTY_COUNTS = (0,) * len(RESOURCE_INDEX)
+
+
+# One counter per resource type, so memory doesn't grow with the amount held.
+# `capacity` caps each counter when set. Counters are only allocated on the
+# first add, so conveyors and factories share EMPTY_COUNTS.
+class Inventory:
+    __slots__ = ("capacity", "_counts")
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity
+        self._counts: Sequence[int] = EMPTY_COUNTS
+
+    def add(self, resource: Resource, amount: int = 1) -> bool:
+        index = RESOURCE_INDEX[resource]
+        if self.capacity is not None and self._counts[index] + amount > self.capacity:
+            return False
+        if self._counts is EMPTY_COUNTS:
+            self._counts = list(EMPTY_COUNTS)
+        self._counts[index] += amount
+        return True
+
+    def remove(self, resource: Resource, amount: int = 1) -> bool:
+        index = RESOURCE_INDEX[resource]
+        if self._counts[index] < amount:
+            return False
+        if self._counts is not EMPTY_COUNTS:
+            self._counts[index] -= amount
+        return True
+
+    def count(self, resource: Resource) -> int:
+        return self._counts[RESOURCE_INDEX[resource]]
+
+    def items(self) -> Iterator[tuple[Resource, int]]:
+        for resource, count in zip(Resource, self._counts):
+            if count:
+                yield resource, count
+
+    def clear(self) -> None:
+        self._counts = EMPTY_COUNTS
+
+    def __len__(self) -> int:
+        return sum(self._counts)
+
+
+# Entities use __slots__ so a large world doesn't pay for an attribute dict
+# per entity; subclasses list only the attributes they add.
 class Entity(ABC):
+    __slots__ = ("name", "id", "resources")
     unused_names: List[str] = []
     used_names: List[str] = []
-    _id_counter: int = 0
+    # shared by every entity type; swap in EntityRegistry(recycle=True) to
+    # reuse the ids of deleted entities
+    registry: EntityRegistry = EntityRegistry()
+    is_mobile: bool = False
 
-    def __init__(self, name: str = ""):
+    # `registry` hands out the id; the shared Entity.registry by default
+    def __init__(self, name: str = "", registry: Optional[EntityRegistry] = None):
         self.name: str = name if name else self.get_unique_name()
-        self.id: int = Entity.get_unique_id()
-        self.resources: List[Resource] = []
+        self.id: int = (registry or Entity.registry).allocate()
+        self.resources: Inventory = Inventory()
 
     @classmethod
     def get_unique_name(cls) -> str:
-        if cls.unused_names:
-            name = random.choice(cls.unused_names)
-            cls.unused_names.remove(name)
+        names = cls.unused_names
+        if names:
+            # move a random name to the end so taking it is O(1)
+            index = random.randrange(len(names))
+            names[index], names[-1] = names[-1], names[index]
+            name = names.pop()
             cls.used_names.append(name)
             return name
         return "Unnamed"
 
     @classmethod
     def get_unique_id(cls) -> int:
-        Entity._id_counter += 1
-        return Entity._id_counter
+        return Entity.registry.allocate()
 
     def count_resource(self, resource_type: Resource) -> int:
-        return sum(1 for resource in self.resources if resource == resource_type)
+        return self.resources.count(resource_type)
 
     @abstractmethod
     def process(self, entities: List["Entity"]) -> None:
         pass
 
+    # called when the reservation table keeps this entity from moving
+    def move_rejected(self) -> None:
+        pass
+
     @abstractmethod
     def move(
-        self, tmp_grid: "Grid", row: int, col: int, entities: List["Entity"]
+        self, table: "ReservationTable", row: int, col: int, entities: List["Entity"]
     ) -> tuple[int, int]:
         pass
@@ -1,11 +1,13 @@
 from typing import List, Optional
 
-from components.grid import Grid
+from components.grid import ReservationTable
 from .entity import Entity, Resource
+from .registry import EntityRegistry
 from .robot import Robot
 
 
 class Factory(Entity):
+    __slots__ = ("resource_type",)
     unused_names = [
         "Spark",
         "Bolt",
@@ -25,8 +27,13 @@ class Factory(Entity):
     ]
     used_names: List[str] = []
 
-    def __init__(self, name: str = "", resource_type: Resource = Resource.WOOD):
-        super().__init__(name)
+    def __init__(
+        self,
+        name: str = "",
+        resource_type: Resource = Resource.WOOD,
+        registry: Optional[EntityRegistry] = None,
+    ):
+        super().__init__(name, registry)
         self.resource_type = resource_type
 
     def deposit_to(self, robots: List[Robot] = []):
@@ -39,6 +46,6 @@ class Factory(Entity):
                 entity.add_resource(self.resource_type)
 
     def move(
-        self, tmp_grid: Grid, row: int, col: int, entities: List["Entity"]
+        self, table: ReservationTable, row: int, col: int, entities: List["Entity"]
     ) -> tuple[int, int]:
         return row, col
@@ -1,4 +1,17 @@
-from typing import List, Iterator, Dict, Optional, Type, Union, TYPE_CHECKING
+from bisect import bisect_left, insort
+from heapq import merge
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Type,
+    Union,
+    TYPE_CHECKING,
+)
 from .entity import Entity
 from const import DIRECTION, T
 
@@ -6,6 +19,8 @@ if TYPE_CHECKING:
     from .entity import Entity
 
 
+# The grid used to key cells by Coord; it's kept for code that still builds
+# them, but the grid itself no longer does.
 class Coord:
     def __init__(self, row: int, col: int):
         self.row = row
@@ -23,81 +38,431 @@ class Coord:
         return hash((self.row, self.col))
 
 
+# Cells are keyed by a single packed int instead of a coordinate object so
+# lookups don't allocate. Rows and columns must stay strictly within
+# +/- COORD_HALF, which also keeps them in the int32 snapshot columns and
+# keys within int64 for the numpy kernel.
+COORD_BITS = 32
+COORD_HALF = 1 << (COORD_BITS - 1)
+
+
+def pack_coord(row: int, col: int) -> int:
+    return (row << COORD_BITS) + col
+
+
+def unpack_coord(key: int) -> tuple[int, int]:
+    row = (key + COORD_HALF) >> COORD_BITS
+    return row, key - (row << COORD_BITS)
+
+
+def in_bounds(row: int, col: int) -> bool:
+    return -COORD_HALF < row < COORD_HALF and -COORD_HALF < col < COORD_HALF
+
+
+def check_coord(row: int, col: int) -> None:
+    if not in_bounds(row, col):
+        raise ValueError(f"({row}, {col}) is outside the grid")
+
+
+# The world is partitioned into CHUNK_SIZE x CHUNK_SIZE chunks, so rectangle
+# queries and the tick loop only visit the chunks that can hold what they
+# are looking for.
+CHUNK_BITS = 5
+CHUNK_SIZE = 1 << CHUNK_BITS
+
+
+def chunk_key_of(key: int) -> int:
+    row, col = unpack_coord(key)
+    return pack_coord(row >> CHUNK_BITS, col >> CHUNK_BITS)
+
+
+class Chunk:
+    def __init__(self, key: int):
+        self.key = key
+        # occupied cells in this chunk
+        self.cells: Set[int] = set()
+        # cells holding a mobile entity
+        self.active: Set[int] = set()
+
+
+# Scratch space for one movement phase, reused across ticks. Every robot
+# proposes a destination and resolve() decides who moves, in one pass over the
+# proposals:
+#   1. A robot whose destination is its own cell stays put.
+#   2. When several robots want the same cell, the one coming from the lowest
+#      cell key (first in row-major order) gets it and the rest stay put.
+#   3. A robot that got its cell moves if the cell has no robot, or if that
+#      robot moves away, so robots can follow each other in chains.
+#   4. Robots that wait on each other in a cycle, including two robots
+#      swapping cells head-on, all stay put.
+# Static entities never block a robot.
+class ReservationTable:
+    def __init__(self):
+        # from key -> (entity, to key); entity is None for a robot that lives
+        # outside this table's part of the world
+        self._proposals: Dict[int, tuple[Optional["Entity"], int]] = {}
+        # to key -> from key of the robot that got the cell
+        self._winners: Dict[int, int] = {}
+        # from key -> whether that robot moves, filled in by resolve
+        self.outcomes: Dict[int, bool] = {}
+        self.moves: List[tuple["Entity", int, int]] = []
+
+    def clear(self) -> None:
+        self._proposals.clear()
+        self._winners.clear()
+        self.outcomes.clear()
+        self.moves.clear()
+
+    def __len__(self) -> int:
+        return len(self._proposals)
+
+    # a robot can't step off the edge of the grid; it stays put instead
+    def propose(
+        self, entity: "Entity", row: int, col: int, new_row: int, new_col: int
+    ) -> None:
+        if not in_bounds(new_row, new_col):
+            new_row, new_col = row, col
+        self.propose_key(entity, pack_coord(row, col), pack_coord(new_row, new_col))
+
+    def propose_key(
+        self, entity: Optional["Entity"], from_key: int, to_key: int
+    ) -> None:
+        if from_key in self._proposals:
+            raise ValueError("You can only have one Robot per cell")
+        self._proposals[from_key] = (entity, to_key)
+        if to_key != from_key:
+            winner = self._winners.get(to_key)
+            if winner is None or from_key < winner:
+                self._winners[to_key] = from_key
+
+    # `outside` maps cells whose robots this table can't see to whether a
+    # robot moving there will find them free.
+    def resolve(
+        self, outside: Optional[Dict[int, bool]] = None
+    ) -> List[tuple["Entity", int, int]]:
+        proposals = self._proposals
+        winners = self._winners
+        outcomes = self.outcomes
+        outcomes.clear()
+        pending: Dict[int, None] = {}
+        for start in proposals:
+            key = start
+            # follow the chain of robots each one is waiting on
+            while True:
+                if key in outcomes:
+                    moves = outcomes[key]
+                    break
+                if key in pending:
+                    moves = False  # cycle
+                    break
+                _, to_key = proposals[key]
+                if to_key == key or winners.get(to_key) != key:
+                    moves = False
+                    break
+                if outside is not None and to_key in outside:
+                    moves = outside[to_key]
+                    break
+                if to_key not in proposals:
+                    moves = True
+                    break
+                pending[key] = None
+                key = to_key
+            outcomes[key] = moves
+            for waiting in pending:
+                outcomes[waiting] = moves
+            pending.clear()
+
+        self.moves = [
+            (entity, from_key, to_key)
+            for from_key, (entity, to_key) in proposals.items()
+            if outcomes[from_key] and entity is not None
+        ]
+        return self.moves
+
+    # tells every entity that asked for another cell and didn't get it
+    def notify_rejected(self) -> None:
+        outcomes = self.outcomes
+        for from_key, (entity, to_key) in self._proposals.items():
+            if to_key != from_key and not outcomes[from_key] and entity is not None:
+                entity.move_rejected()
+
+
 class Grid:
     def __init__(self):
-        self._entities_at_coord: Dict[Coord, List["Entity"]] = {}
-        self._coord_of_entity: Dict["Entity", Coord] = {}
+        self._entities_at_coord: Dict[int, List["Entity"]] = {}
+        self._coord_of_entity: Dict["Entity", int] = {}
+        self._chunks: Dict[int, Chunk] = {}
+        # chunks holding at least one mobile entity
+        self._active_chunks: Dict[int, Chunk] = {}
+        self._entity_by_id: Dict[int, "Entity"] = {}
+        # ids per concrete entity type, kept sorted
+        self._ids_by_type: Dict[Type["Entity"], List[int]] = {}
+        # bumped whenever mobile / static contents change, so derived
+        # structures know when to rebuild
+        self.mobile_version = 0
+        self.static_version = 0
+        # called with the changed cell key, or None when everything changed
+        self._static_listeners: List[Callable[[Optional[int]], None]] = []
 
     def __iter__(self) -> Iterator[tuple[int, int, List["Entity"]]]:
-        for coord, entities in self._entities_at_coord.items():
-            yield (coord.row, coord.col, entities)
+        for key, entities in self._entities_at_coord.items():
+            row, col = unpack_coord(key)
+            yield (row, col, entities)
 
     def get_items(self) -> Iterator[tuple[int, int, List["Entity"]]]:
-        for coord, entities in self._entities_at_coord.items():
-            yield (coord.row, coord.col, entities)
+        return iter(self)
+
+    def entity_count(self) -> int:
+        return len(self._coord_of_entity)
+
+    # cells holding a mobile entity; everything else is idle during a tick
+    def get_active_items(self) -> Iterator[tuple[int, int, List["Entity"]]]:
+        for chunk in list(self._active_chunks.values()):
+            for key in chunk.active:
+                row, col = unpack_coord(key)
+                yield (row, col, self._entities_at_coord[key])
+
+    # Cells with row0 <= row <= row1 and col0 <= col <= col1. Only the chunks
+    # overlapping the rectangle are visited, or every chunk when there are
+    # fewer of those. With active_only, just the cells holding a mobile entity.
+    def query_rect(
+        self, row0: int, col0: int, row1: int, col1: int, active_only: bool = False
+    ) -> Iterator[tuple[int, int, List["Entity"]]]:
+        if row0 > row1 or col0 > col1:
+            return
+        chunk_rows = range(row0 >> CHUNK_BITS, (row1 >> CHUNK_BITS) + 1)
+        chunk_cols = range(col0 >> CHUNK_BITS, (col1 >> CHUNK_BITS) + 1)
+        if len(chunk_rows) * len(chunk_cols) <= len(self._chunks):
+            chunks = [
+                self._chunks[key]
+                for key in (
+                    pack_coord(chunk_row, chunk_col)
+                    for chunk_row in chunk_rows
+                    for chunk_col in chunk_cols
+                )
+                if key in self._chunks
+            ]
+        else:
+            chunks = list(self._chunks.values())
+
+        for chunk in chunks:
+            for key in chunk.active if active_only else chunk.cells:
+                row, col = unpack_coord(key)
+                if row0 <= row <= row1 and col0 <= col <= col1:
+                    yield (row, col, self._entities_at_coord[key])
+
+    def is_active(self, row: int, col: int) -> bool:
+        key = pack_coord(row, col)
+        chunk = self._chunks.get(chunk_key_of(key))
+        return chunk is not None and key in chunk.active
+
+    def chunk_count(self) -> int:
+        return len(self._chunks)
+
+    def active_chunk_count(self) -> int:
+        return len(self._active_chunks)
 
     def get_entities_at(self, row: int, col: int) -> List["Entity"]:
-        coord = Coord(row, col)
-        return self._entities_at_coord.get(coord, [])
+        return self._entities_at_coord.get(pack_coord(row, col), [])
 
     def add_entity_at(self, row: int, col: int, entity: "Entity") -> bool:
-        coord = Coord(row, col)
-        self._validate_entity(coord, entity)
-        self._entities_at_coord.setdefault(coord, []).append(entity)
-        self._coord_of_entity[entity] = coord
+        check_coord(row, col)
+        key = pack_coord(row, col)
+        self._validate_entity(key, entity)
+        self._entities_at_coord.setdefault(key, []).append(entity)
+        self._coord_of_entity[entity] = key
+        self._bump_version(key, entity)
+        self._cell_added(key, entity)
+        self._entity_by_id[entity.id] = entity
+        insort(self._ids_by_type.setdefault(type(entity), []), entity.id)
         return True
 
     def remove_entity(self, entity: "Entity") -> bool:
         if entity not in self._coord_of_entity:
             return False
 
-        coord = self._coord_of_entity[entity]
-        self._entities_at_coord[coord].remove(entity)
-        del self._coord_of_entity[entity]
+        key = self._coord_of_entity.pop(entity)
+        entities = self._entities_at_coord[key]
+        entities.remove(entity)
 
-        if not self._entities_at_coord[coord]:
-            del self._entities_at_coord[coord]
+        if not entities:
+            del self._entities_at_coord[key]
+        self._bump_version(key, entity)
+        self._cell_removed(key, entity, entities)
 
+        if self._entity_by_id.get(entity.id) is entity:
+            del self._entity_by_id[entity.id]
+        ids = self._ids_by_type[type(entity)]
+        del ids[bisect_left(ids, entity.id)]
         return True
 
+    # Adds every (row, col, entity) at once. The whole batch is validated
+    # first (no entity or id twice, at most one entity of each type per cell),
+    # so a failed batch leaves the grid untouched, and the per-type id lists
+    # are sorted once instead of per insert.
+    # raises like add_entities_bulk would for one new `entity_type` per cell
+    def check_cells_free(
+        self, entity_type: type, cells: Iterable[tuple[int, int]]
+    ) -> None:
+        entities_at_coord = self._entities_at_coord
+        for row, col in cells:
+            check_coord(row, col)
+            for entity in entities_at_coord.get(pack_coord(row, col), ()):
+                if type(entity) is entity_type:
+                    raise ValueError(
+                        f"You can only have one {entity_type.__name__} per cell"
+                    )
+
+    def add_entities_bulk(self, placements: Iterable[tuple[int, int, "Entity"]]) -> int:
+        by_cell: Dict[int, List["Entity"]] = {}
+        count = 0
+        for row, col, entity in placements:
+            check_coord(row, col)
+            by_cell.setdefault(pack_coord(row, col), []).append(entity)
+            count += 1
+
+        coord_of_entity = self._coord_of_entity
+        entities_at_coord = self._entities_at_coord
+        placed = {entity for entities in by_cell.values() for entity in entities}
+        if len(placed) != count or not placed.isdisjoint(coord_of_entity):
+            raise ValueError("An entity is placed twice or already in the grid.")
+        ids = {entity.id for entity in placed}
+        if len(ids) != count or not ids.isdisjoint(self._entity_by_id):
+            raise ValueError("An entity id is used twice or already in the grid.")
+        for key, entities in by_cell.items():
+            types = [type(entity) for entity in entities_at_coord.get(key, ())]
+            types += [type(entity) for entity in entities]
+            if len(types) != len(set(types)):
+                twice = next(t for t in types if types.count(t) > 1)
+                raise ValueError(f"You can only have one {twice.__name__} per cell")
+
+        entity_by_id = self._entity_by_id
+        ids_by_type = self._ids_by_type
+        touched_types: Set[type] = set()
+        any_mobile = False
+        for key, entities in by_cell.items():
+            entities_at_coord.setdefault(key, []).extend(entities)
+            mobile = static = False
+            for entity in entities:
+                coord_of_entity[entity] = key
+                entity_by_id[entity.id] = entity
+                entity_type = type(entity)
+                ids_by_type.setdefault(entity_type, []).append(entity.id)
+                touched_types.add(entity_type)
+                if entity.is_mobile:
+                    mobile = True
+                else:
+                    static = True
+            chunk_key = chunk_key_of(key)
+            chunk = self._chunks.get(chunk_key)
+            if chunk is None:
+                chunk = self._chunks[chunk_key] = Chunk(chunk_key)
+            chunk.cells.add(key)
+            if mobile:
+                chunk.active.add(key)
+                self._active_chunks[chunk_key] = chunk
+                any_mobile = True
+            if static:
+                self.static_version += 1
+                for listener in self._static_listeners:
+                    listener(key)
+        if any_mobile:
+            self.mobile_version += 1
+        for entity_type in touched_types:
+            ids_by_type[entity_type].sort()
+        return count
+
+    # Removes every entity that is in the grid; returns how many were.
+    def remove_entities_bulk(self, entities: Iterable["Entity"]) -> int:
+        removed_ids: Dict[type, Set[int]] = {}
+        for entity in entities:
+            key = self._coord_of_entity.pop(entity, None)
+            if key is None:
+                continue
+            cell = self._entities_at_coord[key]
+            cell.remove(entity)
+            if not cell:
+                del self._entities_at_coord[key]
+            self._bump_version(key, entity)
+            self._cell_removed(key, entity, cell)
+            if self._entity_by_id.get(entity.id) is entity:
+                del self._entity_by_id[entity.id]
+            removed_ids.setdefault(type(entity), set()).add(entity.id)
+        for entity_type, ids in removed_ids.items():
+            self._ids_by_type[entity_type] = [
+                entity_id
+                for entity_id in self._ids_by_type[entity_type]
+                if entity_id not in ids
+            ]
+        return sum(len(ids) for ids in removed_ids.values())
+
     def get_entities(
         self, entity_type: Optional[Type[T]] = None
     ) -> Union[List[T], List["Entity"]]:
-        all_entities = [
-            entity
-            for entities in self._entities_at_coord.values()
-            for entity in entities
-        ]
         if entity_type is None:
-            return all_entities
-        return sorted(
-            (entity for entity in all_entities if isinstance(entity, entity_type)),
-            key=lambda entity: entity.id,
-        )
+            return list(self._coord_of_entity)
+        return list(self.iter_entities(entity_type))
+
+    # entities of `entity_type` in id order, produced lazily so callers can
+    # stop early
+    def iter_entities(self, entity_type: Type[T]) -> Iterator[T]:
+        id_lists = [
+            ids
+            for cls, ids in self._ids_by_type.items()
+            if issubclass(cls, entity_type) and ids
+        ]
+        if not id_lists:
+            return iter([])
+        ordered_ids = id_lists[0] if len(id_lists) == 1 else merge(*id_lists)
+        entity_by_id = self._entity_by_id
+        return (entity_by_id[entity_id] for entity_id in ordered_ids)
 
     def get_coord_of_entity(self, entity: "Entity") -> Optional[tuple[int, int]]:
-        coord = self._coord_of_entity.get(entity, None)
-        if coord is not None:
-            return (coord.row, coord.col)
+        key = self._coord_of_entity.get(entity, None)
+        if key is not None:
+            return unpack_coord(key)
         return None
 
     def get_entity_by_id(self, entity_id) -> Optional["Entity"]:
-        for entity in self._coord_of_entity.keys():
-            if entity.id == entity_id:
-                return entity
-        return None
+        return self._entity_by_id.get(entity_id)
 
     def clear_entities(self) -> None:
         self._entities_at_coord = {}
         self._coord_of_entity = {}
+        self._chunks = {}
+        self._active_chunks = {}
+        self._entity_by_id = {}
+        self._ids_by_type = {}
+        self.mobile_version += 1
+        self.static_version += 1
+        for listener in self._static_listeners:
+            listener(None)
 
     def copy_entities_from(self, other: "Grid") -> None:
         self.clear_entities()
-        for row, col, entities in other:
-            for entity in entities:
-                self.add_entity_at(row, col, entity)
+        self.add_entities_bulk(
+            (row, col, entity) for row, col, entities in other for entity in entities
+        )
+
+    def apply_moves(self, moves: List[tuple["Entity", int, int]]) -> None:
+        # lift every mover out first so entities can follow each other into
+        # cells vacated during the same phase
+        if moves:
+            self.mobile_version += 1
+        for entity, from_key, _ in moves:
+            entities = self._entities_at_coord[from_key]
+            entities.remove(entity)
+            if not entities:
+                del self._entities_at_coord[from_key]
+            self._cell_removed(from_key, entity, entities)
+
+        for entity, _, to_key in moves:
+            self._entities_at_coord.setdefault(to_key, []).append(entity)
+            self._coord_of_entity[entity] = to_key
+            self._cell_added(to_key, entity)
 
     def move_entity(self, to_row: int, to_col: int, entity: "Entity") -> bool:
+        check_coord(to_row, to_col)
         if self.remove_entity(entity):
             return self.add_entity_at(to_row, to_col, entity)
         return False
@@ -106,8 +471,7 @@ class Grid:
         if entity not in self._coord_of_entity:
             return False
 
-        current_coord = self._coord_of_entity[entity]
-        new_row, new_col = current_coord.row, current_coord.col
+        new_row, new_col = unpack_coord(self._coord_of_entity[entity])
 
         if direction == DIRECTION.UP:
             new_row -= 1
@@ -123,12 +487,55 @@ class Grid:
         # Attempt to move the entity to the new position
         return self.move_entity(new_row, new_col, entity)
 
-    def _validate_entity(self, coord: Coord, entity: "Entity") -> bool:
+    def add_static_listener(self, listener: Callable[[Optional[int]], None]) -> None:
+        self._static_listeners.append(listener)
+
+    # for in-place changes to a static entity, e.g. re-pointing a conveyor
+    def mark_static_changed(self, entity: "Entity") -> None:
+        key = self._coord_of_entity.get(entity)
+        if key is not None:
+            self._bump_version(key, entity)
+
+    def _bump_version(self, key: int, entity: "Entity") -> None:
+        if entity.is_mobile:
+            self.mobile_version += 1
+            return
+        self.static_version += 1
+        for listener in self._static_listeners:
+            listener(key)
+
+    def _cell_added(self, key: int, entity: "Entity") -> None:
+        chunk_key = chunk_key_of(key)
+        chunk = self._chunks.get(chunk_key)
+        if chunk is None:
+            chunk = self._chunks[chunk_key] = Chunk(chunk_key)
+        chunk.cells.add(key)
+        if entity.is_mobile:
+            chunk.active.add(key)
+            self._active_chunks[chunk_key] = chunk
+
+    def _cell_removed(
+        self, key: int, entity: "Entity", remaining: List["Entity"]
+    ) -> None:
+        chunk_key = chunk_key_of(key)
+        chunk = self._chunks[chunk_key]
+        if not remaining:
+            chunk.cells.discard(key)
+        if entity.is_mobile and not any(e.is_mobile for e in remaining):
+            chunk.active.discard(key)
+            if not chunk.active:
+                del self._active_chunks[chunk_key]
+        if not chunk.cells:
+            del self._chunks[chunk_key]
+
+    def _validate_entity(self, key: int, entity: "Entity") -> bool:
         # Check if the entity already exists in the grid
         if entity in self._coord_of_entity:
             raise ValueError(f"Entity {entity} already exists in the grid.")
+        if entity.id in self._entity_by_id:
+            raise ValueError(f"Entity id {entity.id} is already in the grid.")
 
-        entities_at_coord = self._entities_at_coord.get(coord, [])
+        entities_at_coord = self._entities_at_coord.get(key, [])
 
         entity_type = type(entity)
         if any(isinstance(e, entity_type) for e in entities_at_coord):
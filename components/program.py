@@ -0,0 +1,194 @@
+from array import array
+from typing import TYPE_CHECKING, List
+
+from const import DIRECTION
+from .entity import Resource
+
+if TYPE_CHECKING:
+    from .entity import Entity
+    from .robot import Robot
+
+# Robot programs are words separated by whitespace:
+#
+#   r l u d w             move right / left / up / down, or wait ("rrd" works)
+#   repeat N ... end      run the body N times
+#   forever ... end       run the body over and over
+#   if has RES N ... [else ...] end   robot holds at least N of wood/metal/stone
+#   if on KIND ... [else ...] end     robot's cell has a factory / conveyor
+#
+# They compile once to a flat array of ints. Every move or wait ends the
+# robot's turn; the VM resumes after it on the next tick.
+OP_MOVE = 0  # direction
+OP_JUMP = 1  # target
+OP_REPEAT = 2  # count; pushes a loop counter
+OP_NEXT = 3  # body start; jumps back until the counter runs out
+OP_IF_HAS = 4  # resource, amount, else target
+OP_IF_ON = 5  # kind, else target
+OP_HALT = 6
+
+MOVES = {
+    "r": DIRECTION.RIGHT,
+    "l": DIRECTION.LEFT,
+    "u": DIRECTION.UP,
+    "d": DIRECTION.DOWN,
+    "w": DIRECTION.WAIT,
+}
+DIRECTIONS = list(DIRECTION)
+RESOURCES = list(Resource)
+RESOURCE_WORDS = [resource.name.lower() for resource in RESOURCES]
+KIND_WORDS = ["factory", "conveyor"]
+_kinds: List[type] = []
+
+# instructions a robot may run per tick before it has to give up its turn
+DEFAULT_BUDGET = 32
+
+
+# The classes KIND_WORDS name, imported on first use since Factory imports
+# Robot which imports us.
+def kinds() -> List[type]:
+    if not _kinds:
+        from .conveyor import Conveyor
+        from .factory import Factory
+
+        _kinds.extend((Factory, Conveyor))
+    return _kinds
+
+
+class Program:
+    __slots__ = ("source", "code", "budget")
+
+    def __init__(self, source: str, code: "array[int]", budget: int):
+        self.source = source
+        self.code = code
+        self.budget = budget
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+
+def _word(words: List[str], index: int, what: str) -> str:
+    if index >= len(words):
+        raise ValueError(f"expected {what} at the end of the program")
+    return words[index]
+
+
+def _number(words: List[str], index: int, what: str) -> int:
+    word = _word(words, index, what)
+    try:
+        value = int(word)
+    except ValueError:
+        raise ValueError(f"expected {what}, got {word!r}")
+    if value < 1:
+        raise ValueError(f"{what} must be at least 1, got {value}")
+    return value
+
+
+def _index_of(options: List[str], word: str, what: str) -> int:
+    if word not in options:
+        raise ValueError(f"expected {what} ({', '.join(options)}), got {word!r}")
+    return options.index(word)
+
+
+def compile_program(source: str, budget: int = DEFAULT_BUDGET) -> Program:
+    words = source.lower().split()
+    code = array("i")
+    # open blocks: (kind, position to patch or jump back to)
+    blocks: List[tuple[str, int]] = []
+    index = 0
+    while index < len(words):
+        word = words[index]
+        index += 1
+        if word and all(char in MOVES for char in word):
+            for char in word:
+                code.extend((OP_MOVE, DIRECTIONS.index(MOVES[char])))
+        elif word == "repeat":
+            code.extend((OP_REPEAT, _number(words, index, "a repeat count")))
+            index += 1
+            blocks.append(("repeat", len(code)))
+        elif word == "forever":
+            blocks.append(("forever", len(code)))
+        elif word == "if":
+            condition = _word(words, index, "has or on")
+            index += 1
+            if condition == "has":
+                resource = _word(words, index, "a resource")
+                code.extend(
+                    (
+                        OP_IF_HAS,
+                        _index_of(RESOURCE_WORDS, resource, "a resource"),
+                        _number(words, index + 1, "an amount"),
+                        -1,
+                    )
+                )
+                index += 2
+            elif condition == "on":
+                kind = _word(words, index, "factory or conveyor")
+                code.extend((OP_IF_ON, _index_of(KIND_WORDS, kind, "a kind"), -1))
+                index += 1
+            else:
+                raise ValueError(f"expected has or on after if, got {condition!r}")
+            blocks.append(("if", len(code) - 1))
+        elif word == "else":
+            if not blocks or blocks[-1][0] != "if":
+                raise ValueError("else without if")
+            _, patch = blocks.pop()
+            code.extend((OP_JUMP, -1))
+            code[patch] = len(code)
+            blocks.append(("else", len(code) - 1))
+        elif word == "end":
+            if not blocks:
+                raise ValueError("end without a block to close")
+            kind, position = blocks.pop()
+            if kind == "repeat":
+                code.extend((OP_NEXT, position))
+            elif kind == "forever":
+                code.extend((OP_JUMP, position))
+            else:
+                code[position] = len(code)
+        else:
+            raise ValueError(f"unknown word {word!r}")
+    if blocks:
+        raise ValueError(f"{blocks[-1][0]} is missing its end")
+    code.append(OP_HALT)
+    return Program(source, code, budget)
+
+
+# Runs `robot`'s program until it moves, halts or uses up its budget, and
+# returns the move for this tick. Where it stopped is kept on the robot.
+def run_program(robot: "Robot", entities: List["Entity"]) -> DIRECTION:
+    program = robot.program
+    code = program.code
+    counters = robot.counters
+    pc = robot.pc
+    for _ in range(program.budget):
+        op = code[pc]
+        if op == OP_MOVE:
+            robot.pc = pc + 2
+            return DIRECTIONS[code[pc + 1]]
+        if op == OP_JUMP:
+            pc = code[pc + 1]
+        elif op == OP_REPEAT:
+            counters.append(code[pc + 1])
+            pc += 2
+        elif op == OP_NEXT:
+            counters[-1] -= 1
+            if counters[-1] > 0:
+                pc = code[pc + 1]
+            else:
+                counters.pop()
+                pc += 2
+        elif op == OP_IF_HAS:
+            if robot.count_resource(RESOURCES[code[pc + 1]]) >= code[pc + 2]:
+                pc += 4
+            else:
+                pc = code[pc + 3]
+        elif op == OP_IF_ON:
+            kind = kinds()[code[pc + 1]]
+            if any(isinstance(entity, kind) for entity in entities):
+                pc += 3
+            else:
+                pc = code[pc + 2]
+        else:  # OP_HALT
+            break
+    robot.pc = pc
+    return DIRECTION.WAIT
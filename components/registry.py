@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Type, TypeVar
+
+T = TypeVar("T")
+
+# An id is (generation << INDEX_BITS) | index. Without recycling every id has
+# generation 0, so ids are just 1, 2, 3, ...
+INDEX_BITS = 32
+INDEX_MASK = (1 << INDEX_BITS) - 1
+
+
+def index_of(entity_id: int) -> int:
+    return entity_id & INDEX_MASK
+
+
+def generation_of(entity_id: int) -> int:
+    return entity_id >> INDEX_BITS
+
+
+# Hands out entity ids. With `recycle`, ids given back by release() have
+# their index reused under the next generation, so ids stay small-ish across
+# delete/create churn while a stale id never matches the new entity.
+class EntityRegistry:
+    def __init__(self, recycle: bool = False):
+        self.recycle = recycle
+        # highest index handed out so far
+        self.counter = 0
+        self._free: List[int] = []
+        # current generation of every index that was ever released
+        self._generations: Dict[int, int] = {}
+
+    def reset(self, counter: int = 0) -> None:
+        self.counter = counter
+        self._free = []
+        self._generations = {}
+
+    def allocate(self) -> int:
+        if self._free:
+            index = self._free.pop()
+            return (self._generations[index] << INDEX_BITS) | index
+        self.counter += 1
+        return self.counter
+
+    def release(self, entity_id: int) -> None:
+        if not self.recycle or not self.is_current(entity_id):
+            return
+        index = index_of(entity_id)
+        self._generations[index] = generation_of(entity_id) + 1
+        self._free.append(index)
+
+    # whether `entity_id` is the latest id for its index; once an id is
+    # released only the next generation counts, even before it's handed out
+    def is_current(self, entity_id: int) -> bool:
+        index = index_of(entity_id)
+        if not 0 < index <= self.counter:
+            return False
+        return generation_of(entity_id) == self._generations.get(index, 0)
+
+    # Makes `count` entities of `cls` with ids from this registry in one
+    # call; keyword arguments are passed to every constructor.
+    def create(self, cls: Type[T], count: int, **kwargs: Any) -> List[T]:
+        return [cls(registry=self, **kwargs) for _ in range(count)]
+
+    def state(self) -> tuple[int, List[int], Dict[int, int]]:
+        return self.counter, list(self._free), dict(self._generations)
+
+    def restore(self, state: tuple[int, List[int], Dict[int, int]]) -> None:
+        counter, free, generations = state
+        self.counter = counter
+        self._free = list(free)
+        self._generations = dict(generations)
@@ -1,12 +1,23 @@
 from typing import List, Optional
 
 from components.conveyor import Conveyor
-from components.grid import Grid
+from components.grid import ReservationTable
+from components.program import Program, run_program
 from .entity import Entity, Resource
+from .registry import EntityRegistry
 from const import DIRECTION
 
 
 class Robot(Entity):
+    __slots__ = (
+        "path",
+        "current_move_index",
+        "repeat_path",
+        "program",
+        "pc",
+        "counters",
+        "held_index",
+    )
     unused_names = [
         "bit",
         "zip",
@@ -24,11 +35,30 @@ class Robot(Entity):
         "vim",
     ]
     used_names: List[str] = []
-
-    def __init__(self, name: str = "", path: List[DIRECTION] = [DIRECTION.WAIT]):
-        super().__init__(name)
+    is_mobile = True
+    # bumped by set_path so cached copies of robot paths can be invalidated
+    path_epoch: int = 0
+
+    def __init__(
+        self,
+        name: str = "",
+        path: List[DIRECTION] = [DIRECTION.WAIT],
+        capacity: Optional[int] = None,
+        registry: Optional[EntityRegistry] = None,
+    ):
+        super().__init__(name, registry)
+        self.resources.capacity = capacity
         self.path = path
         self.current_move_index = 0
+        # when False the robot stops on the last move instead of starting over
+        self.repeat_path = True
+        # a compiled program replaces the path while it's set; pc and the
+        # loop counters are where its VM stopped last tick
+        self.program: Optional[Program] = None
+        self.pc = 0
+        self.counters: Optional[List[int]] = None
+        # move index to go back to if this tick's step is rejected, or -1
+        self.held_index = -1
 
     def get_next_move(self) -> DIRECTION:
         if not self.path:
@@ -45,16 +75,32 @@ class Robot(Entity):
     def update_move_index(self) -> None:
         if not self.path:
             raise ValueError("Path is empty. No moves available.")
-        self.current_move_index = (self.current_move_index + 1) % len(self.path)
+        if self.repeat_path:
+            self.current_move_index = (self.current_move_index + 1) % len(self.path)
+        else:
+            self.current_move_index = min(
+                self.current_move_index + 1, len(self.path) - 1
+            )
 
-    def add_resource(self, resource: Resource):
-        self.resources.append(resource)
+    def add_resource(self, resource: Resource) -> bool:
+        return self.resources.add(resource)
 
-    def set_path(self, path: List[DIRECTION]):
+    def set_path(self, path: List[DIRECTION], repeat: bool = True):
         self.current_move_index = 0
         self.path = path
+        self.repeat_path = repeat
+        self.program = None
+        self.counters = None
+        Robot.path_epoch += 1
         return True
 
+    # Programs are immutable, so many robots can share one compiled copy.
+    def set_program(self, program: Program) -> None:
+        self.program = program
+        self.pc = 0
+        self.counters = []
+        Robot.path_epoch += 1
+
     def process(self, entities: List[Entity]):
         for entity in entities:
             pass
@@ -79,30 +125,32 @@ class Robot(Entity):
             raise ValueError(f"Unknown direction: {direction}")
         return new_row, new_col
 
-    def move(
-        self, tmp_grid: Grid, row: int, col: int, entities: List["Entity"]
+    def next_position(
+        self, row: int, col: int, entities: List["Entity"]
     ) -> tuple[int, int]:
-        is_on_conveyor = False
-        conveyor_direction = DIRECTION.WAIT
+        self.held_index = -1
         for entity in entities:
             if isinstance(entity, Conveyor):
-                is_on_conveyor = True
-                conveyor_direction = entity.direction
-
-        new_row = None
-        new_col = None
-
-        if is_on_conveyor:
-            new_row, new_col = self._calc_new_position(row, col, conveyor_direction)
-        else:
-            new_row, new_col = self._calc_new_position(row, col, self.get_next_move())
-            self.update_move_index()
+                return self._calc_new_position(row, col, entity.direction)
+
+        if self.program is not None:
+            return self._calc_new_position(row, col, run_program(self, entities))
+        new_row, new_col = self._calc_new_position(row, col, self.get_next_move())
+        if not self.repeat_path:
+            # a one-shot route (like goto's) retries a blocked step instead
+            # of skipping it and parking short
+            self.held_index = self.current_move_index
+        self.update_move_index()
+        return new_row, new_col
 
-        # if there is a robot in the cell we are trying to move to, we need to go back.
-        is_robot_in_space = False
-        for entity in tmp_grid.get_entities_at(new_row, new_col):
-            is_robot_in_space = True
+    def move_rejected(self) -> None:
+        if self.held_index >= 0:
+            self.current_move_index = self.held_index
 
-        if is_robot_in_space:
-            return row, col
+    def move(
+        self, table: ReservationTable, row: int, col: int, entities: List["Entity"]
+    ) -> tuple[int, int]:
+        # where we'd like to go; the table decides whether we get there
+        new_row, new_col = self.next_position(row, col, entities)
+        table.propose(self, row, col, new_row, new_col)
         return new_row, new_col
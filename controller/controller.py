@@ -1,14 +1,29 @@
 from typing import Optional
 from model import DataModel
+from model.frames import FramePublisher
+from model.simulation_thread import SimulationThread
 from view import DataView
 import pyxel
 
 
 class Controller:
-    def __init__(self, data_model: DataModel, data_view: DataView):
+    def __init__(
+        self, data_model: DataModel, data_view: DataView, threaded: bool = True
+    ):
         self.setup_pyxel()
         self.data_model = data_model
         self.data_view = data_view
+        self.frame_count = 0
+        # With a simulation thread the model ticks on its own clock and pyxel
+        # only reads published frames; otherwise it ticks inside update().
+        self.simulation: Optional[SimulationThread] = None
+        self.publisher: Optional[FramePublisher] = None
+        if threaded:
+            self.simulation = SimulationThread(
+                data_model, tick_rate=120 / data_model.delay_ms
+            )
+        else:
+            self.publisher = FramePublisher(data_model)
 
     def setup_pyxel(self) -> None:
         pyxel.init(200, 200, fps=120)
@@ -16,14 +31,47 @@ class Controller:
         # pyxel.load('tilemap_file.pyxres')
 
     def run(self):
+        if self.simulation is not None:
+            self.simulation.start()
         pyxel.run(self.update, self.draw)
 
     def update(self):
+        self.frame_count += 1
+        self.process_camera_keys()
         signal = self.process_keys()
-        self.data_model.update(signal)
+        if self.simulation is not None:
+            # don't keep drawing a frozen world after the simulation died
+            self.simulation.check()
+            if signal:
+                self.simulation.send(signal)
+        else:
+            self.data_model.update(signal)
+            latest = self.publisher.latest
+            if latest is None or latest.tick != self.data_model.current_tick:
+                self.publisher.publish()
+
+    # shift + arrows pan the view, the mouse wheel zooms around the pointer
+    def process_camera_keys(self) -> None:
+        if pyxel.btn(pyxel.KEY_SHIFT):
+            for key, rows, cols in (
+                (pyxel.KEY_UP, -1, 0),
+                (pyxel.KEY_DOWN, 1, 0),
+                (pyxel.KEY_LEFT, 0, -1),
+                (pyxel.KEY_RIGHT, 0, 1),
+            ):
+                if pyxel.btnp(key, hold=10, repeat=2):
+                    self.data_view.pan(rows, cols)
+        if pyxel.mouse_wheel:
+            self.data_view.zoom(pyxel.mouse_wheel, pyxel.mouse_x, pyxel.mouse_y)
 
     def draw(self):
-        self.data_view.draw(self.data_model)
+        if self.simulation is not None:
+            frame = self.simulation.latest
+        else:
+            frame = self.publisher.latest
+            if frame is None:
+                return
+        self.data_view.draw(frame, self.frame_count)
 
     def process_keys(self) -> Optional[str]:
         terminal_keys = (
@@ -40,7 +88,7 @@ class Controller:
             return "BACK"
         if pyxel.btnp(pyxel.KEY_RETURN):
             return "ENTER"
-        if pyxel.btnp(pyxel.KEY_RIGHT):
+        if pyxel.btnp(pyxel.KEY_RIGHT) and not pyxel.btn(pyxel.KEY_SHIFT):
             return "RIGHT"
         if pyxel.btnp(pyxel.KEY_DELETE):
             return "DELETE"
@@ -0,0 +1,71 @@
+import argparse
+import logging
+
+from model.engine import HeadlessEngine
+from model.memory import MemoryReport
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the simulation without pyxel.")
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--seed", action="store_true", help="load DataModel.run_seed")
+    parser.add_argument("--script", help="file with one terminal command per line")
+    parser.add_argument(
+        "--budget", type=float, help="log ticks slower than this many ms"
+    )
+    parser.add_argument("--load", help="start from a snapshot file")
+    parser.add_argument("--save", help="write a snapshot file after the run")
+    parser.add_argument(
+        "--vectorized", action="store_true", help="move robots with the numpy kernel"
+    )
+    parser.add_argument(
+        "--fast-forward",
+        action="store_true",
+        help="skip ahead while robots only ride conveyor chains",
+    )
+    parser.add_argument(
+        "--shards", type=int, default=1, help="step row bands in worker processes"
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="print bytes per entity type at the end"
+    )
+    parser.add_argument(
+        "--checkpoints",
+        type=int,
+        help="journal a snapshot every this many ticks (off by default)",
+    )
+    args = parser.parse_args()
+    if args.load and args.seed:
+        # the seed's ids would collide with the ones in the snapshot
+        parser.error("--load can't be combined with --seed")
+
+    engine = HeadlessEngine(
+        vectorized=args.vectorized,
+        fast_forward=args.fast_forward,
+        checkpoint_interval=args.checkpoints,
+    )
+    if args.seed:
+        engine.load_seed()
+    if args.budget:
+        logging.basicConfig()
+        engine.model.stats.budget_ms = args.budget
+    if args.load:
+        engine.load_snapshot(args.load)
+    if args.script:
+        engine.load_script_file(args.script)
+
+    if args.shards > 1:
+        report = engine.run_sharded_ticks(args.ticks, args.shards)
+    else:
+        report = engine.run_ticks(args.ticks)
+    print(report.summary())
+    if args.shards <= 1:
+        print(engine.model.stats.summary())
+    if args.memory:
+        print(MemoryReport.from_grid(engine.model.grid).summary())
+    if args.save:
+        engine.save_snapshot(args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import Entity, Resource
+from components.program import Program, compile_program
+from const import DIRECTION, Command
+from .memory import MemoryReport
+from .utils import parse_path
+
+if TYPE_CHECKING:
+    from .data_model import DataModel
+
+DIRECTION_NAMES = {
+    "up": DIRECTION.UP,
+    "down": DIRECTION.DOWN,
+    "left": DIRECTION.LEFT,
+    "right": DIRECTION.RIGHT,
+}
+RESOURCE_NAMES = {
+    "wood": Resource.WOOD,
+    "metal": Resource.METAL,
+    "stone": Resource.STONE,
+}
+ENTITY_NAMES = {"robot": Robot, "factory": Factory, "conveyor": Conveyor}
+
+
+def choice(options: Dict[str, Any]) -> Callable[[str], Any]:
+    def parse(text: str) -> Any:
+        if text not in options:
+            raise ValueError(f"Expected one of {', '.join(options)}, got {text!r}")
+        return options[text]
+
+    return parse
+
+
+# A `rest` param comes last and takes every remaining word, joined by spaces.
+# An `earlier` param is parsed as parse(values, text), where `values` maps the
+# params before it to their parsed values; it's parsed with text=None when
+# left out too, so it can check both together or pick a default.
+class Param:
+    def __init__(
+        self,
+        name: str,
+        parse: Callable[..., Any],
+        optional: bool = False,
+        rest: bool = False,
+        earlier: bool = False,
+    ):
+        self.name = name
+        self.parse = parse
+        self.optional = optional
+        self.rest = rest
+        self.earlier = earlier
+
+
+class CommandSpec:
+    def __init__(self, words: tuple[str, ...], params: List[Param], handler: Callable):
+        self.words = words
+        self.params = params
+        self.handler = handler
+        self.required = sum(1 for param in params if not param.optional)
+
+    def usage(self) -> str:
+        names = []
+        for param in self.params:
+            name = f"{param.name}..." if param.rest else param.name
+            names.append(f"[{name}]" if param.optional else f"<{name}>")
+        return " ".join(list(self.words) + names)
+
+    def parse(self, args: List[str]) -> List[Any]:
+        if self.params and self.params[-1].rest and len(args) > len(self.params):
+            last = len(self.params) - 1
+            args = args[:last] + [" ".join(args[last:])]
+        if not self.required <= len(args) <= len(self.params):
+            raise ValueError(f"Usage: {self.usage()}")
+        values = []
+        parsed: Dict[str, Any] = {}
+        for index, param in enumerate(self.params):
+            arg = args[index] if index < len(args) else None
+            if arg is None and not param.earlier:
+                break
+            try:
+                value = param.parse(parsed, arg) if param.earlier else param.parse(arg)
+            except ValueError as error:
+                raise ValueError(f"{self.usage()}: bad {param.name}: {error}")
+            parsed[param.name] = value
+            values.append(value)
+        return values
+
+
+# Maps command words to a handler and its argument schema. Sub-commands like
+# "set path" are registered under both words.
+class CommandTable:
+    def __init__(self):
+        self._specs: Dict[tuple[str, ...], CommandSpec] = {}
+
+    def register(self, name: str, *params: Param) -> Callable[[Callable], Callable]:
+        words = tuple(name.split())
+
+        def decorator(handler: Callable) -> Callable:
+            self._specs[words] = CommandSpec(words, list(params), handler)
+            return handler
+
+        return decorator
+
+    def names(self) -> List[str]:
+        return [" ".join(words) for words in self._specs]
+
+    # returns the handler and its parsed arguments, or None for unknown commands
+    def resolve(self, command: Command) -> Optional[tuple[Callable, List[Any]]]:
+        if not command.buffer.strip():
+            return None
+        if command.args:
+            spec = self._specs.get((command.value, command.args[0]))
+            if spec is not None:
+                return spec.handler, spec.parse(command.args[1:])
+        spec = self._specs.get((command.value,))
+        if spec is None:
+            return None
+        return spec.handler, spec.parse(command.args)
+
+
+COMMANDS = CommandTable()
+
+
+@COMMANDS.register("robot", Param("row", int), Param("col", int))
+def add_robot(model: "DataModel", row: int, col: int) -> None:
+    model.grid.add_entity_at(row, col, Robot(path=[DIRECTION.WAIT]))
+
+
+@COMMANDS.register(
+    "factory",
+    Param("row", int),
+    Param("col", int),
+    Param("resource", choice(RESOURCE_NAMES)),
+)
+def add_factory(model: "DataModel", row: int, col: int, resource: Resource) -> None:
+    model.grid.add_entity_at(row, col, Factory(resource_type=resource))
+
+
+@COMMANDS.register(
+    "conveyor",
+    Param("row", int),
+    Param("col", int),
+    Param("direction", choice(DIRECTION_NAMES)),
+)
+def add_conveyor(model: "DataModel", row: int, col: int, direction: DIRECTION) -> None:
+    model.grid.add_entity_at(row, col, Conveyor(direction=direction))
+
+
+@COMMANDS.register("step")
+def step(model: "DataModel") -> None:
+    model.step()
+
+
+@COMMANDS.register("delete", Param("id", int))
+def delete(model: "DataModel", entity_id: int) -> None:
+    entity = model.grid.get_entity_by_id(entity_id)
+    if entity:
+        model.grid.remove_entity(entity)
+        Entity.registry.release(entity_id)
+
+
+@COMMANDS.register("play")
+def play(model: "DataModel") -> None:
+    model.is_playing = True
+
+
+@COMMANDS.register("pause")
+def pause(model: "DataModel") -> None:
+    model.is_playing = False
+    print("paused")
+
+
+@COMMANDS.register(
+    "move", Param("id", int), Param("direction", choice(DIRECTION_NAMES))
+)
+def move(model: "DataModel", entity_id: int, direction: DIRECTION) -> None:
+    entity = model.grid.get_entity_by_id(entity_id)
+    if entity:
+        model.grid.move_entity_in_direction(entity, direction)
+
+
+@COMMANDS.register("set path", Param("id", int), Param("path", parse_path))
+def set_path(model: "DataModel", entity_id: int, path: List[DIRECTION]) -> None:
+    entity = model.grid.get_entity_by_id(entity_id)
+    if isinstance(entity, Robot):
+        model.planner.release(entity_id)
+        entity.set_path(path)
+
+
+# Sends a robot to a cell along the shortest route, then parks it there.
+@COMMANDS.register("goto", Param("id", int), Param("row", int), Param("col", int))
+def goto(model: "DataModel", entity_id: int, row: int, col: int) -> None:
+    entity = model.grid.get_entity_by_id(entity_id)
+    if isinstance(entity, Robot):
+        from_row, from_col = model.grid.get_coord_of_entity(entity)
+        path = model.distance_fields.route(from_row, from_col, row, col)
+        model.planner.release(entity_id)
+        entity.set_path(path + [DIRECTION.WAIT], repeat=False)
+
+
+def robot_target(text: str) -> Optional[int]:
+    return None if text == "all" else int(text)
+
+
+# Compiles the program once; "all" gives every robot the same compiled copy.
+@COMMANDS.register(
+    "program",
+    Param("id", robot_target),
+    Param("source", compile_program, rest=True),
+)
+def set_program(model: "DataModel", entity_id: Optional[int], program: Program) -> None:
+    if entity_id is None:
+        robots: List[Optional[Entity]] = list(model.grid.iter_entities(Robot))
+    else:
+        robots = [model.grid.get_entity_by_id(entity_id)]
+    for entity in robots:
+        if isinstance(entity, Robot):
+            model.planner.release(entity.id)
+            entity.set_program(program)
+
+
+# Like goto, but the route is planned around every other planned robot.
+@COMMANDS.register("plan", Param("id", int), Param("row", int), Param("col", int))
+def plan(model: "DataModel", entity_id: int, row: int, col: int) -> None:
+    entity = model.grid.get_entity_by_id(entity_id)
+    if isinstance(entity, Robot):
+        if not model.planner.plan({entity: (row, col)}):
+            print(f"robot {entity_id} is waiting for a route")
+
+
+@COMMANDS.register(
+    "set direction", Param("id", int), Param("direction", choice(DIRECTION_NAMES))
+)
+def set_direction(model: "DataModel", entity_id: int, direction: DIRECTION) -> None:
+    entity = model.grid.get_entity_by_id(entity_id)
+    if isinstance(entity, Conveyor):
+        entity.direction = direction
+        model.grid.mark_static_changed(entity)
+
+
+@COMMANDS.register("stats")
+def show_stats(model: "DataModel") -> None:
+    print(model.stats.summary())
+    print(f"last tick: {model.stats.describe_last()}")
+
+
+@COMMANDS.register("stats reset")
+def reset_stats(model: "DataModel") -> None:
+    model.stats.reset()
+
+
+@COMMANDS.register("memory")
+def show_memory(model: "DataModel") -> None:
+    print(MemoryReport.from_grid(model.grid).summary())
+
+
+# "budget 0" turns the tick-budget watchdog off
+@COMMANDS.register("budget", Param("ms", float))
+def set_budget(model: "DataModel", budget_ms: float) -> None:
+    model.stats.budget_ms = budget_ms if budget_ms > 0 else None
+
+
+# Bulk placement. `option` is the resource for factories, the direction for
+# conveyors and the path for robots.
+def entity_options(entity_type: type, option: Any) -> Dict[str, Any]:
+    if entity_type is Factory:
+        return {"resource_type": option}
+    if entity_type is Conveyor:
+        return {"direction": option}
+    return {"path": option}
+
+
+def parse_option(earlier: Dict[str, Any], option: Optional[str]) -> Any:
+    entity_type = earlier["kind"]
+    if entity_type is Factory:
+        return choice(RESOURCE_NAMES)(option or "wood")
+    if entity_type is Conveyor:
+        if option is None:
+            raise ValueError("conveyors need a direction")
+        return choice(DIRECTION_NAMES)(option)
+    if option is None:
+        return [DIRECTION.WAIT]
+    path = parse_path(option)
+    if not path:
+        raise ValueError(f"no moves in {option!r}")
+    return path
+
+
+# A straight conveyor line without a direction points along the line.
+def parse_line_option(earlier: Dict[str, Any], option: Optional[str]) -> Any:
+    if earlier["kind"] is Conveyor and option is None:
+        row0, col0 = earlier["row0"], earlier["col0"]
+        row1, col1 = earlier["row1"], earlier["col1"]
+        if row0 == row1:
+            option = "right" if col1 >= col0 else "left"
+        elif col0 == col1:
+            option = "down" if row1 > row0 else "up"
+    return parse_option(earlier, option)
+
+
+def place_all(
+    model: "DataModel",
+    entity_type: type,
+    cells: Iterable[tuple[int, int]],
+    option: Any,
+) -> int:
+    cells = list(dict.fromkeys(cells))
+    # checked before any ids are handed out
+    model.grid.check_cells_free(entity_type, cells)
+    entities = Entity.registry.create(
+        entity_type, len(cells), **entity_options(entity_type, option)
+    )
+    # validated as a whole, so a failed fill leaves the grid untouched
+    return model.grid.add_entities_bulk(
+        (row, col, entity) for (row, col), entity in zip(cells, entities)
+    )
+
+
+def line_cells(row0: int, col0: int, row1: int, col1: int) -> List[tuple[int, int]]:
+    steps = max(abs(row1 - row0), abs(col1 - col0))
+    if steps == 0:
+        return [(row0, col0)]
+    return [
+        (
+            row0 + round((row1 - row0) * i / steps),
+            col0 + round((col1 - col0) * i / steps),
+        )
+        for i in range(steps + 1)
+    ]
+
+
+ENTITY_PARAMS = [
+    Param("kind", choice(ENTITY_NAMES)),
+    Param("row0", int),
+    Param("col0", int),
+    Param("row1", int),
+    Param("col1", int),
+]
+
+
+@COMMANDS.register(
+    "fill", *ENTITY_PARAMS, Param("option", parse_option, optional=True, earlier=True)
+)
+def fill(
+    model: "DataModel",
+    entity_type: type,
+    row0: int,
+    col0: int,
+    row1: int,
+    col1: int,
+    option: Any,
+) -> None:
+    rows = range(min(row0, row1), max(row0, row1) + 1)
+    cols = range(min(col0, col1), max(col0, col1) + 1)
+    place_all(model, entity_type, ((row, col) for row in rows for col in cols), option)
+
+
+@COMMANDS.register(
+    "line",
+    *ENTITY_PARAMS,
+    Param("option", parse_line_option, optional=True, earlier=True),
+)
+def line(
+    model: "DataModel",
+    entity_type: type,
+    row0: int,
+    col0: int,
+    row1: int,
+    col1: int,
+    option: Any,
+) -> None:
+    place_all(model, entity_type, line_cells(row0, col0, row1, col1), option)
@@ -0,0 +1,183 @@
+from typing import Dict, List, Optional, Set
+
+from components.conveyor import Conveyor
+from components.entity import Entity
+from components.grid import Grid, pack_coord, unpack_coord
+from const import DIRECTION
+
+KEY_DELTA = {
+    DIRECTION.UP: -pack_coord(1, 0),
+    DIRECTION.DOWN: pack_coord(1, 0),
+    DIRECTION.LEFT: -1,
+    DIRECTION.RIGHT: 1,
+    DIRECTION.WAIT: 0,
+}
+
+
+# A maximal run of conveyors where every cell after the first is fed by
+# exactly one conveyor. Runs break where belts merge, at the last belt before
+# plain ground, and a closed loop with no way in is a single chain.
+class ConveyorChain:
+    def __init__(self, keys: List[int], is_loop: bool, is_plain: bool, exit_key: int):
+        self.keys = keys
+        self.is_loop = is_loop
+        # only conveyors on every cell, so riding it processes nothing
+        self.is_plain = is_plain
+        # cell a robot lands on after the last conveyor
+        self.exit_key = exit_key
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # how many ticks a robot at `offset` can ride without leaving the chain
+    def horizon(self, offset: int) -> Optional[int]:
+        if self.is_loop:
+            return None
+        return len(self.keys) - 1 - offset
+
+    def key_after(self, offset: int, ticks: int) -> int:
+        if self.is_loop:
+            return self.keys[(offset + ticks) % len(self.keys)]
+        return self.keys[offset + ticks]
+
+
+class ConveyorChains:
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        self._next: Dict[int, int] = {}
+        self._preds: Dict[int, Set[int]] = {}
+        self._chain_of: Dict[int, tuple[ConveyorChain, int]] = {}
+        self._pending: Set[int] = set()
+        self._stale = True
+        grid.add_static_listener(self._on_static_changed)
+
+    def _on_static_changed(self, key: Optional[int]) -> None:
+        if key is None:
+            self._stale = True
+        else:
+            self._pending.add(key)
+
+    def chain_at(self, row: int, col: int) -> Optional[tuple[ConveyorChain, int]]:
+        self.sync()
+        return self._chain_of.get(pack_coord(row, col))
+
+    def chain_at_key(self, key: int) -> Optional[tuple[ConveyorChain, int]]:
+        self.sync()
+        return self._chain_of.get(key)
+
+    def chains(self) -> List[ConveyorChain]:
+        self.sync()
+        unique = {id(chain): chain for chain, _ in self._chain_of.values()}
+        return list(unique.values())
+
+    # position after riding `ticks` cells, capped at the end of the chain
+    def advance(self, row: int, col: int, ticks: int) -> tuple[int, int, int]:
+        found = self.chain_at(row, col)
+        if found is None:
+            return row, col, 0
+        chain, offset = found
+        horizon = chain.horizon(offset)
+        if horizon is not None:
+            ticks = min(ticks, horizon)
+        new_row, new_col = unpack_coord(chain.key_after(offset, ticks))
+        return new_row, new_col, ticks
+
+    def rebuild(self) -> None:
+        self._next = {}
+        self._preds = {}
+        self._chain_of = {}
+        self._pending = set()
+        self._stale = False
+        for key, entities in self.grid._entities_at_coord.items():
+            self._link(key, self._conveyor_next(entities, key))
+        self._build_chains(set(self._next))
+
+    def sync(self) -> None:
+        if self._stale:
+            self.rebuild()
+            return
+        if not self._pending:
+            return
+
+        affected: Set[int] = set()
+        for key in self._pending:
+            old_next = self._next.get(key)
+            entities = self.grid._entities_at_coord.get(key, [])
+            new_next = self._conveyor_next(entities, key)
+            self._unlink(key)
+            self._link(key, new_next)
+            for cell in (key, old_next, new_next):
+                if cell is None:
+                    continue
+                affected.add(cell)
+                affected.update(self._preds.get(cell, ()))
+        self._pending = set()
+
+        cells: Set[int] = set()
+        for key in affected:
+            found = self._chain_of.get(key)
+            if found is not None:
+                cells.update(found[0].keys)
+            elif key in self._next:
+                cells.add(key)
+        for key in cells:
+            self._chain_of.pop(key, None)
+        self._build_chains({key for key in cells if key in self._next})
+
+    def _conveyor_next(self, entities: List[Entity], key: int) -> Optional[int]:
+        for entity in entities:
+            if isinstance(entity, Conveyor):
+                return key + KEY_DELTA[entity.direction]
+        return None
+
+    def _link(self, key: int, next_key: Optional[int]) -> None:
+        if next_key is None:
+            return
+        self._next[key] = next_key
+        self._preds.setdefault(next_key, set()).add(key)
+
+    def _unlink(self, key: int) -> None:
+        next_key = self._next.pop(key, None)
+        if next_key is None:
+            return
+        preds = self._preds[next_key]
+        preds.discard(key)
+        if not preds:
+            del self._preds[next_key]
+
+    def _in_degree(self, key: int) -> int:
+        return len(self._preds.get(key, ()))
+
+    def _is_plain(self, key: int) -> bool:
+        return all(
+            entity.is_mobile or isinstance(entity, Conveyor)
+            for entity in self.grid._entities_at_coord.get(key, [])
+        )
+
+    def _build_chains(self, cells: Set[int]) -> None:
+        starts = sorted(key for key in cells if self._in_degree(key) != 1)
+        for start in starts:
+            self._walk(start, cells)
+        # whatever is left sits on closed loops that nothing feeds into
+        for key in sorted(cells):
+            if key not in self._chain_of:
+                self._walk(key, cells)
+
+    def _walk(self, start: int, cells: Set[int]) -> None:
+        keys = [start]
+        current = self._next[start]
+        while (
+            current in cells
+            and current not in self._chain_of
+            and current != start
+            and self._in_degree(current) == 1
+        ):
+            keys.append(current)
+            current = self._next[current]
+
+        is_loop = current == start and self._in_degree(start) == 1
+        chain = ConveyorChain(
+            keys, is_loop, all(self._is_plain(key) for key in keys), current
+        )
+        for offset, key in enumerate(keys):
+            self._chain_of[key] = (chain, offset)
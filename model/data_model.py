@@ -1,16 +1,30 @@
-from components import Robot, Factory
-from components.conveyor import Conveyor
-from components.entity import Entity, Resource
-from components.grid import Grid
+from components.entity import Entity
+from components.grid import Grid, ReservationTable, pack_coord
 from .modules import CommandDispatcher
-from const import DIRECTION, Command
-from typing import Iterator, List, Optional, Deque
+from const import Command
+from typing import Iterable, Optional, Deque
 from collections import deque
-from .utils import parse_path
+from time import perf_counter_ns
+from .commands import COMMANDS
+from .conveyor_chains import ConveyorChains
+from .pathfinding import DistanceFields
+from .planner import FleetPlanner
+from .vectorized import VectorizedMover
+from .journal import Journal
+from .snapshot import dump_snapshot, load_snapshot_bytes
+from .tick_stats import TickStats
 
 
 class DataModel:
-    def __init__(self, dispatcher: CommandDispatcher, grid: Grid):
+    def __init__(
+        self,
+        dispatcher: CommandDispatcher,
+        grid: Grid,
+        vectorized: bool = False,
+        checkpoint_interval: Optional[int] = 1000,
+        tick_budget_ms: Optional[float] = None,
+        max_checkpoints: Optional[int] = 16,
+    ):
         self.grid = grid
         self.dispatcher = dispatcher
         self.current_frame = 0
@@ -18,125 +32,220 @@ class DataModel:
         self.current_tick = 0
         self.is_playing = True
         self.signal_queue: Deque[str] = deque()
+        self.reservations = ReservationTable()
+        self.vector_mover = VectorizedMover() if vectorized else None
+        self.chains = ConveyorChains(grid)
+        self.distance_fields = DistanceFields(grid)
+        self.planner = FleetPlanner(grid, self.distance_fields)
+        # Commands and steps are journaled unless checkpoints are off; edits
+        # made straight on the grid are not, so seek only reproduces what
+        # went through the model.
+        self.journal = Journal(checkpoint_interval, max_checkpoints)
+        self.stats = TickStats(tick_budget_ms)
+        if self.journal.enabled:
+            self.checkpoint()
 
     def get_terminal_text(self) -> str:
         return self.dispatcher.terminal.buffer
 
+    def checkpoint(self) -> None:
+        self.journal.add_checkpoint(
+            self.current_tick,
+            dump_snapshot(self.grid),
+            self.is_playing,
+            Entity.registry.state(),
+            self.planner.state(),
+        )
+
+    def record(self, text: str) -> None:
+        if not self.journal.enabled:
+            return
+        if self.journal.checkpoint_due(self.current_tick):
+            self.checkpoint()
+        self.journal.record(self.current_tick, text)
+
+    # Puts the model back in the state it had at `tick`: restore the nearest
+    # checkpoint, then replay the journal tail up to `tick`. Everything
+    # recorded after `tick` is dropped.
+    def seek(self, tick: int) -> None:
+        if tick > self.current_tick:
+            raise ValueError(f"Can't seek ahead to tick {tick}")
+        if not self.journal.enabled:
+            raise ValueError("Can't seek with checkpoints turned off")
+        checkpoint = self.journal.checkpoint_before(tick)
+        tail = self.journal.rewind(checkpoint)
+        self.grid.clear_entities()
+        load_snapshot_bytes(checkpoint.snapshot, self.grid, restore_ids=True)
+        if checkpoint.registry_state is not None:
+            Entity.registry.restore(checkpoint.registry_state)
+        if checkpoint.planner_state is not None:
+            self.planner.restore(checkpoint.planner_state)
+        self.current_tick = checkpoint.tick
+        self.is_playing = checkpoint.is_playing
+
+        for entry_tick, text in tail:
+            command = Command(text)
+            if command.value not in ("fast_forward", "step"):
+                if entry_tick > tick:
+                    break
+                self.current_tick = entry_tick
+                self._replay(command)
+                continue
+            ticks = int(command.args[0])
+            start = entry_tick - ticks
+            if start >= tick:
+                break
+            if command.value == "fast_forward":
+                self.current_tick = start
+                self.fast_forward(min(ticks, tick - start))
+                continue
+            for step_tick in range(start + 1, min(entry_tick, tick) + 1):
+                self.current_tick = step_tick
+                self._replay(command)
+        self.current_tick = tick
+
+    def _replay(self, command: Command) -> None:
+        try:
+            if command.value == "step":
+                self.step()
+            else:
+                self.execute_command(command)
+        except (ValueError, IndexError):
+            # it failed the same way when it was first run
+            pass
+
     def step(self):
+        self.record("step")
+        stats = self.stats
+        stats.begin_tick()
+        start = perf_counter_ns()
+        self.planner.sync()
         self.move_entities()
-        self.process_entities()
+        self.planner.now += 1
+        process_start = perf_counter_ns()
+        processed = self.process_entities()
+        end = perf_counter_ns()
+        stats.add("process", end - process_start, processed)
+        stats.end_tick(self.current_tick, end - start)
 
-    def process_entities(self):
-        # Process entities
-        for _, _, entities in self.grid:
+    def run_ticks(self, n: int, fast_forward: bool = False) -> None:
+        remaining = n
+        while remaining > 0:
+            if fast_forward:
+                skipped = self.fast_forward(remaining)
+                if skipped:
+                    remaining -= skipped
+                    continue
+            self.current_tick += 1
+            self.step()
+            remaining -= 1
+
+    # Jumps ahead while every robot rides its own plain conveyor chain: nothing
+    # can collide and nothing gets processed, so each robot's position after
+    # k ticks is arithmetic on its chain offset. Returns the ticks skipped.
+    def fast_forward(self, max_ticks: int) -> int:
+        rides = []
+        riding = set()
+        ticks = max_ticks
+        for row, col, entities in self.grid.get_active_items():
+            found = self.chains.chain_at(row, col)
+            if found is None:
+                return 0
+            chain, offset = found
+            if not chain.is_plain or id(chain) in riding:
+                return 0
+            riding.add(id(chain))
+            horizon = chain.horizon(offset)
+            if horizon is not None:
+                ticks = min(ticks, horizon)
             for entity in entities:
-                entity.process(entities)
+                if entity.is_mobile:
+                    rides.append((entity, pack_coord(row, col), chain, offset))
 
-    def sort_items(
-        self, items: Iterator[tuple[int, int, List[Entity]]], grid: Grid
-    ) -> Iterator[tuple[int, int, List[Entity]]]:
-        def sort_key(item: tuple[int, int, List[Entity]]) -> tuple[bool, int, int]:
-            row, col, entities = item
+        if ticks <= 0 or not rides:
+            return 0
+        self.grid.apply_moves(
+            [
+                (entity, key, chain.key_after(offset, ticks))
+                for entity, key, chain, offset in rides
+            ]
+        )
+        self.current_tick += ticks
+        self.planner.now += ticks
+        self.record(f"fast_forward {ticks}")
+        return ticks
 
-            robot_in_same_place = False
+    def process_entities(self) -> int:
+        # Only cells with a mobile entity can do work; a factory or conveyor
+        # on its own has nothing to process.
+        processed = 0
+        for _, _, entities in self.grid.get_active_items():
             for entity in entities:
-                if isinstance(
-                    entity, Robot
-                ):  # Assuming `Robot` is the class/type for robots
-                    previous_position = grid.get_coord_of_entity(entity)
-                    if previous_position == (row, col):
-                        robot_in_same_place = True
-                        break
-            return (not robot_in_same_place, row, col)
-
-        # Convert iterator to list, sort it, and return as an iterator
-        sorted_items = sorted(items, key=sort_key)
-        return iter(sorted_items)
+                entity.process(entities)
+            processed += len(entities)
+        return processed
 
+    # Every robot proposes its next cell, then the reservation table decides
+    # who actually moves (see ReservationTable for the rules).
     def move_entities(self):
-        tmp_grid = Grid()
-        items = self.grid.get_items()
-        sorted_items = self.sort_items(items, self.grid)
-        for row, col, entities in sorted_items:
+        stats = self.stats
+        if self.vector_mover is not None:
+            start = perf_counter_ns()
+            self.vector_mover.move_entities(self.grid)
+            stats.add(
+                "move", perf_counter_ns() - start, self.vector_mover.robot_count()
+            )
+            return
+
+        start = perf_counter_ns()
+        table = self.reservations
+        table.clear()
+        for row, col, entities in self.grid.get_active_items():
             for entity in entities:
-                new_row, new_col = entity.move(tmp_grid, row, col, entities)
-                tmp_grid.add_entity_at(new_row, new_col, entity)
+                if entity.is_mobile:
+                    entity.move(table, row, col, entities)
+        resolve_start = perf_counter_ns()
+        stats.add("move", resolve_start - start, len(table))
 
-        # VERIFY CORRECT TMP BOARD STATE
-        # verify the new state of the board - if there is anything illegal (i.e. two robots on the same space, etc), handle it.
-        self.grid.copy_entities_from(tmp_grid)
+        moves = table.resolve()
+        table.notify_rejected()
+        apply_start = perf_counter_ns()
+        stats.add("resolve", apply_start - resolve_start, len(table))
+
+        self.grid.apply_moves(moves)
+        stats.add("apply", perf_counter_ns() - apply_start, len(moves))
 
     def execute_command(self, command: Command) -> None:
-        if command.value == "robot":
-            row = int(command.args[0])
-            col = int(command.args[1])
-            # moves = [DIRECTION.LEFT, DIRECTION.RIGHT, DIRECTION.UP, DIRECTION.DOWN]
-            # random_path = [random.choice(moves) for _ in range(10)]
-            r = Robot(path=[DIRECTION.WAIT])
-            self.grid.add_entity_at(row, col, r)
-        elif command.value == "factory":
-            x = int(command.args[0])
-            y = int(command.args[1])
-            r_type = command.args[2]
-            if r_type == "wood":
-                f = Factory(resource_type=Resource.WOOD)
-                self.grid.add_entity_at(x, y, f)
-            if r_type == "metal":
-                f = Factory(resource_type=Resource.METAL)
-                self.grid.add_entity_at(x, y, f)
-            if r_type == "stone":
-                f = Factory(resource_type=Resource.STONE)
-                self.grid.add_entity_at(x, y, f)
-        elif command.value == "conveyor":
-            x = int(command.args[0])
-            y = int(command.args[1])
-            conveyor_direction = command.args[2]
-            if conveyor_direction == "up":
-                c = Conveyor(direction=DIRECTION.UP)
-                self.grid.add_entity_at(x, y, c)
-            if conveyor_direction == "down":
-                c = Conveyor(direction=DIRECTION.DOWN)
-                self.grid.add_entity_at(x, y, c)
-            if conveyor_direction == "left":
-                c = Conveyor(direction=DIRECTION.LEFT)
-                self.grid.add_entity_at(x, y, c)
-            if conveyor_direction == "right":
-                c = Conveyor(direction=DIRECTION.RIGHT)
-                self.grid.add_entity_at(x, y, c)
-        elif command.value == "step":
-            self.step()
-        elif command.value == "delete":
-            entity_id = int(command.args[0])
-            entity = self.grid.get_entity_by_id(entity_id)
-            if entity:
-                self.grid.remove_entity(entity)
-        elif command.value == "play":
-            self.is_playing = True
-        elif command.value == "pause":
-            self.is_playing = False
-            print("paused")
-        elif command.value == "move":
-            entity_id = int(command.args[0])
-            direction = command.args[1]
-            entity = self.grid.get_entity_by_id(entity_id)
-            if entity:
-                if direction == "right":
-                    self.grid.move_entity_in_direction(entity, DIRECTION.RIGHT)
-                elif direction == "left":
-                    self.grid.move_entity_in_direction(entity, DIRECTION.LEFT)
-                elif direction == "up":
-                    self.grid.move_entity_in_direction(entity, DIRECTION.UP)
-                elif direction == "down":
-                    self.grid.move_entity_in_direction(entity, DIRECTION.DOWN)
-        elif command.value == "set":
-            specific_set_command = command.args[0]
-            if specific_set_command == "path":
-                entity_id = int(command.args[1])
-                str_path = command.args[2]
-                parsed_path = parse_path(str_path)
-                entity = self.grid.get_entity_by_id(entity_id)
-                if isinstance(entity, Robot):
-                    entity.set_path(parsed_path)
+        # step journals itself so direct calls are covered too
+        if command.value != "step":
+            self.record(command.buffer)
+        resolved = COMMANDS.resolve(command)
+        if resolved is not None:
+            handler, args = resolved
+            handler(self, *args)
+
+    # Runs one command per line, skipping blanks and # comments. Every line
+    # is parsed before the first one runs, so a typo can't leave a layout
+    # half built.
+    def run_script(self, lines: Iterable[str]) -> None:
+        commands = []
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            command = Command(line)
+            try:
+                resolved = COMMANDS.resolve(command)
+            except ValueError as error:
+                raise ValueError(f"line {number}: {error}")
+            if resolved is None:
+                raise ValueError(f"line {number}: unknown command {command.value!r}")
+            commands.append((command, resolved))
+
+        for command, (handler, args) in commands:
+            if command.value != "step":
+                self.record(command.buffer)
+            handler(self, *args)
 
     # called 60 times / second
     def update(self, signal: Optional[str]) -> None:
@@ -147,15 +256,23 @@ class DataModel:
             self.signal_queue.append(signal)
 
         if self.current_frame % self.delay_ms == 0:
-            self.current_tick += 1
-            if self.is_playing:
-                self.execute_command(Command("step"))
-            if self.signal_queue:
-                current_signal = self.signal_queue.popleft()
-                if current_signal:
-                    command = self.dispatcher.update(current_signal)
-                    if command:
+            self.tick()
+
+    # one tick of the game loop: step if playing, then handle one queued key
+    def tick(self) -> None:
+        self.current_tick += 1
+        if self.is_playing:
+            self.execute_command(Command("step"))
+        if self.signal_queue:
+            current_signal = self.signal_queue.popleft()
+            if current_signal:
+                command = self.dispatcher.update(current_signal)
+                if command:
+                    try:
                         self.execute_command(command)
+                    except ValueError as error:
+                        # a typo in the terminal shouldn't stop the game
+                        print(error)
 
     def run_seed(self):
         self.execute_command(Command("conveyor 5 5 right"))
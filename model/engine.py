@@ -0,0 +1,118 @@
+import time
+from typing import Iterable, List, Optional
+
+from components.grid import Grid
+from .data_model import DataModel
+from .modules import CommandDispatcher, TerminalEmulator
+from .sharding import ShardedSimulation
+from .snapshot import load_snapshot, save_snapshot
+
+
+def percentile(sorted_values: List[int], pct: float) -> int:
+    if not sorted_values:
+        return 0
+    index = round(pct / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+class TickReport:
+    def __init__(
+        self, ticks: int, entities: int, elapsed_ns: int, latencies_ns: List[int]
+    ):
+        self.ticks = ticks
+        self.entities = entities
+        self.elapsed_ns = elapsed_ns
+        self.latencies_ns = sorted(latencies_ns)
+
+    @property
+    def ticks_per_sec(self) -> float:
+        if not self.elapsed_ns:
+            return 0.0
+        return self.ticks / (self.elapsed_ns / 1e9)
+
+    @property
+    def entities_per_sec(self) -> float:
+        return self.ticks_per_sec * self.entities
+
+    def latency_ms(self, pct: float) -> float:
+        return percentile(self.latencies_ns, pct) / 1e6
+
+    def summary(self) -> str:
+        return (
+            f"ticks={self.ticks} entities={self.entities} "
+            f"elapsed={self.elapsed_ns / 1e9:.3f}s "
+            f"ticks/s={self.ticks_per_sec:.1f} entities/s={self.entities_per_sec:.1f} "
+            f"p50={self.latency_ms(50):.3f}ms p90={self.latency_ms(90):.3f}ms "
+            f"p99={self.latency_ms(99):.3f}ms max={self.latency_ms(100):.3f}ms"
+        )
+
+
+# Runs a DataModel without pyxel, as fast as the simulation allows. Periodic
+# checkpoints are off unless `checkpoint_interval` is given, so snapshot
+# dumps don't show up as stalls in the tick latencies.
+class HeadlessEngine:
+    def __init__(
+        self,
+        model: Optional[DataModel] = None,
+        vectorized: bool = False,
+        fast_forward: bool = False,
+        checkpoint_interval: Optional[int] = None,
+    ):
+        if model is None:
+            model = DataModel(
+                CommandDispatcher(TerminalEmulator()),
+                Grid(),
+                vectorized=vectorized,
+                checkpoint_interval=checkpoint_interval,
+            )
+        self.model = model
+        self.fast_forward = fast_forward
+
+    def load_seed(self) -> None:
+        self.model.run_seed()
+
+    def load_script(self, lines: Iterable[str]) -> None:
+        self.model.run_script(lines)
+
+    def load_script_file(self, path: str) -> None:
+        with open(path) as script:
+            self.load_script(script)
+
+    def load_snapshot(self, path: str) -> None:
+        load_snapshot(path, self.model.grid)
+
+    def save_snapshot(self, path: str) -> None:
+        save_snapshot(self.model.grid, path)
+
+    # Runs the current world split across worker processes, then puts the
+    # result back into the model's grid so saving or reporting on it sees
+    # the world after the run.
+    def run_sharded_ticks(self, n: int, shards: int) -> TickReport:
+        latencies: List[int] = []
+        with ShardedSimulation(self.model.grid, shards) as simulation:
+            start = time.perf_counter_ns()
+            for _ in range(n):
+                tick_start = time.perf_counter_ns()
+                simulation.step()
+                latencies.append(time.perf_counter_ns() - tick_start)
+            elapsed = time.perf_counter_ns() - start
+            self.model.grid.copy_entities_from(simulation.gather())
+        self.model.current_tick += n
+        return TickReport(n, self.model.grid.entity_count(), elapsed, latencies)
+
+    def run_ticks(self, n: int) -> TickReport:
+        latencies: List[int] = []
+        start = time.perf_counter_ns()
+        done = 0
+        while done < n:
+            tick_start = time.perf_counter_ns()
+            advanced = self.model.fast_forward(n - done) if self.fast_forward else 0
+            if not advanced:
+                self.model.run_ticks(1)
+                advanced = 1
+            # a fast-forward jump is spread evenly over the ticks it covered
+            latency = (time.perf_counter_ns() - tick_start) // advanced
+            latencies.extend([latency] * advanced)
+            done += advanced
+        elapsed = time.perf_counter_ns() - start
+        return TickReport(n, self.model.grid.entity_count(), elapsed, latencies)
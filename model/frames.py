@@ -0,0 +1,187 @@
+from heapq import merge
+from itertools import islice
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import Entity, Resource
+from components.grid import CHUNK_BITS, Grid, chunk_key_of, pack_coord, unpack_coord
+from const import DIRECTION
+from .data_model import DataModel
+
+CONVEYOR_GLYPHS = {
+    DIRECTION.RIGHT: ">",
+    DIRECTION.LEFT: "<",
+    DIRECTION.UP: "^",
+    DIRECTION.DOWN: "v",
+}
+# robots and factories listed next to the grid; more don't fit on screen
+PANEL_SIZE = 14
+
+
+def static_glyph(entities: List[Entity]) -> Optional[str]:
+    conveyor = None
+    for entity in entities:
+        if isinstance(entity, Factory):
+            return "f"
+        if isinstance(entity, Conveyor):
+            conveyor = entity
+    if conveyor is not None:
+        return CONVEYOR_GLYPHS.get(conveyor.direction)
+    return None
+
+
+def robot_glyph(entities: List[Entity]) -> str:
+    robots = 0
+    for entity in entities:
+        if isinstance(entity, Factory):
+            return "F"
+        if isinstance(entity, Robot):
+            robots += 1
+    return "o" if robots == 1 else "O"  # more than one
+
+
+# Glyphs of every cell holding a factory or conveyor, grouped by chunk. Never
+# changed once published; updates make a new one that shares every chunk
+# they didn't touch, so an edit costs the chunks it lands in, not the world.
+class StaticSnapshot:
+    def __init__(self, by_chunk: Optional[Dict[int, Dict[int, str]]] = None):
+        # chunk key -> {cell key: glyph}
+        self.by_chunk: Dict[int, Dict[int, str]] = by_chunk or {}
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> "StaticSnapshot":
+        return cls().updated(grid, [pack_coord(row, col) for row, col, _ in grid])
+
+    # copy with the glyphs of `keys` re-read from the grid
+    def updated(self, grid: Grid, keys: List[int]) -> "StaticSnapshot":
+        by_chunk = dict(self.by_chunk)
+        copied: Set[int] = set()
+        for key in keys:
+            row, col = unpack_coord(key)
+            glyph = static_glyph(grid.get_entities_at(row, col))
+            chunk_key = chunk_key_of(key)
+            if chunk_key not in copied:
+                by_chunk[chunk_key] = dict(by_chunk.get(chunk_key, ()))
+                copied.add(chunk_key)
+            if glyph is None:
+                by_chunk[chunk_key].pop(key, None)
+            else:
+                by_chunk[chunk_key][key] = glyph
+        for chunk_key in copied:
+            if not by_chunk[chunk_key]:
+                del by_chunk[chunk_key]
+        return StaticSnapshot(by_chunk)
+
+    def glyph_at(self, key: int) -> Optional[str]:
+        glyphs = self.by_chunk.get(chunk_key_of(key))
+        return None if glyphs is None else glyphs.get(key)
+
+    def query_rect(
+        self, row0: int, col0: int, row1: int, col1: int
+    ) -> Iterator[tuple[int, int, str]]:
+        for chunk_row in range(row0 >> CHUNK_BITS, (row1 >> CHUNK_BITS) + 1):
+            for chunk_col in range(col0 >> CHUNK_BITS, (col1 >> CHUNK_BITS) + 1):
+                glyphs = self.by_chunk.get(pack_coord(chunk_row, chunk_col), {})
+                for key, glyph in glyphs.items():
+                    row, col = unpack_coord(key)
+                    if row0 <= row <= row1 and col0 <= col <= col1:
+                        yield row, col, glyph
+
+
+# Everything the view needs for one tick, copied out of the model so it can be
+# drawn from another thread while the simulation keeps going.
+class WorldFrame:
+    def __init__(
+        self,
+        tick: int,
+        is_playing: bool,
+        terminal_text: str,
+        robots: List[tuple[int, int, str]],
+        panel: List[tuple[str, str]],
+        static: StaticSnapshot,
+        static_version: int,
+        static_dirty: Optional[FrozenSet[int]],
+    ):
+        self.tick = tick
+        self.is_playing = is_playing
+        self.terminal_text = terminal_text
+        # (row, col, glyph) of every cell holding a robot
+        self.robots = robots
+        # two text lines per listed robot or factory
+        self.panel = panel
+        self.static = static
+        self.static_version = static_version
+        # cells changed since static_version - 1, or None if all of them
+        self.static_dirty = static_dirty
+
+
+# Builds WorldFrames on the simulation side. Static glyphs are only re-read
+# for cells the grid reports as changed.
+class FramePublisher:
+    def __init__(self, model: DataModel):
+        self.model = model
+        self._grid: Optional[Grid] = None
+        self._static = StaticSnapshot()
+        self._static_version = 0
+        self._dirty: Set[int] = set()
+        self._rebuild = True
+        self.latest: Optional[WorldFrame] = None
+
+    def _on_static_changed(self, key: Optional[int]) -> None:
+        if key is None:
+            self._rebuild = True
+        else:
+            self._dirty.add(key)
+
+    def publish(self) -> WorldFrame:
+        model = self.model
+        grid = model.grid
+        if grid is not self._grid:
+            self._grid = grid
+            grid.add_static_listener(self._on_static_changed)
+            self._rebuild = True
+
+        static_dirty: Optional[FrozenSet[int]] = frozenset()
+        if self._rebuild:
+            self._static = StaticSnapshot.from_grid(grid)
+            self._static_version += 1
+            static_dirty = None
+        elif self._dirty:
+            self._static = self._static.updated(grid, list(self._dirty))
+            self._static_version += 1
+            static_dirty = frozenset(self._dirty)
+        self._rebuild = False
+        self._dirty = set()
+
+        robots = [
+            (row, col, robot_glyph(entities))
+            for row, col, entities in grid.get_active_items()
+        ]
+        listed = merge(
+            grid.iter_entities(Robot),
+            grid.iter_entities(Factory),
+            key=lambda entity: entity.id,
+        )
+        panel = [
+            (
+                f"({entity.id}) {'R' if isinstance(entity, Robot) else 'F'}"
+                f" - {entity.name}",
+                f"  W:{entity.count_resource(Resource.WOOD)}"
+                f" M:{entity.count_resource(Resource.METAL)}"
+                f" S:{entity.count_resource(Resource.STONE)}",
+            )
+            for entity in islice(listed, PANEL_SIZE)
+        ]
+
+        self.latest = WorldFrame(
+            model.current_tick,
+            model.is_playing,
+            model.get_terminal_text(),
+            robots,
+            panel,
+            self._static,
+            self._static_version,
+            static_dirty,
+        )
+        return self.latest
@@ -0,0 +1,110 @@
+from bisect import bisect_right
+from typing import Any, List, Optional
+
+
+class Checkpoint:
+    def __init__(
+        self,
+        tick: int,
+        entry_index: int,
+        snapshot: bytes,
+        is_playing: bool,
+        registry_state: Any = None,
+        planner_state: Any = None,
+    ):
+        self.tick = tick
+        # number of journal entries already reflected in the snapshot
+        self.entry_index = entry_index
+        self.snapshot = snapshot
+        self.is_playing = is_playing
+        # EntityRegistry.state(), so replays hand out the same ids
+        self.registry_state = registry_state
+        # FleetPlanner.state(), so replays replan the way the live run did
+        self.planner_state = planner_state
+
+
+# Append-only record of everything that changed a DataModel: each entry is
+# (tick, command text). Checkpoints are snapshots taken every
+# `checkpoint_interval` ticks, so reaching any tick only replays the entries
+# recorded since the checkpoint before it. Past `max_checkpoints` every
+# other one is dropped (never the first or the newest), so memory stays
+# bounded and older history just takes longer to replay. Consecutive steps
+# share one "step N" entry, recorded at the tick the run ends on like
+# fast_forward's. With `checkpoint_interval=None` nothing is journaled.
+class Journal:
+    def __init__(
+        self,
+        checkpoint_interval: Optional[int] = 1000,
+        max_checkpoints: Optional[int] = 16,
+    ):
+        self.checkpoint_interval = checkpoint_interval
+        self.max_checkpoints = max_checkpoints
+        self.entries: List[tuple[int, str]] = []
+        self.checkpoints: List[Checkpoint] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.checkpoint_interval is not None
+
+    def record(self, tick: int, text: str) -> None:
+        if text == "step":
+            # only runs recorded since the last checkpoint can grow, since
+            # its snapshot already reflects the entries before it
+            first = self.checkpoints[-1].entry_index if self.checkpoints else 0
+            if len(self.entries) > first:
+                last_tick, last_text = self.entries[-1]
+                if last_tick == tick - 1 and last_text.startswith("step "):
+                    steps = int(last_text.split()[1]) + 1
+                    self.entries[-1] = (tick, f"step {steps}")
+                    return
+            text = "step 1"
+        self.entries.append((tick, text))
+
+    def add_checkpoint(
+        self,
+        tick: int,
+        snapshot: bytes,
+        is_playing: bool,
+        registry_state: Any = None,
+        planner_state: Any = None,
+    ) -> None:
+        self.checkpoints.append(
+            Checkpoint(
+                tick,
+                len(self.entries),
+                snapshot,
+                is_playing,
+                registry_state,
+                planner_state,
+            )
+        )
+        if (
+            self.max_checkpoints is not None
+            and len(self.checkpoints) > max(self.max_checkpoints, 2)
+        ):
+            self.checkpoints = self.checkpoints[:-1:2] + [self.checkpoints[-1]]
+
+    def checkpoint_due(self, tick: int) -> bool:
+        if not self.checkpoints:
+            return True
+        if self.checkpoint_interval is None:
+            return False
+        return tick - self.checkpoints[-1].tick >= self.checkpoint_interval
+
+    def checkpoint_before(self, tick: int) -> Checkpoint:
+        index = bisect_right([checkpoint.tick for checkpoint in self.checkpoints], tick)
+        if index == 0:
+            raise ValueError(f"No checkpoint at or before tick {tick}")
+        return self.checkpoints[index - 1]
+
+    # Drops everything recorded after `checkpoint` and returns the dropped
+    # entries, oldest first.
+    def rewind(self, checkpoint: Checkpoint) -> List[tuple[int, str]]:
+        tail = self.entries[checkpoint.entry_index :]
+        del self.entries[checkpoint.entry_index :]
+        keep = self.checkpoints.index(checkpoint) + 1
+        del self.checkpoints[keep:]
+        return tail
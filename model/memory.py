@@ -0,0 +1,95 @@
+import sys
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Set
+
+from components.entity import Entity
+from components.grid import Grid
+
+
+def _slot_names(cls: type) -> Iterator[str]:
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        yield from (slots,) if isinstance(slots, str) else slots
+
+
+# Bytes owned by one entity: the object, its attribute values and the
+# containers it holds. Objects already in `seen` (pooled names, the shared
+# default path, EMPTY_COUNTS, small ints) are only counted the first time,
+# and enum members never, since they exist once per process.
+def entity_bytes(entity: Entity, seen: Set[int]) -> int:
+    owned: List[Any] = [entity, entity.resources, entity.resources._counts]
+    for name in _slot_names(type(entity)):
+        value = getattr(entity, name, None)
+        if value is not None and not isinstance(value, Enum):
+            owned.append(value)
+    size = 0
+    for value in owned:
+        if id(value) not in seen:
+            seen.add(id(value))
+            size += sys.getsizeof(value)
+    return size
+
+
+# The grid's own bookkeeping: cell, id and type indexes plus the chunks.
+def grid_bytes(grid: Grid) -> int:
+    size = sum(
+        sys.getsizeof(index)
+        for index in (
+            grid._entities_at_coord,
+            grid._coord_of_entity,
+            grid._entity_by_id,
+            grid._ids_by_type,
+            grid._chunks,
+            grid._active_chunks,
+        )
+    )
+    size += sum(sys.getsizeof(cell) for cell in grid._entities_at_coord.values())
+    size += sum(sys.getsizeof(ids) for ids in grid._ids_by_type.values())
+    for chunk in grid._chunks.values():
+        size += sys.getsizeof(chunk) + sys.getsizeof(chunk.__dict__)
+        size += sys.getsizeof(chunk.cells) + sys.getsizeof(chunk.active)
+    return size
+
+
+class MemoryReport:
+    def __init__(
+        self, counts: Dict[str, int], bytes_by_type: Dict[str, int], grid: int
+    ):
+        self.counts = counts
+        self.bytes_by_type = bytes_by_type
+        self.grid_bytes = grid
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> "MemoryReport":
+        counts: Dict[str, int] = {}
+        bytes_by_type: Dict[str, int] = {}
+        seen: Set[int] = set()
+        for entity in grid.iter_entities(Entity):
+            name = type(entity).__name__
+            counts[name] = counts.get(name, 0) + 1
+            bytes_by_type[name] = bytes_by_type.get(name, 0) + entity_bytes(
+                entity, seen
+            )
+        return cls(counts, bytes_by_type, grid_bytes(grid))
+
+    def bytes_per_entity(self, type_name: str) -> float:
+        count = self.counts.get(type_name, 0)
+        return self.bytes_by_type.get(type_name, 0) / count if count else 0.0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.bytes_by_type.values()) + self.grid_bytes
+
+    def summary(self) -> str:
+        lines = [
+            f"{name}: {self.counts[name]} x {self.bytes_per_entity(name):.0f}B"
+            f" = {self.bytes_by_type[name] / 1e6:.2f}MB"
+            for name in sorted(self.counts)
+        ]
+        entities = sum(self.counts.values())
+        per_entity = self.total_bytes / entities if entities else 0.0
+        lines.append(f"grid indexes: {self.grid_bytes / 1e6:.2f}MB")
+        lines.append(
+            f"total: {self.total_bytes / 1e6:.2f}MB ({per_entity:.0f}B per entity)"
+        )
+        return "\n".join(lines)
@@ -0,0 +1,212 @@
+from collections import deque
+from typing import Dict, List, Optional
+
+from components.conveyor import Conveyor
+from components.grid import Grid, pack_coord, unpack_coord
+from const import DIRECTION
+
+# moves tried when leaving a cell, in this order when several are as short
+STEPS = [
+    (DIRECTION.UP, -1, 0),
+    (DIRECTION.DOWN, 1, 0),
+    (DIRECTION.LEFT, 0, -1),
+    (DIRECTION.RIGHT, 0, 1),
+]
+# empty cells kept around the static entities, so routes can go around them
+MARGIN = 2
+
+
+# Number of ticks from every cell in a rectangle to `target`, found with one
+# breadth-first search outwards from the target. A robot on a conveyor can
+# only go where the conveyor takes it; anywhere else it can step either way.
+# Robots aren't obstacles: they only hold a cell for a tick and the
+# reservation table sorts that out when moving.
+class DistanceField:
+    def __init__(
+        self,
+        grid: Grid,
+        target: tuple[int, int],
+        bounds: tuple[int, int, int, int],
+    ):
+        self.target = target
+        self.bounds = bounds
+        row0, col0, row1, col1 = bounds
+        self._width = col1 - col0 + 1
+        self._conveyors: Dict[int, DIRECTION] = {}
+        for row, col, entities in grid.query_rect(row0, col0, row1, col1):
+            for entity in entities:
+                if isinstance(entity, Conveyor):
+                    self._conveyors[pack_coord(row, col)] = entity.direction
+        self._distances: List[int] = [-1] * (self._width * (row1 - row0 + 1))
+        self._search()
+
+    def contains(self, row: int, col: int) -> bool:
+        row0, col0, row1, col1 = self.bounds
+        return row0 <= row <= row1 and col0 <= col <= col1
+
+    def _index(self, row: int, col: int) -> int:
+        return (row - self.bounds[0]) * self._width + col - self.bounds[1]
+
+    def _search(self) -> None:
+        distances = self._distances
+        conveyors = self._conveyors
+        distances[self._index(*self.target)] = 0
+        queue = deque([self.target])
+        while queue:
+            row, col = queue.popleft()
+            distance = distances[self._index(row, col)] + 1
+            for direction, d_row, d_col in STEPS:
+                # a robot at (from_row, from_col) reaches us by going back
+                from_row, from_col = row - d_row, col - d_col
+                if not self.contains(from_row, from_col):
+                    continue
+                index = self._index(from_row, from_col)
+                if distances[index] >= 0:
+                    continue
+                forced = conveyors.get(pack_coord(from_row, from_col))
+                if forced is not None and forced != direction:
+                    continue
+                distances[index] = distance
+                queue.append((from_row, from_col))
+
+    # the direction a conveyor pushes robots at this cell, if there is one
+    def forced_move(self, row: int, col: int) -> Optional[DIRECTION]:
+        return self._conveyors.get(pack_coord(row, col))
+
+    # ticks to the target, or None when it can't be reached from here
+    def distance(self, row: int, col: int) -> Optional[int]:
+        if not self.contains(row, col):
+            return None
+        distance = self._distances[self._index(row, col)]
+        return None if distance < 0 else distance
+
+    # The path for Robot.set_path. Cells with a conveyor get no entry, since
+    # robots riding a conveyor don't advance along their path.
+    def route(self, row: int, col: int) -> List[DIRECTION]:
+        distance = self.distance(row, col)
+        if distance is None:
+            raise ValueError(f"No route from ({row}, {col}) to {self.target}")
+        path = []
+        while distance > 0:
+            forced = self.forced_move(row, col)
+            for direction, d_row, d_col in STEPS:
+                if forced is not None and forced != direction:
+                    continue
+                if self.distance(row + d_row, col + d_col) == distance - 1:
+                    break
+            if forced is None:
+                path.append(direction)
+            row, col, distance = row + d_row, col + d_col, distance - 1
+        return path
+
+
+# Distance fields shared by every robot heading for the same cell. A field
+# only covers the target and the starts it was asked about, plus a margin;
+# when a start can't be reached the margin doubles, up to the bounding box of
+# every static entity (past which nothing is in the way). A field is dropped
+# when a static entity inside it changes and rebuilt on the next request, so
+# a thousand robots going to one factory cost one search and an edit
+# elsewhere costs nothing.
+class DistanceFields:
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        self._fields: Dict[int, DistanceField] = {}
+        # (row0, col0, row1, col1) around every static cell seen so far; it
+        # only grows, except when the whole grid changes
+        self._static_box: Optional[tuple[int, int, int, int]] = None
+        self.searches = 0
+        for row, col, entities in grid:
+            if any(not entity.is_mobile for entity in entities):
+                self._extend_static_box(row, col)
+        grid.add_static_listener(self._on_static_changed)
+
+    def _extend_static_box(self, row: int, col: int) -> None:
+        box = self._static_box
+        if box is None:
+            self._static_box = (row, col, row, col)
+        else:
+            self._static_box = (
+                min(box[0], row),
+                min(box[1], col),
+                max(box[2], row),
+                max(box[3], col),
+            )
+
+    def _on_static_changed(self, key: Optional[int]) -> None:
+        if key is None:
+            self._fields.clear()
+            self._static_box = None
+            return
+        row, col = unpack_coord(key)
+        self._extend_static_box(row, col)
+        for target_key, field in list(self._fields.items()):
+            if field.contains(row, col):
+                del self._fields[target_key]
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    # Fields never change once built, so a copy of the cache is cheap. Putting
+    # it back gives a restored world the same routes it had, not ones from
+    # fields that grew differently since.
+    def state(self) -> Dict[int, DistanceField]:
+        return dict(self._fields)
+
+    def restore(self, state: Dict[int, DistanceField]) -> None:
+        self._fields = dict(state)
+
+    # The largest rectangle worth searching: every static entity and the
+    # given cells, plus a margin to go around them.
+    def _limit(self, cells: List[tuple[int, int]]) -> tuple[int, int, int, int]:
+        rows = [row for row, _ in cells]
+        cols = [col for _, col in cells]
+        if self._static_box is not None:
+            row0, col0, row1, col1 = self._static_box
+            rows += [row0, row1]
+            cols += [col0, col1]
+        return (
+            min(rows) - MARGIN,
+            min(cols) - MARGIN,
+            max(rows) + MARGIN,
+            max(cols) + MARGIN,
+        )
+
+    def field_to(
+        self, row: int, col: int, start: Optional[tuple[int, int]] = None
+    ) -> DistanceField:
+        key = pack_coord(row, col)
+        field = self._fields.get(key)
+        cells = [(row, col)] if start is None else [(row, col), start]
+        if field is not None:
+            if start is None or field.distance(*start) is not None:
+                return field
+            cells += [field.bounds[:2], field.bounds[2:]]
+            if field.contains(*start) and field.bounds == self._limit(cells):
+                return field  # already as big as it gets: unreachable
+
+        limit = self._limit(cells)
+        row0 = min(row for row, _ in cells)
+        col0 = min(col for _, col in cells)
+        row1 = max(row for row, _ in cells)
+        col1 = max(col for _, col in cells)
+        margin = MARGIN
+        while True:
+            bounds = (
+                max(row0 - margin, limit[0]),
+                max(col0 - margin, limit[1]),
+                min(row1 + margin, limit[2]),
+                min(col1 + margin, limit[3]),
+            )
+            field = DistanceField(self.grid, (row, col), bounds)
+            self.searches += 1
+            if start is None or field.distance(*start) is not None or bounds == limit:
+                break
+            margin *= 2
+        self._fields[key] = field
+        return field
+
+    def route(
+        self, from_row: int, from_col: int, to_row: int, to_col: int
+    ) -> List[DIRECTION]:
+        field = self.field_to(to_row, to_col, (from_row, from_col))
+        return field.route(from_row, from_col)
@@ -0,0 +1,317 @@
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from components import Robot
+from components.grid import Grid, pack_coord, unpack_coord
+from const import DIRECTION
+from .pathfinding import STEPS, DistanceField, DistanceFields
+
+# extra ticks a robot may spend waiting for others on top of its distance
+MAX_DELAY = 32
+DIRECTION_OF_STEP = {(d_row, d_col): direction for direction, d_row, d_col in STEPS}
+DIRECTION_OF_STEP[(0, 0)] = DIRECTION.WAIT
+
+
+# Where one robot is at every planner tick from `start` on. After the last
+# cell it stays parked at its goal.
+class Plan:
+    def __init__(self, robot: Robot, goal: int, start: int, keys: List[int]):
+        self.robot = robot
+        self.goal = goal
+        self.start = start
+        self.keys = keys
+        self.cells = set(keys)
+        # no route was found; the robot holds its cell and retries every tick
+        self.waiting = False
+        # the path list handed to the robot; once the robot has another one,
+        # someone else took it over
+        self.path: Optional[List[DIRECTION]] = None
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.keys) - 1
+
+    def key_at(self, tick: int) -> int:
+        return self.keys[min(max(tick - self.start, 0), len(self.keys) - 1)]
+
+
+# Cooperative space-time A*: robots are planned one after another (lowest id
+# first), each avoiding the cells earlier robots have reserved at every tick.
+# Plans never put two robots in one cell, never swap two robots and never
+# close a cycle, so the reservation table lets every planned move through.
+# Robots without a goal are treated as parked where they are.
+#
+# `now` counts the planner's own ticks; DataModel.step calls sync() before
+# moving and bumps `now` afterwards. sync() only replans robots that left
+# their plan or whose route crosses a changed static cell. A plan is dropped
+# once its robot is parked on the goal or gets a path or program from
+# somewhere else, so the planner never takes a robot back.
+class FleetPlanner:
+    def __init__(self, grid: Grid, fields: DistanceFields):
+        self.grid = grid
+        self.fields = fields
+        self.now = 0
+        self.plans: Dict[int, Plan] = {}
+        # cell -> {tick: robot id}
+        self._reserved: Dict[int, Dict[int, int]] = {}
+        # goal cell -> (tick from which it's held, robot id)
+        self._parked: Dict[int, tuple[int, int]] = {}
+        self._stale: Set[int] = set()
+        self.replans = 0
+        grid.add_static_listener(self._on_static_changed)
+
+    def _on_static_changed(self, key: Optional[int]) -> None:
+        if key is None:
+            self.plans.clear()
+            self._reserved.clear()
+            self._parked.clear()
+            self._stale.clear()
+            return
+        for robot_id, plan in self.plans.items():
+            if key in plan.cells:
+                self._stale.add(robot_id)
+
+    def __len__(self) -> int:
+        return len(self.plans)
+
+    # Everything sync() and plan() depend on, with robots by id so it can be
+    # put back into a grid loaded from a snapshot.
+    def state(self) -> tuple:
+        plans = [
+            (
+                robot_id,
+                plan.goal,
+                plan.start,
+                plan.keys,
+                plan.waiting,
+                plan.robot.path is plan.path,
+            )
+            for robot_id, plan in self.plans.items()
+        ]
+        return (
+            self.now,
+            plans,
+            {key: dict(reserved) for key, reserved in self._reserved.items()},
+            dict(self._parked),
+            set(self._stale),
+            self.fields.state(),
+        )
+
+    def restore(self, state: tuple) -> None:
+        now, plans, reserved, parked, stale, fields = state
+        self.now = now
+        self._reserved = {key: dict(ticks) for key, ticks in reserved.items()}
+        self._parked = dict(parked)
+        self._stale = set(stale)
+        self.fields.restore(fields)
+        self.plans = {}
+        removed = []
+        for robot_id, goal, start, keys, waiting, following in plans:
+            robot: Any = self.grid.get_entity_by_id(robot_id)
+            plan = Plan(robot, goal, start, keys)
+            plan.waiting = waiting
+            if robot is None:
+                removed.append(robot_id)
+            elif following:
+                plan.path = robot.path
+            self.plans[robot_id] = plan
+        for robot_id in removed:
+            self.release(robot_id)
+
+    def _occupant(self, key: int, tick: int) -> Optional[int]:
+        reserved = self._reserved.get(key)
+        if reserved is not None and tick in reserved:
+            return reserved[tick]
+        parked = self._parked.get(key)
+        if parked is not None and tick >= parked[0]:
+            return parked[1]
+        return None
+
+    def _reserve(self, robot_id: int, plan: Plan) -> None:
+        self.plans[robot_id] = plan
+        for offset, key in enumerate(plan.keys):
+            self._reserved.setdefault(key, {})[plan.start + offset] = robot_id
+        self._parked[plan.goal if not plan.waiting else plan.keys[-1]] = (
+            plan.end,
+            robot_id,
+        )
+
+    def release(self, robot_id: int) -> None:
+        plan = self.plans.pop(robot_id, None)
+        self._stale.discard(robot_id)
+        if plan is None:
+            return
+        for offset, key in enumerate(plan.keys):
+            reserved = self._reserved[key]
+            if reserved.get(plan.start + offset) == robot_id:
+                del reserved[plan.start + offset]
+                if not reserved:
+                    del self._reserved[key]
+        for key in (plan.goal, plan.keys[-1]):
+            if self._parked.get(key, (0, None))[1] == robot_id:
+                del self._parked[key]
+
+    # Whether robot_id can go from `key` to `to_key` between `tick` and the
+    # next one without meeting a reserved robot, swapping with one or
+    # closing a cycle of robots waiting on each other.
+    def _can_move(
+        self, robot_id: int, key: int, to_key: int, tick: int, blocked: Set[int]
+    ) -> bool:
+        if to_key in blocked:
+            return False
+        if self._occupant(to_key, tick + 1) not in (None, robot_id):
+            return False
+        if to_key == key:
+            return True
+        cell = to_key
+        other = self._occupant(cell, tick)
+        for _ in range(len(self.plans) + 1):
+            if other is None or other == robot_id:
+                return True
+            cell = self.plans[other].key_at(tick + 1)
+            if cell == key:
+                return False
+            other = self._occupant(cell, tick)
+        return False
+
+    def _search(
+        self, robot_id: int, start: int, goal: int, blocked: Set[int]
+    ) -> Optional[List[int]]:
+        field = self.fields.field_to(*unpack_coord(goal), unpack_coord(start))
+        if field.forced_move(*unpack_coord(goal)) is not None:
+            return None  # nobody can stay on a conveyor
+        distance = field.distance(*unpack_coord(start))
+        if distance is None:
+            return None
+        parked = self._parked.get(goal)
+        if parked is not None and parked[1] != robot_id:
+            return None
+        # the goal must stay free once we're parked on it
+        free_from = max(
+            (
+                tick + 1
+                for tick, other in self._reserved.get(goal, {}).items()
+                if other != robot_id
+            ),
+            default=self.now,
+        )
+        deadline = self.now + distance + MAX_DELAY
+
+        came_from: Dict[tuple[int, int], int] = {}
+        queue = [(self.now + distance, self.now, start)]
+        seen = {(start, self.now)}
+        while queue:
+            _, tick, key = heapq.heappop(queue)
+            if key == goal and tick >= free_from:
+                keys = [key]
+                while (key, tick) in came_from:
+                    key = came_from[(key, tick)]
+                    tick -= 1
+                    keys.append(key)
+                keys.reverse()
+                return keys
+            if tick >= deadline:
+                continue
+            row, col = unpack_coord(key)
+            forced = field.forced_move(row, col)
+            for direction, d_row, d_col in STEPS + [(DIRECTION.WAIT, 0, 0)]:
+                if forced is not None and forced != direction:
+                    continue
+                remaining = field.distance(row + d_row, col + d_col)
+                if remaining is None:
+                    continue
+                to_key = pack_coord(row + d_row, col + d_col)
+                if (to_key, tick + 1) in seen:
+                    continue
+                if not self._can_move(robot_id, key, to_key, tick, blocked):
+                    continue
+                seen.add((to_key, tick + 1))
+                came_from[(to_key, tick + 1)] = key
+                heapq.heappush(queue, (tick + 1 + remaining, tick + 1, to_key))
+        return None
+
+    def _path(self, field: DistanceField, keys: List[int]) -> List[DIRECTION]:
+        path = []
+        for key, to_key in zip(keys, keys[1:]):
+            row, col = unpack_coord(key)
+            if field.forced_move(row, col) is None:
+                to_row, to_col = unpack_coord(to_key)
+                path.append(DIRECTION_OF_STEP[(to_row - row, to_col - col)])
+        return path + [DIRECTION.WAIT]
+
+    def _outsiders(self) -> Set[int]:
+        return {
+            pack_coord(*self.grid.get_coord_of_entity(robot))
+            for robot in self.grid.iter_entities(Robot)
+            if robot.id not in self.plans
+        }
+
+    # Plans the robots in id order and hands each its path. Returns how many
+    # got a route; the others wait in place until sync() finds them one.
+    def plan(self, goals: Dict[Robot, tuple[int, int]]) -> int:
+        robots = sorted(goals, key=lambda robot: robot.id)
+        blocked = self._outsiders()
+        for robot in robots:
+            blocked.discard(pack_coord(*self.grid.get_coord_of_entity(robot)))
+            self.release(robot.id)
+        return self._plan_all(
+            [(robot, pack_coord(*goals[robot])) for robot in robots], blocked
+        )
+
+    def _plan_all(self, goals: Iterable[tuple[Robot, int]], blocked: Set[int]) -> int:
+        planned = 0
+        for robot, goal in goals:
+            start = pack_coord(*self.grid.get_coord_of_entity(robot))
+            keys = self._search(robot.id, start, goal, blocked)
+            if keys is None:
+                plan = Plan(robot, goal, self.now, [start])
+                plan.waiting = True
+                robot.set_path([DIRECTION.WAIT], repeat=False)
+            else:
+                plan = Plan(robot, goal, self.now, keys)
+                field = self.fields.field_to(*unpack_coord(goal))
+                robot.set_path(self._path(field, keys), repeat=False)
+                planned += 1
+            plan.path = robot.path
+            self._reserve(robot.id, plan)
+        return planned
+
+    # Replans the robots that aren't where their plan says, whose route
+    # crosses a changed static cell, or that are still waiting for a route.
+    # Robots that were removed from the grid, were given another path or
+    # program, or are parked on their goal are dropped.
+    def sync(self) -> int:
+        if not self.plans:
+            return 0
+        invalid = []
+        for robot_id, plan in list(self.plans.items()):
+            robot = plan.robot
+            coord = self.grid.get_coord_of_entity(robot)
+            if (
+                coord is None
+                or robot.path is not plan.path
+                or robot.program is not None
+            ):
+                self.release(robot_id)
+            elif (
+                not plan.waiting
+                and self.now >= plan.end
+                and pack_coord(*coord) == plan.goal
+                and robot_id not in self._stale
+            ):
+                self.release(robot_id)
+            elif (
+                plan.waiting
+                or robot_id in self._stale
+                or pack_coord(*coord) != plan.key_at(self.now)
+            ):
+                invalid.append(plan)
+        if not invalid:
+            return 0
+        invalid.sort(key=lambda plan: plan.robot.id)
+        blocked = self._outsiders()
+        for plan in invalid:
+            self.release(plan.robot.id)
+        self.replans += len(invalid)
+        self._plan_all([(plan.robot, plan.goal) for plan in invalid], blocked)
+        return len(invalid)
@@ -0,0 +1,265 @@
+import multiprocessing
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional
+
+from components.entity import Entity
+from components.grid import Grid, ReservationTable, pack_coord, unpack_coord
+
+# (from key, to key) of a robot heading into another shard's rows
+Claim = tuple[int, int]
+
+
+# Splits the occupied rows into bands at least two rows tall, so robots only
+# ever interact with the band directly above or below them. The first and
+# last band are open-ended.
+def split_rows(grid: Grid, shards: int) -> List[int]:
+    rows = [row for row, _, _ in grid]
+    if not rows or shards <= 1:
+        return []
+    first, last = min(rows), max(rows)
+    height = max(2, -(-(last - first + 1) // shards))
+    return list(range(first + height, last + 1, height))[: shards - 1]
+
+
+# Owns the entities in rows [first_row, end_row) and runs the movement phase
+# for them. Robots heading into another band are proposed there too, so the
+# band that owns a cell decides who gets it.
+class ShardWorker:
+    def __init__(
+        self,
+        first_row: Optional[int],
+        end_row: Optional[int],
+        cells: List[tuple[int, Entity]],
+    ):
+        self.first_row = first_row
+        self.end_row = end_row
+        self.grid = Grid()
+        for key, entity in cells:
+            row, col = unpack_coord(key)
+            self.grid.add_entity_at(row, col, entity)
+        self.table = ReservationTable()
+        self._imported: List[Claim] = []
+
+    def owns(self, key: int) -> bool:
+        row, _ = unpack_coord(key)
+        if self.first_row is not None and row < self.first_row:
+            return False
+        return self.end_row is None or row < self.end_row
+
+    # proposes every local robot's move; returns the ones leaving the band
+    def plan(self) -> List[Claim]:
+        table = self.table
+        table.clear()
+        self._imported = []
+        exports = []
+        for row, col, entities in self.grid.get_active_items():
+            for entity in entities:
+                if entity.is_mobile:
+                    new_row, new_col = entity.move(table, row, col, entities)
+                    to_key = pack_coord(new_row, new_col)
+                    if not self.owns(to_key):
+                        exports.append((pack_coord(row, col), to_key))
+        return exports
+
+    def import_claims(self, claims: List[Claim]) -> None:
+        for from_key, to_key in claims:
+            self.table.propose_key(None, from_key, to_key)
+        self._imported.extend(claims)
+
+    # `outside` says whether each exported robot will find its cell free.
+    # Returns the same verdict for every imported claim.
+    def resolve(self, outside: Dict[int, bool]) -> List[tuple[int, int, bool]]:
+        self.table.resolve(outside)
+        outcomes = self.table.outcomes
+        return [
+            (from_key, to_key, outcomes[from_key])
+            for from_key, to_key in self._imported
+        ]
+
+    def apply(self) -> List[tuple[int, Entity]]:
+        self.table.notify_rejected()
+        internal = []
+        emigrants = []
+        for entity, from_key, to_key in self.table.moves:
+            if self.owns(to_key):
+                internal.append((entity, from_key, to_key))
+            else:
+                emigrants.append((to_key, entity))
+        for _, entity in emigrants:
+            self.grid.remove_entity(entity)
+        self.grid.apply_moves(internal)
+        return emigrants
+
+    def admit(self, immigrants: List[tuple[int, Entity]]) -> None:
+        for key, entity in immigrants:
+            row, col = unpack_coord(key)
+            self.grid.add_entity_at(row, col, entity)
+
+    def process(self) -> None:
+        for _, _, entities in self.grid.get_active_items():
+            for entity in entities:
+                entity.process(entities)
+
+    def cells(self) -> List[tuple[int, Entity]]:
+        return [
+            (pack_coord(row, col), entity)
+            for row, col, entities in self.grid
+            for entity in entities
+        ]
+
+
+def _serve(conn: Any, worker: ShardWorker) -> None:
+    while True:
+        method, args = conn.recv()
+        if method == "close":
+            conn.close()
+            return
+        try:
+            conn.send((True, getattr(worker, method)(*args)))
+        except Exception as error:
+            conn.send((False, error))
+
+
+class _LocalShard:
+    def __init__(self, worker: ShardWorker):
+        self.worker = worker
+        self._result: Any = None
+
+    def send(self, method: str, *args: Any) -> None:
+        self._result = getattr(self.worker, method)(*args)
+
+    def recv(self) -> Any:
+        return self._result
+
+    def close(self) -> None:
+        pass
+
+
+class _RemoteShard:
+    def __init__(self, worker: ShardWorker):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(child_conn, worker), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def send(self, method: str, *args: Any) -> None:
+        self.conn.send((method, args))
+
+    def recv(self) -> Any:
+        ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def close(self) -> None:
+        self.conn.send(("close", ()))
+        self.process.join()
+
+
+# Steps a world split into row bands, one worker process per band. Each tick:
+# every band proposes its robots' moves in parallel, robots leaving a band
+# are also proposed to the band they're heading for, bands resolve their
+# tables and trade verdicts on those robots until no verdict changes, robots
+# crossing a band edge are handed to their new band, and every band processes
+# its cells. The result is the same as DataModel.step on the whole grid.
+class ShardedSimulation:
+    def __init__(self, grid: Grid, shards: int = 2, processes: bool = True):
+        self.row_starts = split_rows(grid, shards)
+        bands: List[List[tuple[int, Entity]]] = [
+            [] for _ in range(len(self.row_starts) + 1)
+        ]
+        for row, col, entities in grid:
+            for entity in entities:
+                bands[self.shard_of_row(row)].append((pack_coord(row, col), entity))
+
+        bounds = [None] + self.row_starts + [None]
+        shard_class = _RemoteShard if processes else _LocalShard
+        self._shards = [
+            shard_class(ShardWorker(bounds[index], bounds[index + 1], cells))
+            for index, cells in enumerate(bands)
+        ]
+        self.current_tick = 0
+
+    def __enter__(self) -> "ShardedSimulation":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def shard_count(self) -> int:
+        return len(self._shards)
+
+    def shard_of_row(self, row: int) -> int:
+        return bisect_right(self.row_starts, row)
+
+    def _call(self, calls: Dict[int, tuple]) -> Dict[int, Any]:
+        for index, (method, *args) in calls.items():
+            self._shards[index].send(method, *args)
+        return {index: self._shards[index].recv() for index in calls}
+
+    def _call_all(self, method: str) -> List[Any]:
+        results = self._call({index: (method,) for index in range(len(self._shards))})
+        return [results[index] for index in range(len(self._shards))]
+
+    def shard_of_key(self, key: int) -> int:
+        return self.shard_of_row(unpack_coord(key)[0])
+
+    def step(self) -> None:
+        exports: List[List[Claim]] = self._call_all("plan")
+
+        claims: Dict[int, List[Claim]] = {}
+        for shard_exports in exports:
+            for from_key, to_key in shard_exports:
+                claims.setdefault(self.shard_of_key(to_key), []).append(
+                    (from_key, to_key)
+                )
+        if claims:
+            self._call({index: ("import_claims", c) for index, c in claims.items()})
+
+        # Verdicts start pessimistic and only ever flip to True, so this
+        # settles on the same answer as one table holding every robot.
+        outside: List[Dict[int, bool]] = [
+            {to_key: False for _, to_key in shard_exports} for shard_exports in exports
+        ]
+        pending = set(range(len(self._shards)))
+        while pending:
+            results = self._call(
+                {index: ("resolve", outside[index]) for index in pending}
+            )
+            pending = set()
+            for verdicts in results.values():
+                for from_key, to_key, moves in verdicts:
+                    origin = self.shard_of_key(from_key)
+                    if outside[origin][to_key] != moves:
+                        outside[origin][to_key] = moves
+                        pending.add(origin)
+
+        immigrants: Dict[int, List[tuple[int, Entity]]] = {}
+        for emigrants in self._call_all("apply"):
+            for key, entity in emigrants:
+                row, _ = unpack_coord(key)
+                immigrants.setdefault(self.shard_of_row(row), []).append((key, entity))
+        if immigrants:
+            self._call({index: ("admit", cells) for index, cells in immigrants.items()})
+
+        self._call_all("process")
+        self.current_tick += 1
+
+    def run_ticks(self, n: int) -> None:
+        for _ in range(n):
+            self.step()
+
+    def gather(self) -> Grid:
+        grid = Grid()
+        for cells in self._call_all("cells"):
+            for key, entity in cells:
+                row, col = unpack_coord(key)
+                grid.add_entity_at(row, col, entity)
+        return grid
+
+    def close(self) -> None:
+        for shard in self._shards:
+            shard.close()
+        self._shards = []
@@ -0,0 +1,63 @@
+import threading
+import time
+from typing import Optional
+
+from .data_model import DataModel
+from .frames import FramePublisher, WorldFrame
+
+
+# Runs DataModel.tick on its own thread at a fixed rate and publishes a
+# WorldFrame after every tick. The view only ever reads `latest`, which is
+# swapped in whole, so drawing never waits on the simulation or vice versa.
+class SimulationThread:
+    def __init__(self, model: DataModel, tick_rate: float = 12.0, seed: bool = True):
+        self.model = model
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.publisher = FramePublisher(model)
+        self.latest: WorldFrame = self.publisher.publish()
+        self.error: Optional[BaseException] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="simulation", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    # re-raises on the caller's thread whatever stopped the simulation
+    def check(self) -> None:
+        if self.error is not None:
+            raise RuntimeError("The simulation thread stopped") from self.error
+
+    # keys from the input thread; deque appends are thread safe
+    def send(self, signal: str) -> None:
+        self.model.signal_queue.append(signal)
+
+    def _run(self) -> None:
+        try:
+            if self.seed:
+                self.model.run_seed()
+                self.latest = self.publisher.publish()
+            interval = 1.0 / self.tick_rate
+            deadline = time.perf_counter()
+            while not self._stop.is_set():
+                self.model.tick()
+                self.latest = self.publisher.publish()
+                deadline += interval
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    # running behind: don't try to catch up with a burst
+                    deadline = time.perf_counter()
+        except BaseException as error:
+            self.error = error
+            raise
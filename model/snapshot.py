@@ -0,0 +1,338 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Union
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import EMPTY_COUNTS, Entity, Inventory, Resource
+from components.grid import Grid
+from components.program import Program, compile_program
+from const import DIRECTION
+
+# Layout: a fixed header followed by one column per field, each padded to
+# 8 bytes. Columns are read straight out of the mapped file with
+# memoryview.cast, so loading never parses entities record by record.
+#
+#   types u8[n] | ids i64[n] | rows i32[n] | cols i32[n] | aux u8[n]
+#   move_index u32[n] | capacity i32[n] | inventory u32[n * resources]
+#   path_offsets u32[n + 1] | name_offsets u32[n + 1] | paths u8[] | names utf8
+#   program_ids i32[n] | pcs u32[n] | counter_offsets u32[n + 1] | counters u32[]
+#   budgets u32[p] | source_offsets u32[p + 1] | sources utf8
+#
+# aux is the conveyor direction, the factory resource, or 1 for robots that
+# stop at the end of their path. Robots sharing a program point at the same
+# entry of the p-long program table (-1 for no program), and get one shared
+# compiled copy back on load.
+MAGIC = b"GRDS"
+VERSION = 2
+HEADER = struct.Struct("<4sIBxxxIIIIqIII")
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+TYPE_CODES = {Robot: 0, Factory: 1, Conveyor: 2}
+DIRECTIONS = list(DIRECTION)
+RESOURCES = list(Resource)
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+def dump_snapshot(grid: Grid) -> bytes:
+    types = array("B")
+    ids = array("q")
+    rows = array("i")
+    cols = array("i")
+    aux = array("B")
+    move_indices = array("I")
+    capacities = array("i")
+    inventory = array("I")
+    path_offsets = array("I", [0])
+    name_offsets = array("I", [0])
+    paths = bytearray()
+    names = bytearray()
+    program_ids = array("i")
+    pcs = array("I")
+    counter_offsets = array("I", [0])
+    counters = array("I")
+    budgets = array("I")
+    source_offsets = array("I", [0])
+    sources = bytearray()
+    program_index: Dict[int, int] = {}
+
+    for row, col, entities in grid:
+        for entity in entities:
+            type_code = TYPE_CODES.get(type(entity))
+            if type_code is None:
+                raise ValueError(f"Can't snapshot {type(entity).__name__}")
+            types.append(type_code)
+            ids.append(entity.id)
+            rows.append(row)
+            cols.append(col)
+
+            if isinstance(entity, Conveyor):
+                aux.append(DIRECTIONS.index(entity.direction))
+            elif isinstance(entity, Factory):
+                aux.append(RESOURCES.index(entity.resource_type))
+            else:
+                aux.append(0 if entity.repeat_path else 1)
+
+            program = None
+            if isinstance(entity, Robot):
+                move_indices.append(entity.current_move_index)
+                paths.extend(DIRECTIONS.index(move) for move in entity.path)
+                program = entity.program
+            else:
+                move_indices.append(0)
+            path_offsets.append(len(paths))
+
+            if program is None:
+                program_ids.append(-1)
+                pcs.append(0)
+            else:
+                if id(program) not in program_index:
+                    program_index[id(program)] = len(budgets)
+                    budgets.append(program.budget)
+                    sources.extend(program.source.encode())
+                    source_offsets.append(len(sources))
+                program_ids.append(program_index[id(program)])
+                pcs.append(entity.pc)
+                counters.extend(entity.counters)
+            counter_offsets.append(len(counters))
+
+            capacity = entity.resources.capacity
+            capacities.append(-1 if capacity is None else capacity)
+            inventory.extend(entity.resources.count(resource) for resource in RESOURCES)
+
+            names.extend(entity.name.encode())
+            name_offsets.append(len(names))
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        BYTE_ORDER,
+        len(ids),
+        len(RESOURCES),
+        len(paths),
+        len(names),
+        Entity.registry.counter,
+        len(counters),
+        len(budgets),
+        len(sources),
+    )
+    columns = [
+        types,
+        ids,
+        rows,
+        cols,
+        aux,
+        move_indices,
+        capacities,
+        inventory,
+        path_offsets,
+        name_offsets,
+    ]
+    return b"".join(
+        [_pad(header)]
+        + [_pad(column.tobytes()) for column in columns]
+        + [_pad(bytes(paths)), _pad(bytes(names))]
+        + [
+            _pad(column.tobytes())
+            for column in (
+                program_ids,
+                pcs,
+                counter_offsets,
+                counters,
+                budgets,
+                source_offsets,
+            )
+        ]
+        + [_pad(bytes(sources))]
+    )
+
+
+def save_snapshot(grid: Grid, path: str) -> None:
+    with open(path, "wb") as file:
+        file.write(dump_snapshot(grid))
+
+
+class SnapshotReader:
+    def __init__(self, data: Union[bytes, mmap.mmap]):
+        self._data = data
+        self._view = memoryview(data)
+        (
+            magic,
+            version,
+            byte_order,
+            self.count,
+            resource_count,
+            path_bytes,
+            name_bytes,
+            self.id_counter,
+            counter_count,
+            self.program_count,
+            source_bytes,
+        ) = HEADER.unpack_from(self._view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a grid snapshot")
+        if byte_order != BYTE_ORDER:
+            raise ValueError(
+                "Snapshot was written on a machine with another byte order"
+            )
+        if resource_count != len(RESOURCES):
+            raise ValueError("Snapshot was written with a different set of resources")
+
+        self._offset = len(_pad(b"\0" * HEADER.size))
+        n = self.count
+        self.types = self._column("B", n)
+        self.ids = self._column("q", n)
+        self.rows = self._column("i", n)
+        self.cols = self._column("i", n)
+        self.aux = self._column("B", n)
+        self.move_indices = self._column("I", n)
+        self.capacities = self._column("i", n)
+        self.inventory = self._column("I", n * resource_count)
+        self.path_offsets = self._column("I", n + 1)
+        self.name_offsets = self._column("I", n + 1)
+        self.paths = self._column("B", path_bytes)
+        self.names = self._column("B", name_bytes)
+        self.program_ids = self._column("i", n)
+        self.pcs = self._column("I", n)
+        self.counter_offsets = self._column("I", n + 1)
+        self.counters = self._column("I", counter_count)
+        self.budgets = self._column("I", self.program_count)
+        self.source_offsets = self._column("I", self.program_count + 1)
+        self.sources = self._column("B", source_bytes)
+
+    def _column(self, fmt: str, length: int) -> memoryview:
+        size = struct.calcsize(fmt) * length
+        column = self._view[self._offset : self._offset + size].cast(fmt)
+        self._offset += size + (-size % 8)
+        return column
+
+    def entities(self) -> List[tuple[int, int, Entity]]:
+        resource_count = len(RESOURCES)
+        types = self.types.tolist()
+        ids = self.ids.tolist()
+        rows = self.rows.tolist()
+        cols = self.cols.tolist()
+        aux = self.aux.tolist()
+        move_indices = self.move_indices.tolist()
+        capacities = self.capacities.tolist()
+        inventory = self.inventory.tolist()
+        path_offsets = self.path_offsets.tolist()
+        name_offsets = self.name_offsets.tolist()
+        paths = bytes(self.paths)
+        names = bytes(self.names)
+        program_ids = self.program_ids.tolist()
+        pcs = self.pcs.tolist()
+        counter_offsets = self.counter_offsets.tolist()
+        counters = self.counters.tolist()
+        budgets = self.budgets.tolist()
+        source_offsets = self.source_offsets.tolist()
+        sources = bytes(self.sources)
+        programs: List[Program] = [
+            compile_program(sources[start:end].decode(), budgets[index])
+            for index, (start, end) in enumerate(
+                zip(source_offsets, source_offsets[1:])
+            )
+        ]
+
+        placed = []
+        for index in range(self.count):
+            type_code = types[index]
+            if type_code == 0:
+                entity: Entity = Robot.__new__(Robot)
+                start, end = path_offsets[index], path_offsets[index + 1]
+                entity.path = [DIRECTIONS[code] for code in paths[start:end]]
+                entity.current_move_index = move_indices[index]
+                entity.repeat_path = aux[index] == 0
+                program_id = program_ids[index]
+                if program_id < 0:
+                    entity.program = None
+                    entity.pc = 0
+                    entity.counters = None
+                else:
+                    entity.program = programs[program_id]
+                    entity.pc = pcs[index]
+                    start, end = counter_offsets[index], counter_offsets[index + 1]
+                    entity.counters = counters[start:end]
+            elif type_code == 1:
+                entity = Factory.__new__(Factory)
+                entity.resource_type = RESOURCES[aux[index]]
+            else:
+                entity = Conveyor.__new__(Conveyor)
+                entity.direction = DIRECTIONS[aux[index]]
+
+            entity.id = ids[index]
+            # offsets count bytes, so decode each name on its own
+            start, end = name_offsets[index], name_offsets[index + 1]
+            entity.name = names[start:end].decode()
+            capacity = capacities[index]
+            entity.resources = Inventory(None if capacity < 0 else capacity)
+            start = index * resource_count
+            counts = inventory[start : start + resource_count]
+            entity.resources._counts = counts if any(counts) else EMPTY_COUNTS
+            placed.append((rows[index], cols[index], entity))
+        return placed
+
+    def close(self) -> None:
+        for name in (
+            "types",
+            "ids",
+            "rows",
+            "cols",
+            "aux",
+            "move_indices",
+            "capacities",
+            "inventory",
+            "path_offsets",
+            "name_offsets",
+            "paths",
+            "names",
+            "program_ids",
+            "pcs",
+            "counter_offsets",
+            "counters",
+            "budgets",
+            "source_offsets",
+            "sources",
+        ):
+            getattr(self, name).release()
+        self._view.release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+
+# Fills `grid` (or a new Grid) from snapshot bytes. With restore_ids the
+# global id counter is put back exactly where it was when the snapshot was
+# taken; otherwise it only moves forward.
+def load_snapshot_bytes(
+    data: Union[bytes, mmap.mmap],
+    grid: Optional[Grid] = None,
+    restore_ids: bool = False,
+) -> Grid:
+    reader = SnapshotReader(data)
+    try:
+        placed = reader.entities()
+        id_counter = reader.id_counter
+    finally:
+        reader.close()
+
+    if grid is None:
+        grid = Grid()
+    grid.add_entities_bulk(placed)
+    if restore_ids:
+        Entity.registry.reset(id_counter)
+    else:
+        Entity.registry.counter = max(Entity.registry.counter, id_counter)
+    return grid
+
+
+def load_snapshot(
+    path: str, grid: Optional[Grid] = None, restore_ids: bool = False
+) -> Grid:
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return load_snapshot_bytes(data, grid, restore_ids)
@@ -0,0 +1,71 @@
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("move", "resolve", "apply", "process")
+
+
+# Running per-phase totals for DataModel.step: time spent and how many
+# entities (or cells) each phase touched. The last tick is kept separately
+# for the tick-budget watchdog.
+class TickStats:
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self.ticks = 0
+        self.over_budget = 0
+        self.total_ns: Dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.total_counts: Dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.last_ns: Dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.last_counts: Dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.last_tick_ns = 0
+
+    def begin_tick(self) -> None:
+        for phase in PHASES:
+            self.last_ns[phase] = 0
+            self.last_counts[phase] = 0
+
+    def add(self, phase: str, elapsed_ns: int, count: int) -> None:
+        self.last_ns[phase] = elapsed_ns
+        self.last_counts[phase] = count
+        self.total_ns[phase] += elapsed_ns
+        self.total_counts[phase] += count
+
+    def end_tick(self, tick: int, elapsed_ns: int) -> None:
+        self.ticks += 1
+        self.last_tick_ns = elapsed_ns
+        if self.budget_ms is not None and elapsed_ns > self.budget_ms * 1e6:
+            self.over_budget += 1
+            logger.warning(
+                "tick %d took %.2fms, over the %.2fms budget: %s",
+                tick,
+                elapsed_ns / 1e6,
+                self.budget_ms,
+                self.describe_last(),
+            )
+
+    def phase_ms(self, phase: str) -> float:
+        if not self.ticks:
+            return 0.0
+        return self.total_ns[phase] / self.ticks / 1e6
+
+    def phase_count(self, phase: str) -> float:
+        if not self.ticks:
+            return 0.0
+        return self.total_counts[phase] / self.ticks
+
+    def describe_last(self) -> str:
+        return " ".join(
+            f"{phase}={self.last_ns[phase] / 1e6:.2f}ms/{self.last_counts[phase]}"
+            for phase in PHASES
+        )
+
+    def summary(self) -> str:
+        phases = " ".join(
+            f"{phase}={self.phase_ms(phase):.3f}ms/{self.phase_count(phase):.0f}"
+            for phase in PHASES
+        )
+        return f"ticks={self.ticks} over_budget={self.over_budget} avg {phases}"
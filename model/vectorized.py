@@ -0,0 +1,253 @@
+from typing import List, Optional
+
+from components import Robot
+from components.conveyor import Conveyor
+from components.grid import COORD_BITS, COORD_HALF, Grid
+from components.program import run_program
+from const import DIRECTION
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; only the vectorized mover needs it
+    np = None
+
+
+# Direction codes are DIRECTION.value - 1: UP, DOWN, LEFT, RIGHT, WAIT.
+KEY_DELTA_BY_CODE = [-(1 << COORD_BITS), 1 << COORD_BITS, -1, 1, 0]
+
+
+def direction_code(direction: DIRECTION) -> int:
+    return direction.value - 1
+
+
+# Structure-of-arrays copy of every robot in a grid, in processing order
+# (row-major by packed key).
+class RobotStore:
+    def __init__(self, robots: List[Robot], keys: List[int]):
+        order = sorted(range(len(robots)), key=keys.__getitem__)
+        self.robots = np.empty(len(robots), dtype=object)
+        self.robots[:] = [robots[i] for i in order]
+        self.keys = np.array([keys[i] for i in order], dtype=np.int64)
+
+        path_codes: List[int] = []
+        offsets: List[int] = []
+        lengths: List[int] = []
+        move_indices: List[int] = []
+        repeats: List[bool] = []
+        programmed: List[bool] = []
+        for robot in self.robots:
+            offsets.append(len(path_codes))
+            lengths.append(len(robot.path))
+            path_codes.extend(direction_code(move) for move in robot.path)
+            move_indices.append(robot.current_move_index)
+            repeats.append(robot.repeat_path)
+            programmed.append(robot.program is not None)
+        self.path_codes = np.array(path_codes, dtype=np.int8)
+        self.path_offsets = np.array(offsets, dtype=np.int64)
+        self.path_lengths = np.array(lengths, dtype=np.int64)
+        self.move_indices = np.array(move_indices, dtype=np.int64)
+        self.repeats = np.array(repeats, dtype=bool)
+        self.programmed = np.array(programmed, dtype=bool)
+
+    @classmethod
+    def from_grid(cls, grid: Grid) -> "RobotStore":
+        robots: List[Robot] = []
+        keys: List[int] = []
+        for key, entities in grid._entities_at_coord.items():
+            for entity in entities:
+                if isinstance(entity, Robot):
+                    robots.append(entity)
+                    keys.append(key)
+        return cls(robots, keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def reorder(self, order: "np.ndarray") -> None:
+        self.robots = self.robots[order]
+        self.keys = self.keys[order]
+        self.path_offsets = self.path_offsets[order]
+        self.path_lengths = self.path_lengths[order]
+        self.move_indices = self.move_indices[order]
+        self.repeats = self.repeats[order]
+        self.programmed = self.programmed[order]
+
+
+# Sorted conveyor cells with their direction codes.
+class ConveyorField:
+    def __init__(self, grid: Grid):
+        conveyors: List[tuple[int, int]] = []
+        for key, entities in grid._entities_at_coord.items():
+            for entity in entities:
+                if isinstance(entity, Conveyor):
+                    conveyors.append((key, direction_code(entity.direction)))
+        conveyors.sort()
+        self.keys = np.array([key for key, _ in conveyors], dtype=np.int64)
+        self.codes = np.array([code for _, code in conveyors], dtype=np.int8)
+
+
+def _lookup(
+    sorted_keys: "np.ndarray", keys: "np.ndarray"
+) -> tuple["np.ndarray", "np.ndarray"]:
+    pos = np.searchsorted(sorted_keys, keys)
+    pos_clipped = np.minimum(pos, max(len(sorted_keys) - 1, 0))
+    if len(sorted_keys):
+        found = sorted_keys[pos_clipped] == keys
+    else:
+        found = np.zeros(len(keys), dtype=bool)
+    return found, pos_clipped
+
+
+class MoveResult:
+    def __init__(self, finals: "np.ndarray", move_indices: "np.ndarray"):
+        self.finals = finals
+        self.move_indices = move_indices
+
+
+# Runs the VM of every programmed robot that isn't on a conveyor (belts
+# override programs just like paths) and returns their direction codes, -1
+# for everyone else. The VM is plain Python; its per-tick budget keeps the
+# cost bounded.
+def program_codes(
+    store: RobotStore, field: ConveyorField, grid: Grid
+) -> Optional["np.ndarray"]:
+    if not store.programmed.any():
+        return None
+    on_conveyor, _ = _lookup(field.keys, store.keys)
+    running = np.flatnonzero(store.programmed & ~on_conveyor)
+    codes = np.full(len(store), -1, dtype=np.int8)
+    cells = grid._entities_at_coord
+    codes[running] = [
+        direction_code(run_program(robot, cells[key]))
+        for robot, key in zip(
+            store.robots[running].tolist(), store.keys[running].tolist()
+        )
+    ]
+    return codes
+
+
+# Same rules as ReservationTable.resolve. Each robot that wins its
+# destination points at the robot sitting there (if any); pointer jumping
+# then finds where every chain ends in log2(n) rounds. Chains ending in an
+# empty cell move, chains ending in a loser stay, and cycles never end.
+# `programs` holds direction codes from program_codes; those robots skip
+# their path and keep their move index.
+def compute_moves(
+    store: RobotStore, field: ConveyorField, programs: Optional["np.ndarray"] = None
+) -> MoveResult:
+    n = len(store)
+    origins = store.keys
+
+    on_conveyor, conveyor_pos = _lookup(field.keys, origins)
+    if len(field.codes):
+        conveyor_codes = field.codes[conveyor_pos]
+    else:
+        conveyor_codes = np.zeros(n, dtype=np.int8)
+
+    follows_path = ~on_conveyor
+    if programs is not None:
+        follows_path &= programs < 0
+    if np.any(store.path_lengths[follows_path] == 0):
+        raise ValueError("Path is empty. No moves available.")
+    safe_lengths = np.maximum(store.path_lengths, 1)
+    if len(store.path_codes):
+        path_index = np.where(follows_path, store.path_offsets + store.move_indices, 0)
+        path_codes = store.path_codes[path_index]
+    else:
+        path_codes = np.zeros(n, dtype=np.int8)
+    codes = np.where(on_conveyor, conveyor_codes, path_codes)
+    if programs is not None:
+        codes = np.where(programs >= 0, programs, codes)
+    next_indices = np.where(
+        store.repeats,
+        (store.move_indices + 1) % safe_lengths,
+        np.minimum(store.move_indices + 1, safe_lengths - 1),
+    )
+    move_indices = np.where(follows_path, next_indices, store.move_indices)
+
+    dests = origins + np.array(KEY_DELTA_BY_CODE, dtype=np.int64)[codes]
+    # robots can't step off the edge of the grid, as in ReservationTable
+    dest_rows = (dests + COORD_HALF) >> COORD_BITS
+    dest_cols = dests - (dest_rows << COORD_BITS)
+    off_grid = (np.abs(dest_rows) >= COORD_HALF) | (np.abs(dest_cols) >= COORD_HALF)
+    dests = np.where(off_grid, origins, dests)
+    indices = np.arange(n)
+
+    # the lowest origin among the robots heading for each cell gets it
+    movers = np.flatnonzero(dests != origins)
+    order = movers[np.lexsort((origins[movers], dests[movers]))]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = dests[order[1:]] != dests[order[:-1]]
+    winner = np.zeros(n, dtype=bool)
+    winner[order[first]] = True
+
+    occupied, occupant = _lookup(origins, dests)
+    terminal = ~winner | ~occupied
+    success = winner & ~occupied
+    pointers = np.where(terminal, indices, occupant)
+    rounds = 1
+    while (1 << rounds) < n:
+        rounds += 1
+    for _ in range(rounds):
+        pointers = pointers[pointers]
+    moves = terminal[pointers] & success[pointers]
+    # one-shot paths retry a blocked step, as in Robot.move_rejected
+    held = follows_path & ~store.repeats & (dests != origins) & ~moves
+    move_indices = np.where(held, store.move_indices, move_indices)
+
+    return MoveResult(np.where(moves, dests, origins), move_indices)
+
+
+# Runs the movement phase for a whole grid with compute_moves, keeping the
+# robot store and conveyor field cached between ticks. Robot paths must be
+# changed through Robot.set_path / set_program so the store notices.
+class VectorizedMover:
+    def __init__(self):
+        if np is None:
+            raise ImportError("numpy is required for vectorized movement")
+        self._store: Optional[RobotStore] = None
+        self._field: Optional[ConveyorField] = None
+        self._mobile_version = -1
+        self._static_version = -1
+        self._path_epoch = -1
+
+    def robot_count(self) -> int:
+        return 0 if self._store is None else len(self._store.robots)
+
+    def move_entities(self, grid: Grid) -> None:
+        if self._field is None or self._static_version != grid.static_version:
+            self._field = ConveyorField(grid)
+            self._static_version = grid.static_version
+        if (
+            self._store is None
+            or self._mobile_version != grid.mobile_version
+            or self._path_epoch != Robot.path_epoch
+        ):
+            self._store = RobotStore.from_grid(grid)
+            self._path_epoch = Robot.path_epoch
+
+        store = self._store
+        result = compute_moves(
+            store, self._field, program_codes(store, self._field, grid)
+        )
+
+        changed = result.move_indices != store.move_indices
+        for robot, index in zip(
+            store.robots[changed], result.move_indices[changed].tolist()
+        ):
+            robot.current_move_index = index
+        store.move_indices = result.move_indices
+
+        moved = np.flatnonzero(result.finals != store.keys)
+        grid.apply_moves(
+            list(
+                zip(
+                    store.robots[moved].tolist(),
+                    store.keys[moved].tolist(),
+                    result.finals[moved].tolist(),
+                )
+            )
+        )
+        store.keys = result.finals
+        store.reorder(np.argsort(store.keys, kind="stable"))
+        self._mobile_version = grid.mobile_version
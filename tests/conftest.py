@@ -0,0 +1,28 @@
+from typing import Any, Callable, Optional
+
+import pytest
+
+from components.entity import Entity
+from components.grid import Grid
+from model import DataModel
+from model.modules import CommandDispatcher, TerminalEmulator
+
+
+@pytest.fixture(autouse=True)
+def reset_entity_ids():
+    Entity.registry.reset()
+    yield
+
+
+# make_model() builds a DataModel on a new Grid (or `grid`); keyword arguments
+# go to DataModel.
+@pytest.fixture
+def make_model() -> Callable[..., DataModel]:
+    def make(grid: Optional[Grid] = None, **kwargs: Any) -> DataModel:
+        return DataModel(
+            CommandDispatcher(TerminalEmulator()),
+            Grid() if grid is None else grid,
+            **kwargs,
+        )
+
+    return make
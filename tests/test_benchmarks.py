@@ -0,0 +1,21 @@
+from benchmarks.run import compare, run_scenario
+from benchmarks.scenarios import SCENARIOS
+
+
+class TestBenchmarks:
+    def test_every_scenario_runs(self):
+        for scenario in SCENARIOS.values():
+            result = run_scenario(scenario, scale=64, repeats=1)
+            assert result["ops"] > 0
+            assert result["ops_per_sec"] > 0
+
+    def test_same_seed_same_world(self):
+        first = run_scenario(SCENARIOS["churn"], scale=64, repeats=1, seed=3)
+        second = run_scenario(SCENARIOS["churn"], scale=64, repeats=1, seed=3)
+        assert first["ops"] == second["ops"]
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": [{"name": "crowd", "scale": 10, "ops_per_sec": 100.0}]}
+        slow = [{"name": "crowd", "scale": 10, "ops_per_sec": 50.0}]
+        assert compare(slow, baseline, 0.1)[0].endswith("REGRESSION")
+        assert compare(slow, baseline, 0.6)[0].endswith("baseline")
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("pyxel")
+
+from view.camera import Camera  # noqa: E402
+
+
+class TestCamera:
+    def test_visible_rect(self):
+        camera = Camera(200, 100)
+        assert camera.visible_rect() == (0, 0, 19, 39)
+        camera.pan(-5, 3)
+        assert camera.visible_rect() == (-5, 3, 14, 42)
+
+    def test_screen_and_cell_coords(self):
+        camera = Camera(200, 200, row=10, col=20)
+        assert camera.to_screen(12, 21) == (5, 10)
+        assert camera.to_cell(5, 10) == (12, 21)
+        assert camera.to_cell(9, 14) == (12, 21)
+
+    def test_zoom_keeps_cell_under_pointer(self):
+        camera = Camera(200, 200)
+        cell = camera.to_cell(120, 60)
+        camera.zoom(1, 120, 60)
+        assert camera.cell_size == 8
+        assert camera.to_cell(120, 60) == cell
+        camera.zoom(-2, 120, 60)
+        assert camera.cell_size == 3
+        assert camera.to_cell(120, 60) == cell
+
+    def test_zoom_is_clamped(self):
+        camera = Camera(200, 200)
+        camera.zoom(100)
+        assert camera.cell_size == 12
+        camera.zoom(-100)
+        assert camera.cell_size == 1
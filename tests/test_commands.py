@@ -0,0 +1,98 @@
+import pytest
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import Resource
+from const import DIRECTION, Command
+from model.commands import COMMANDS, line_cells
+
+
+class TestCommandTable:
+    def test_resolves_sub_commands(self):
+        _, args = COMMANDS.resolve(Command("set path 3 rrd"))
+        assert args == [3, [DIRECTION.RIGHT, DIRECTION.RIGHT, DIRECTION.DOWN]]
+
+    def test_unknown_command_is_ignored(self):
+        assert COMMANDS.resolve(Command("dance 1 2")) is None
+        assert COMMANDS.resolve(Command("")) is None
+
+    def test_bad_arguments(self):
+        with pytest.raises(ValueError, match="resource"):
+            COMMANDS.resolve(Command("factory 1 1 gold"))
+        with pytest.raises(ValueError, match="Usage"):
+            COMMANDS.resolve(Command("robot 1"))
+
+    def test_single_commands(self, make_model):
+        model = make_model()
+        model.execute_command(Command("conveyor 1 1 up"))
+        model.execute_command(Command("factory 2 2 stone"))
+        model.execute_command(Command("robot 3 3"))
+        model.execute_command(Command("move 3 left"))
+        conveyor, factory, robot = model.grid.get_entities()
+        assert conveyor.direction == DIRECTION.UP
+        assert factory.resource_type == Resource.STONE
+        assert model.grid.get_coord_of_entity(robot) == (3, 2)
+
+
+class TestBulkCommands:
+    def test_fill(self, make_model):
+        model = make_model()
+        model.execute_command(Command("fill factory 0 0 2 3 metal"))
+        factories = model.grid.get_entities(Factory)
+        assert len(factories) == 12
+        assert all(f.resource_type == Resource.METAL for f in factories)
+        assert len(model.journal) == 1
+
+    def test_fill_robots_with_path(self, make_model):
+        model = make_model()
+        model.execute_command(Command("fill robot 4 4 3 3 rd"))
+        robots = model.grid.get_entities(Robot)
+        assert len(robots) == 4
+        assert robots[0].path == [DIRECTION.RIGHT, DIRECTION.DOWN]
+
+    def test_failed_fill_changes_nothing(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 1 1"))
+        with pytest.raises(ValueError):
+            model.execute_command(Command("fill robot 0 0 2 2"))
+        assert model.grid.entity_count() == 1
+        # no ids were handed out for the rejected robots
+        model.execute_command(Command("robot 5 5"))
+        assert model.grid.get_entity_by_id(2) is not None
+
+    def test_conveyor_line_points_along_itself(self, make_model):
+        model = make_model()
+        model.execute_command(Command("line conveyor 5 3 2 3"))
+        conveyors = model.grid.get_entities(Conveyor)
+        assert len(conveyors) == 4
+        assert all(c.direction == DIRECTION.UP for c in conveyors)
+        with pytest.raises(ValueError):
+            model.execute_command(Command("line conveyor 0 0 3 3"))
+
+    def test_line_cells(self):
+        assert line_cells(0, 0, 2, 4) == [(0, 0), (0, 1), (1, 2), (2, 3), (2, 4)]
+        assert line_cells(1, 1, 1, 1) == [(1, 1)]
+
+
+class TestRunScript:
+    def test_runs_every_line(self, make_model):
+        model = make_model()
+        model.run_script(["# belt", "line conveyor 0 0 0 4", "", "robot 0 0", "step"])
+        robot = model.grid.get_entities(Robot)[0]
+        assert model.grid.get_coord_of_entity(robot) == (0, 1)
+
+    def test_parses_everything_first(self, make_model):
+        model = make_model()
+        with pytest.raises(ValueError, match="line 2"):
+            model.run_script(["robot 0 0", "conveyor 1 1 sideways"])
+        assert model.grid.entity_count() == 0
+
+    def test_bulk_options_are_parsed_first(self, make_model):
+        model = make_model()
+        script = ["robot 0 0", "fill factory 2 2 3 3", "fill conveyor 0 0 3 3 sideways"]
+        with pytest.raises(ValueError, match="line 3"):
+            model.run_script(script)
+        assert model.grid.entity_count() == 0
+        with pytest.raises(ValueError, match="line 1"):
+            model.run_script(["line conveyor 0 0 3 3", "robot 0 0"])
+        assert model.grid.entity_count() == 0
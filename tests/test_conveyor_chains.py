@@ -0,0 +1,114 @@
+import random
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.grid import Grid, pack_coord
+from const import DIRECTION, Command
+from model.conveyor_chains import ConveyorChains
+
+
+def describe(chains: ConveyorChains):
+    return sorted(
+        (tuple(chain.keys), chain.is_loop, chain.is_plain, chain.exit_key)
+        for chain in chains.chains()
+    )
+
+
+class TestConveyorChains:
+    def test_seed_layout_is_one_chain(self, make_model):
+        model = make_model()
+        model.run_seed()
+        chain, offset = model.chains.chain_at(5, 5)
+        assert offset == 0
+        assert len(chain) == 12
+        assert not chain.is_loop
+        assert chain.exit_key == pack_coord(9, 7)
+        assert model.chains.chain_at(9, 8) == (chain, 11)
+
+    def test_loop_detection(self):
+        g = Grid()
+        g.add_entity_at(0, 0, Conveyor(direction=DIRECTION.RIGHT))
+        g.add_entity_at(0, 1, Conveyor(direction=DIRECTION.DOWN))
+        g.add_entity_at(1, 1, Conveyor(direction=DIRECTION.LEFT))
+        g.add_entity_at(1, 0, Conveyor(direction=DIRECTION.UP))
+        chains = ConveyorChains(g)
+        chain, _ = chains.chain_at(1, 0)
+        assert chain.is_loop
+        assert chains.advance(0, 0, 6) == (1, 1, 6)
+
+    def test_merge_splits_chains(self):
+        g = Grid()
+        g.add_entity_at(0, 0, Conveyor(direction=DIRECTION.RIGHT))
+        g.add_entity_at(1, 1, Conveyor(direction=DIRECTION.UP))
+        g.add_entity_at(0, 1, Conveyor(direction=DIRECTION.RIGHT))
+        g.add_entity_at(0, 2, Factory())
+        g.add_entity_at(0, 2, Conveyor(direction=DIRECTION.RIGHT))
+        chains = ConveyorChains(g)
+        assert len(chains.chains()) == 3
+        merged, offset = chains.chain_at(0, 1)
+        assert offset == 0
+        assert len(merged) == 2
+        assert not merged.is_plain
+        assert chains.advance(0, 0, 5) == (0, 0, 0)
+
+    def test_incremental_matches_rebuild(self):
+        rng = random.Random(7)
+        g = Grid()
+        chains = ConveyorChains(g)
+        placed = {}
+        for _ in range(400):
+            row, col = rng.randrange(6), rng.randrange(6)
+            if (row, col) in placed and rng.random() < 0.5:
+                g.remove_entity(placed.pop((row, col)))
+            elif (row, col) in placed:
+                placed[(row, col)].direction = rng.choice(list(DIRECTION)[:4])
+                g.mark_static_changed(placed[(row, col)])
+            else:
+                placed[(row, col)] = Conveyor(direction=rng.choice(list(DIRECTION)[:4]))
+                g.add_entity_at(row, col, placed[(row, col)])
+            fresh = ConveyorChains(g)
+            assert describe(chains) == describe(fresh)
+
+    def test_set_direction_command_repoints(self, make_model):
+        model = make_model()
+        model.execute_command(Command("conveyor 0 0 right"))
+        model.execute_command(Command("conveyor 0 1 right"))
+        conveyor = model.grid.get_entities_at(0, 1)[0]
+        assert len(model.chains.chain_at(0, 0)[0]) == 2
+        model.execute_command(Command(f"set direction {conveyor.id} left"))
+        assert model.chains.chain_at(0, 0)[0].is_loop
+
+
+class TestFastForward:
+    def test_fast_forward_matches_stepping(self, make_model):
+        stepped = make_model()
+        skipped = make_model()
+        for model in (stepped, skipped):
+            model.run_seed()
+            model.execute_command(Command("robot 5 6"))
+        robot_a = stepped.grid.get_entities(Robot)[0]
+        robot_b = skipped.grid.get_entities(Robot)[0]
+
+        assert skipped.fast_forward(100) == 10
+        stepped.run_ticks(10)
+        assert skipped.current_tick == stepped.current_tick == 10
+        assert skipped.grid.get_coord_of_entity(robot_b) == (9, 8)
+        assert stepped.grid.get_coord_of_entity(robot_a) == (9, 8)
+
+        stepped.run_ticks(20)
+        skipped.run_ticks(20, fast_forward=True)
+        assert skipped.grid.get_coord_of_entity(robot_b) == (9, 7)
+        assert stepped.grid.get_coord_of_entity(robot_a) == (9, 7)
+
+    def test_no_fast_forward_when_robot_is_off_belt(self, make_model):
+        model = make_model()
+        model.run_seed()
+        model.execute_command(Command("robot 0 0"))
+        assert model.fast_forward(10) == 0
+
+    def test_shared_chain_is_not_skipped(self, make_model):
+        model = make_model()
+        model.run_seed()
+        model.execute_command(Command("robot 5 5"))
+        model.execute_command(Command("robot 5 7"))
+        assert model.fast_forward(10) == 0
@@ -0,0 +1,122 @@
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from const import DIRECTION
+
+
+class TestMoveEntities:
+    def test_robot_follows_path(self, make_model):
+        model = make_model()
+        r = Robot(path=[DIRECTION.RIGHT, DIRECTION.DOWN])
+        model.grid.add_entity_at(1, 1, r)
+        model.step()
+        assert model.grid.get_coord_of_entity(r) == (1, 2)
+        model.step()
+        assert model.grid.get_coord_of_entity(r) == (2, 2)
+
+    def test_conveyor_overrides_path(self, make_model):
+        model = make_model()
+        r = Robot(path=[DIRECTION.LEFT])
+        model.grid.add_entity_at(1, 1, Conveyor(direction=DIRECTION.DOWN))
+        model.grid.add_entity_at(1, 1, r)
+        model.step()
+        assert model.grid.get_coord_of_entity(r) == (2, 1)
+        assert r.current_move_index == 0
+
+    def test_static_cells_are_not_rebuilt(self, make_model):
+        model = make_model()
+        model.grid.add_entity_at(3, 3, Conveyor())
+        model.grid.add_entity_at(4, 4, Factory())
+        model.grid.add_entity_at(1, 1, Robot(path=[DIRECTION.RIGHT]))
+        conveyor_cell = model.grid.get_entities_at(3, 3)
+        factory_cell = model.grid.get_entities_at(4, 4)
+        model.step()
+        assert model.grid.get_entities_at(3, 3) is conveyor_cell
+        assert model.grid.get_entities_at(4, 4) is factory_cell
+
+    def test_robot_follows_into_vacated_cell(self, make_model):
+        model = make_model()
+        r1 = Robot(path=[DIRECTION.RIGHT])
+        r2 = Robot(path=[DIRECTION.RIGHT])
+        model.grid.add_entity_at(1, 1, r1)
+        model.grid.add_entity_at(1, 2, r2)
+        model.step()
+        assert model.grid.get_coord_of_entity(r1) == (1, 2)
+        assert model.grid.get_coord_of_entity(r2) == (1, 3)
+
+    def test_robot_bounces_off_claimed_cell(self, make_model):
+        model = make_model()
+        r1 = Robot(path=[DIRECTION.WAIT])
+        r2 = Robot(path=[DIRECTION.LEFT])
+        model.grid.add_entity_at(1, 1, r1)
+        model.grid.add_entity_at(1, 2, r2)
+        model.step()
+        assert model.grid.get_coord_of_entity(r1) == (1, 1)
+        assert model.grid.get_coord_of_entity(r2) == (1, 2)
+
+    def test_robot_waits_behind_parked_robot(self, make_model):
+        model = make_model()
+        r1 = Robot(path=[DIRECTION.RIGHT])
+        r2 = Robot(path=[DIRECTION.WAIT])
+        model.grid.add_entity_at(1, 1, r1)
+        model.grid.add_entity_at(1, 2, r2)
+        model.step()
+        assert model.grid.get_coord_of_entity(r1) == (1, 1)
+        assert model.grid.get_coord_of_entity(r2) == (1, 2)
+        assert r1.current_move_index == 0
+
+
+class TestReservations:
+    def place(self, model, *robots):
+        for row, col, move in robots:
+            model.grid.add_entity_at(row, col, Robot(path=[move]))
+        return model.grid.get_entities(Robot)
+
+    def coords(self, model, robots):
+        return [model.grid.get_coord_of_entity(r) for r in robots]
+
+    def test_chain_moves_together(self, make_model):
+        model = make_model()
+        robots = self.place(
+            model,
+            (0, 3, DIRECTION.LEFT),
+            (0, 2, DIRECTION.LEFT),
+            (0, 1, DIRECTION.LEFT),
+        )
+        model.step()
+        assert self.coords(model, robots) == [(0, 2), (0, 1), (0, 0)]
+
+    def test_lowest_cell_wins_contested_cell(self, make_model):
+        model = make_model()
+        robots = self.place(
+            model,
+            (1, 0, DIRECTION.RIGHT),
+            (0, 1, DIRECTION.DOWN),
+            (1, 2, DIRECTION.LEFT),
+        )
+        model.step()
+        assert self.coords(model, robots) == [(1, 0), (1, 1), (1, 2)]
+
+    def test_head_on_swap_stays(self, make_model):
+        model = make_model()
+        robots = self.place(model, (0, 0, DIRECTION.RIGHT), (0, 1, DIRECTION.LEFT))
+        model.step()
+        assert self.coords(model, robots) == [(0, 0), (0, 1)]
+
+    def test_cycle_stays(self, make_model):
+        model = make_model()
+        robots = self.place(
+            model,
+            (0, 0, DIRECTION.RIGHT),
+            (0, 1, DIRECTION.DOWN),
+            (1, 1, DIRECTION.LEFT),
+            (1, 0, DIRECTION.UP),
+        )
+        model.step()
+        assert self.coords(model, robots) == [(0, 0), (0, 1), (1, 1), (1, 0)]
+
+    def test_static_entities_never_block(self, make_model):
+        model = make_model()
+        model.grid.add_entity_at(0, 1, Factory())
+        robots = self.place(model, (0, 0, DIRECTION.RIGHT))
+        model.step()
+        assert self.coords(model, robots) == [(0, 1)]
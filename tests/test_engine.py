@@ -0,0 +1,54 @@
+from components import Robot
+from model.engine import HeadlessEngine, percentile
+
+
+class TestHeadlessEngine:
+    def test_run_ticks_advances_tick(self):
+        engine = HeadlessEngine()
+        report = engine.run_ticks(5)
+        assert engine.model.current_tick == 5
+        assert report.ticks == 5
+        assert len(report.latencies_ns) == 5
+
+    def test_no_periodic_checkpoints(self):
+        engine = HeadlessEngine()
+        engine.run_ticks(2500)
+        assert len(engine.model.journal) == 0
+        assert not engine.model.journal.checkpoints
+        engine = HeadlessEngine(checkpoint_interval=1000)
+        engine.run_ticks(2500)
+        assert len(engine.model.journal.checkpoints) == 3
+
+    def test_sharded_run_updates_the_model(self):
+        engine = HeadlessEngine()
+        engine.load_script(["robot 0 0", "set path 1 r", "robot 9 0"])
+        engine.run_sharded_ticks(5, 2)
+        robot = engine.model.grid.get_entity_by_id(1)
+        assert engine.model.grid.get_coord_of_entity(robot) == (0, 5)
+        assert engine.model.current_tick == 5
+
+    def test_load_script_skips_comments(self):
+        engine = HeadlessEngine()
+        engine.load_script(["# layout", "", "conveyor 1 1 right", "robot 1 1"])
+        assert engine.model.grid.entity_count() == 2
+
+    def test_robot_rides_conveyor(self):
+        engine = HeadlessEngine()
+        engine.load_script(["conveyor 1 1 right", "robot 1 1"])
+        robot = engine.model.grid.get_entities(Robot)[0]
+        engine.run_ticks(1)
+        assert engine.model.grid.get_coord_of_entity(robot) == (1, 2)
+
+    def test_seed_report(self):
+        engine = HeadlessEngine()
+        engine.load_seed()
+        report = engine.run_ticks(3)
+        assert report.entities == 12
+        assert report.ticks_per_sec > 0
+
+    def test_percentile(self):
+        values = [1, 2, 3, 4, 5]
+        assert percentile(values, 0) == 1
+        assert percentile(values, 50) == 3
+        assert percentile(values, 100) == 5
+        assert percentile([], 50) == 0
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.grid import Grid, chunk_key_of, pack_coord
+from const import DIRECTION, Command
+from model.frames import FramePublisher, StaticSnapshot, static_glyph
+from model.simulation_thread import SimulationThread
+
+
+class TestFramePublisher:
+    def test_glyphs(self):
+        assert static_glyph([Conveyor(direction=DIRECTION.UP)]) == "^"
+        assert static_glyph([Conveyor(), Factory()]) == "f"
+        assert static_glyph([Robot()]) is None
+
+    def test_frame_contents(self, make_model):
+        model = make_model()
+        model.grid.add_entity_at(1, 1, Factory())
+        model.grid.add_entity_at(1, 1, Robot())
+        model.grid.add_entity_at(0, 0, Conveyor(direction=DIRECTION.LEFT))
+        frame = FramePublisher(model).publish()
+        assert frame.robots == [(1, 1, "F")]
+        assert [title.split(" - ")[0] for title, _ in frame.panel] == ["(1) F", "(2) R"]
+        assert sorted(frame.static.query_rect(0, 0, 5, 5)) == [(0, 0, "<"), (1, 1, "f")]
+        assert frame.static_dirty is None
+
+    def test_frames_are_not_changed_by_later_ticks(self, make_model):
+        model = make_model()
+        model.execute_command(Command("conveyor 0 0 right"))
+        model.execute_command(Command("robot 0 0"))
+        publisher = FramePublisher(model)
+        first = publisher.publish()
+        model.run_ticks(1)
+        model.execute_command(Command("factory 4 4 wood"))
+        second = publisher.publish()
+        assert first.robots == [(0, 0, "o")]
+        assert second.robots == [(0, 1, "o")]
+        assert first.static.glyph_at(pack_coord(4, 4)) is None
+        assert second.static.glyph_at(pack_coord(4, 4)) == "f"
+        assert second.static_dirty == frozenset({pack_coord(4, 4)})
+        assert second.static_version == first.static_version + 1
+
+    def test_snapshot_removes_cells(self):
+        grid = Grid()
+        factory = Factory()
+        grid.add_entity_at(3, 3, factory)
+        snapshot = StaticSnapshot.from_grid(grid)
+        grid.remove_entity(factory)
+        emptied = snapshot.updated(grid, [pack_coord(3, 3)])
+        assert list(emptied.query_rect(0, 0, 9, 9)) == []
+        assert list(snapshot.query_rect(0, 0, 9, 9)) == [(3, 3, "f")]
+
+    def test_updates_share_untouched_chunks(self):
+        grid = Grid()
+        grid.add_entity_at(0, 0, Factory())
+        grid.add_entity_at(100, 100, Factory())
+        snapshot = StaticSnapshot.from_grid(grid)
+        grid.add_entity_at(0, 1, Conveyor())
+        updated = snapshot.updated(grid, [pack_coord(0, 1)])
+        far = chunk_key_of(pack_coord(100, 100))
+        near = chunk_key_of(pack_coord(0, 0))
+        assert updated.by_chunk[far] is snapshot.by_chunk[far]
+        assert updated.by_chunk[near] is not snapshot.by_chunk[near]
+        assert snapshot.glyph_at(pack_coord(0, 1)) is None
+        assert updated.glyph_at(pack_coord(0, 1)) == ">"
+
+
+class TestSimulationThread:
+    def test_ticks_in_background(self, make_model):
+        model = make_model()
+        simulation = SimulationThread(model, tick_rate=500, seed=False)
+        simulation.send("RIGHT")
+        simulation.start()
+        deadline = time.time() + 5
+        while simulation.latest.tick < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        simulation.stop(timeout=5)
+        assert not simulation.is_running()
+        assert simulation.error is None
+        assert simulation.latest.tick >= 5
+
+    @pytest.mark.filterwarnings(
+        "ignore::pytest.PytestUnhandledThreadExceptionWarning"
+    )
+    def test_errors_reach_the_caller(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 0 0"))
+        model.grid.get_entities(Robot)[0].path = []
+        simulation = SimulationThread(model, tick_rate=500, seed=False)
+        simulation.start()
+        simulation._thread.join(timeout=5)
+        assert not simulation.is_running()
+        with pytest.raises(RuntimeError, match="stopped"):
+            simulation.check()
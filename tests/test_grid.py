@@ -1,6 +1,15 @@
 from components.conveyor import Conveyor
 from components.factory import Factory
-from components.grid import Coord, Grid
+from components.entity import Entity
+from components.grid import (
+    CHUNK_SIZE,
+    COORD_HALF,
+    Coord,
+    Grid,
+    ReservationTable,
+    pack_coord,
+    unpack_coord,
+)
 from components.robot import Robot
 import pytest
 
@@ -27,16 +36,16 @@ class TestGrid:
         r1 = Robot()
         r3 = Robot()
         g.add_entity_at(1, 1, r1)
-        assert g._entities_at_coord[Coord(1, 1)] == [r1]
+        assert g._entities_at_coord[pack_coord(1, 1)] == [r1]
 
         g.add_entity_at(1, 2, r3)
-        assert g._entities_at_coord[Coord(1, 2)] == [r3]
+        assert g._entities_at_coord[pack_coord(1, 2)] == [r3]
 
     def test_add_entity_updates_positions(self):
         g = Grid()
         r1 = Robot()
         g.add_entity_at(1, 1, r1)
-        assert g._coord_of_entity[r1] == Coord(1, 1)
+        assert g._coord_of_entity[r1] == pack_coord(1, 1)
 
     # get entities at
     def test_get_entities_at_empty(self):
@@ -57,7 +66,7 @@ class TestGrid:
         r = Robot()
         assert g.add_entity_at(1, 1, r) is True
         assert g.get_entities_at(1, 1) == [r]
-        assert g._coord_of_entity[r] == Coord(1, 1)
+        assert g._coord_of_entity[r] == pack_coord(1, 1)
 
     def test_add_entity_at_existing_coord(self):
         g = Grid()
@@ -66,8 +75,8 @@ class TestGrid:
         g.add_entity_at(1, 1, r1)
         g.add_entity_at(1, 1, c1)
         assert g.get_entities_at(1, 1) == [r1, c1]
-        assert g._coord_of_entity[r1] == Coord(1, 1)
-        assert g._coord_of_entity[c1] == Coord(1, 1)
+        assert g._coord_of_entity[r1] == pack_coord(1, 1)
+        assert g._coord_of_entity[c1] == pack_coord(1, 1)
 
     def test_add_entity_at_raises_value_error_on_duplicate(self):
         g = Grid()
@@ -95,7 +104,7 @@ class TestGrid:
         r = Robot()
         g.add_entity_at(1, 1, r)
         g.remove_entity(r)
-        assert Coord(1, 1) not in g._entities_at_coord
+        assert pack_coord(1, 1) not in g._entities_at_coord
 
     # test move
     def test_move_entity_success(self):
@@ -105,7 +114,7 @@ class TestGrid:
         assert g.move_entity(2, 2, r) is True
         assert g.get_entities_at(1, 1) == []
         assert g.get_entities_at(2, 2) == [r]
-        assert g._coord_of_entity[r] == Coord(2, 2)
+        assert g._coord_of_entity[r] == pack_coord(2, 2)
 
     def test_move_entity_not_in_grid(self):
         g = Grid()
@@ -119,7 +128,7 @@ class TestGrid:
         g.add_entity_at(1, 1, r)
         assert g.move_entity(1, 1, r) is True
         assert g.get_entities_at(1, 1) == [r]
-        assert g._coord_of_entity[r] == Coord(1, 1)
+        assert g._coord_of_entity[r] == pack_coord(1, 1)
 
     # iter
     def test_iter_empty_grid(self):
@@ -215,7 +224,7 @@ class TestGrid:
     def test_validate_entity_new_entity(self):
         g = Grid()
         r = Robot()
-        c = Coord(1,1)
+        c = pack_coord(1, 1)
         assert g._validate_entity(c, r) is True
 
     def test_validate_entity_existing_entity(self):
@@ -223,7 +232,7 @@ class TestGrid:
         r = Robot()
         g.add_entity_at(1, 1, r)
         with pytest.raises(ValueError, match="Entity .* already exists in the grid."):
-            c = Coord(2,2)
+            c = pack_coord(2, 2)
             g._validate_entity(c, r)
 
     def test_validate_entity_multiple_robots(self):
@@ -232,7 +241,7 @@ class TestGrid:
         r2 = Robot()
         g.add_entity_at(1, 1, r1)
         with pytest.raises(ValueError, match="You can only have one Robot per cell"):
-            c = Coord(1,1)
+            c = pack_coord(1, 1)
             g._validate_entity(c, r2)
 
     def test_validate_entity_multiple_conveyors(self):
@@ -241,7 +250,7 @@ class TestGrid:
         c2 = Conveyor()
         g.add_entity_at(1, 1, c1)
         with pytest.raises(ValueError, match="You can only have one Conveyor per cell"):
-            c = Coord(1,1)
+            c = pack_coord(1, 1)
             g._validate_entity(c, c2)
 
     def test_validate_entity_multiple_factories(self):
@@ -250,7 +259,7 @@ class TestGrid:
         f2 = Factory()
         g.add_entity_at(1, 1, f1)
         with pytest.raises(ValueError, match="You can only have one Factory per cell"):
-            c = Coord(1,1)
+            c = pack_coord(1, 1)
             g._validate_entity(c, f2)
 
     def test_validate_entity_different_types_same_cell(self):
@@ -258,7 +267,7 @@ class TestGrid:
         r = Robot()
         c = Conveyor()
         f = Factory()
-        xy = Coord(1,1)
+        xy = pack_coord(1, 1)
         assert g._validate_entity(xy, r) is True
         assert g._validate_entity(xy, c) is True
         assert g._validate_entity(xy, f) is True
@@ -267,5 +276,203 @@ class TestGrid:
         g = Grid()
         r1 = Robot()
         r2 = Robot()
-        assert g._validate_entity(Coord(1,1), r1) is True
-        assert g._validate_entity(Coord(2,2), r2) is True
+        assert g._validate_entity(pack_coord(1, 1), r1) is True
+        assert g._validate_entity(pack_coord(2, 2), r2) is True
+
+    # packed coords
+    def test_pack_coord_round_trip(self):
+        for row, col in [(0, 0), (1, 2), (-1, 0), (0, -1), (-5, -7), (300, 4000)]:
+            assert unpack_coord(pack_coord(row, col)) == (row, col)
+
+    def test_big_coords_keep_their_cell(self):
+        g = Grid()
+        r = Robot()
+        g.add_entity_at(0, 600000, r)
+        assert g.get_coord_of_entity(r) == (0, 600000)
+        edge = COORD_HALF - 1
+        assert unpack_coord(pack_coord(-edge, edge)) == (-edge, edge)
+
+    def test_coords_outside_the_grid_are_rejected(self):
+        g = Grid()
+        r = Robot()
+        with pytest.raises(ValueError, match="outside"):
+            g.add_entity_at(0, COORD_HALF, r)
+        with pytest.raises(ValueError, match="outside"):
+            g.add_entities_bulk([(-COORD_HALF, 0, r)])
+        g.add_entity_at(0, COORD_HALF - 1, r)
+        with pytest.raises(ValueError, match="outside"):
+            g.move_entity_in_direction(r, DIRECTION.RIGHT)
+        assert g.get_coord_of_entity(r) == (0, COORD_HALF - 1)
+
+    def test_robots_stop_at_the_edge(self):
+        table = ReservationTable()
+        r = Robot()
+        table.propose(r, 0, COORD_HALF - 1, 0, COORD_HALF)
+        assert table.resolve() == []
+
+    def test_coord_is_still_importable(self):
+        assert Coord(1, 2) == Coord(1, 2)
+        assert len({Coord(1, 2), Coord(1, 2)}) == 1
+
+    def test_pack_coord_preserves_row_major_order(self):
+        coords = [(1, -1), (-1, 3), (0, 0), (0, -2), (2, 0), (1, 5)]
+        packed = sorted(coords, key=lambda rc: pack_coord(*rc))
+        assert packed == sorted(coords)
+
+    # active cells
+    def test_active_cells_track_mobile_entities(self):
+        g = Grid()
+        r = Robot()
+        g.add_entity_at(1, 1, Conveyor())
+        g.add_entity_at(2, 2, Factory())
+        assert list(g.get_active_items()) == []
+
+        g.add_entity_at(2, 2, r)
+        assert list(g.get_active_items()) == [(2, 2, g.get_entities_at(2, 2))]
+
+        g.move_entity(1, 1, r)
+        assert not g.is_active(2, 2)
+        assert g.is_active(1, 1)
+
+        g.remove_entity(r)
+        assert list(g.get_active_items()) == []
+
+    def test_apply_moves_updates_active_cells(self):
+        g = Grid()
+        r1 = Robot()
+        r2 = Robot()
+        g.add_entity_at(1, 1, r1)
+        g.add_entity_at(1, 2, r2)
+        g.apply_moves([(r1, pack_coord(1, 1), pack_coord(1, 2)), (r2, pack_coord(1, 2), pack_coord(1, 3))])
+        assert not g.is_active(1, 1)
+        assert g.is_active(1, 2)
+        assert g.is_active(1, 3)
+        assert g.get_entities_at(1, 2) == [r1]
+
+    # indexes
+    def test_get_entities_by_type_sorted_by_id(self):
+        g = Grid()
+        r1 = Robot()
+        f2 = Factory()
+        r3 = Robot()
+        c4 = Conveyor()
+        g.add_entity_at(5, 5, r3)
+        g.add_entity_at(1, 1, c4)
+        g.add_entity_at(2, 2, f2)
+        g.add_entity_at(3, 3, r1)
+
+        assert g.get_entities(Robot) == [r1, r3]
+        assert g.get_entities(Conveyor) == [c4]
+        assert g.get_entities(Entity) == [r1, f2, r3, c4]
+        assert sorted(g.get_entities(), key=lambda e: e.id) == [r1, f2, r3, c4]
+
+    def test_get_entities_after_remove(self):
+        g = Grid()
+        r1 = Robot()
+        r2 = Robot()
+        g.add_entity_at(1, 1, r1)
+        g.add_entity_at(1, 2, r2)
+        g.remove_entity(r1)
+        assert g.get_entities(Robot) == [r2]
+        assert g.get_entity_by_id(r1.id) is None
+        assert g.get_entity_by_id(r2.id) is r2
+
+    def test_move_entity_keeps_indexes(self):
+        g = Grid()
+        r = Robot()
+        g.add_entity_at(1, 1, r)
+        g.move_entity(4, 4, r)
+        assert g.get_entities(Robot) == [r]
+        assert g.get_entity_by_id(r.id) is r
+
+    # chunks
+    def test_chunks_without_robots_are_not_active(self):
+        g = Grid()
+        g.add_entity_at(0, 0, Conveyor())
+        g.add_entity_at(100, 100, Factory())
+        assert g.chunk_count() == 2
+        assert g.active_chunk_count() == 0
+
+        r = Robot()
+        g.add_entity_at(100, 101, r)
+        assert g.active_chunk_count() == 1
+        g.remove_entity(r)
+        assert g.active_chunk_count() == 0
+
+    def test_robot_entering_chunk_makes_it_active(self):
+        g = Grid()
+        r = Robot()
+        g.add_entity_at(0, CHUNK_SIZE - 1, r)
+        g.add_entity_at(0, CHUNK_SIZE, Conveyor())
+        assert g.active_chunk_count() == 1
+
+        g.apply_moves([(r, pack_coord(0, CHUNK_SIZE - 1), pack_coord(0, CHUNK_SIZE))])
+        assert g.active_chunk_count() == 1
+        assert [(row, col) for row, col, _ in g.get_active_items()] == [(0, CHUNK_SIZE)]
+        assert g.chunk_count() == 1
+
+    def test_chunks_handle_negative_coords(self):
+        g = Grid()
+        r = Robot()
+        g.add_entity_at(-1, -1, r)
+        assert g.is_active(-1, -1)
+        assert list(g.get_active_items()) == [(-1, -1, [r])]
+        g.remove_entity(r)
+        assert g.chunk_count() == 0
+
+    def test_query_rect(self):
+        g = Grid()
+        inside = [(0, 0), (5, 40), (-3, 10), (40, 40)]
+        outside = [(-4, 0), (41, 5), (0, 41), (200, 200)]
+        for row, col in inside + outside:
+            g.add_entity_at(row, col, Conveyor())
+        found = sorted((row, col) for row, col, _ in g.query_rect(-3, 0, 40, 40))
+        assert found == sorted(inside)
+        # a rectangle much larger than the world scans the chunks instead
+        assert len(list(g.query_rect(-10000, -10000, 10000, 10000))) == 8
+        assert list(g.query_rect(5, 5, 4, 4)) == []
+
+    def test_query_rect_active_only(self):
+        g = Grid()
+        r = Robot()
+        g.add_entity_at(2, 2, r)
+        g.add_entity_at(2, 3, Conveyor())
+        assert list(g.query_rect(0, 0, 10, 10, active_only=True)) == [(2, 2, [r])]
+
+    def test_add_entities_bulk(self):
+        g = Grid()
+        robots = [Robot() for _ in range(3)]
+        conveyor = Conveyor()
+        placements = [(0, 2, robots[2]), (0, 0, robots[0]), (0, 1, robots[1])]
+        assert g.add_entities_bulk(placements + [(0, 0, conveyor)]) == 4
+        assert g.get_entities(Robot) == robots
+        assert g.get_entities_at(0, 0) == [robots[0], conveyor]
+        assert g.is_active(0, 1)
+
+    def test_add_entities_bulk_rejects_whole_batch(self):
+        g = Grid()
+        g.add_entity_at(1, 1, Factory())
+        with pytest.raises(ValueError):
+            g.add_entities_bulk([(0, 0, Robot()), (1, 1, Factory())])
+        with pytest.raises(ValueError):
+            g.add_entities_bulk([(0, 0, Robot()), (0, 0, Robot())])
+        r = Robot()
+        with pytest.raises(ValueError):
+            g.add_entities_bulk([(0, 0, r), (0, 1, r)])
+        twin = Robot()
+        twin.id = r.id
+        with pytest.raises(ValueError):
+            g.add_entities_bulk([(0, 0, r), (0, 1, twin)])
+        assert g.entity_count() == 1
+        g.add_entity_at(0, 0, r)
+        with pytest.raises(ValueError):
+            g.add_entity_at(0, 1, twin)
+
+    def test_remove_entities_bulk(self):
+        g = Grid()
+        robots = [Robot() for _ in range(4)]
+        g.add_entities_bulk((0, col, r) for col, r in enumerate(robots))
+        assert g.remove_entities_bulk([robots[1], robots[3], Robot()]) == 2
+        assert g.get_entities(Robot) == [robots[0], robots[2]]
+        assert g.get_entity_by_id(robots[1].id) is None
+        assert not g.is_active(0, 1)
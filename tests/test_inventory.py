@@ -0,0 +1,44 @@
+from components import Robot, Factory
+from components.entity import Inventory, Resource
+
+
+class TestInventory:
+    def test_counts_per_resource(self):
+        inventory = Inventory()
+        inventory.add(Resource.WOOD)
+        inventory.add(Resource.WOOD)
+        inventory.add(Resource.STONE, 3)
+        assert inventory.count(Resource.WOOD) == 2
+        assert inventory.count(Resource.METAL) == 0
+        assert inventory.count(Resource.STONE) == 3
+        assert len(inventory) == 5
+        assert list(inventory.items()) == [(Resource.WOOD, 2), (Resource.STONE, 3)]
+
+    def test_capacity(self):
+        inventory = Inventory(capacity=2)
+        assert inventory.add(Resource.METAL)
+        assert inventory.add(Resource.METAL)
+        assert not inventory.add(Resource.METAL)
+        assert inventory.add(Resource.WOOD)
+        assert inventory.count(Resource.METAL) == 2
+
+    def test_remove(self):
+        inventory = Inventory()
+        inventory.add(Resource.WOOD, 2)
+        assert inventory.remove(Resource.WOOD)
+        assert not inventory.remove(Resource.WOOD, 5)
+        assert inventory.count(Resource.WOOD) == 1
+
+    def test_robot_add_and_count_resource(self):
+        robot = Robot(capacity=1)
+        assert robot.add_resource(Resource.WOOD)
+        assert not robot.add_resource(Resource.WOOD)
+        assert robot.count_resource(Resource.WOOD) == 1
+
+    def test_factory_deposits_into_counter(self):
+        robot = Robot()
+        factory = Factory(resource_type=Resource.STONE)
+        for _ in range(100):
+            factory.process([factory, robot])
+        assert robot.count_resource(Resource.STONE) == 100
+        assert robot.count_resource(Resource.WOOD) == 0
@@ -0,0 +1,156 @@
+import pytest
+
+from components import Robot
+from const import Command
+from model import DataModel
+from model.journal import Journal
+
+
+# seek tests want checkpoints close together
+@pytest.fixture
+def make_model(make_model):
+    def make(checkpoint_interval=5, **kwargs):
+        return make_model(checkpoint_interval=checkpoint_interval, **kwargs)
+
+    return make
+
+
+def state(model: DataModel):
+    return sorted(
+        (e.id, type(e).__name__, row, col, getattr(e, "current_move_index", None))
+        for row, col, entities in model.grid
+        for e in entities
+    )
+
+
+def play(model: DataModel, ticks: int, history: dict) -> None:
+    for _ in range(ticks):
+        model.run_ticks(1)
+        history[model.current_tick] = state(model)
+
+
+class TestJournal:
+    def test_records_commands_and_steps(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 1 1"))
+        model.run_ticks(2)
+        assert model.journal.entries == [(0, "robot 1 1"), (2, "step 2")]
+
+    def test_step_runs_restart_at_checkpoints(self, make_model):
+        model = make_model()
+        model.run_ticks(7)
+        assert model.journal.entries == [(4, "step 4"), (7, "step 3")]
+        assert model.journal.checkpoints[-1].entry_index == 1
+
+    def test_nothing_journaled_without_checkpoints(self, make_model):
+        model = make_model(checkpoint_interval=None)
+        model.execute_command(Command("robot 1 1"))
+        model.run_ticks(3)
+        assert len(model.journal) == 0
+        assert not model.journal.checkpoints
+        with pytest.raises(ValueError):
+            model.seek(1)
+
+    def test_checkpoint_interval(self):
+        journal = Journal(checkpoint_interval=10)
+        assert journal.checkpoint_due(0)
+        journal.add_checkpoint(0, b"", True)
+        assert not journal.checkpoint_due(9)
+        assert journal.checkpoint_due(10)
+        assert journal.checkpoint_before(25).tick == 0
+
+    def test_checkpoints_are_thinned_out(self):
+        journal = Journal(checkpoint_interval=1, max_checkpoints=4)
+        for tick in range(5):
+            journal.add_checkpoint(tick, b"", True)
+        assert [checkpoint.tick for checkpoint in journal.checkpoints] == [0, 2, 4]
+        for tick in range(5, 9):
+            journal.add_checkpoint(tick, b"", True)
+        ticks = [checkpoint.tick for checkpoint in journal.checkpoints]
+        assert len(ticks) <= 4 and ticks[0] == 0 and ticks[-1] == 8
+
+    def test_seek_after_thinning(self, make_model):
+        model = make_model(checkpoint_interval=2)
+        model.journal.max_checkpoints = 3
+        model.execute_command(Command("robot 0 0"))
+        model.execute_command(Command("set path 1 r"))
+        model.run_ticks(20)
+        assert len(model.journal.checkpoints) <= 3
+        model.seek(5)
+        robot = model.grid.get_entity_by_id(1)
+        assert model.grid.get_coord_of_entity(robot) == (0, 5)
+
+
+class TestSeek:
+    def test_seek_reproduces_every_tick(self, make_model):
+        model = make_model()
+        history = {0: state(model)}
+        model.execute_command(Command("conveyor 0 3 down"))
+        model.execute_command(Command("robot 0 0"))
+        model.execute_command(Command("set path 2 rrrdl"))
+        history[0] = state(model)
+        play(model, 7, history)
+        model.execute_command(Command("factory 4 4 wood"))
+        model.execute_command(Command("robot 9 9"))
+        history[model.current_tick] = state(model)
+        play(model, 12, history)
+
+        assert len(model.journal.checkpoints) > 2
+        for tick in sorted(history, reverse=True):
+            model.seek(tick)
+            assert model.current_tick == tick
+            assert state(model) == history[tick]
+
+    def test_seek_then_continue(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 0 0"))
+        model.execute_command(Command("set path 1 r"))
+        model.run_ticks(8)
+        model.seek(3)
+        robot = model.grid.get_entity_by_id(1)
+        assert model.grid.get_coord_of_entity(robot) == (0, 3)
+        model.run_ticks(2)
+        assert model.grid.get_coord_of_entity(robot) == (0, 5)
+        assert model.journal.entries[-1] == (5, "step 1")
+
+    def test_ids_are_replayed(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 0 0"))
+        model.run_ticks(6)
+        model.execute_command(Command("robot 5 5"))
+        model.seek(6)
+        assert isinstance(model.grid.get_entity_by_id(2), Robot)
+        model.execute_command(Command("robot 7 7"))
+        assert model.grid.get_entity_by_id(3) is not None
+
+    def test_seek_into_fast_forward(self, make_model):
+        model = make_model(checkpoint_interval=1000)
+        for col in range(10):
+            model.execute_command(Command(f"conveyor 0 {col} right"))
+        model.execute_command(Command("robot 0 0"))
+        model.run_ticks(9, fast_forward=True)
+        model.seek(4)
+        robot = model.grid.get_entities(Robot)[0]
+        assert model.grid.get_coord_of_entity(robot) == (0, 4)
+
+    def test_cannot_seek_ahead(self, make_model):
+        model = make_model()
+        with pytest.raises(ValueError):
+            model.seek(1)
+
+    def test_seek_replays_replans(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 0 0"))
+        model.execute_command(Command("plan 1 0 20"))
+        history = {0: state(model)}
+        play(model, 7, history)
+        model.execute_command(Command("move 1 down"))
+        history[7] = state(model)
+        play(model, 8, history)
+        assert model.planner.replans == 1
+        model.seek(9)
+        model.run_ticks(6)
+        assert state(model) == history[15]
+        for tick in sorted(history, reverse=True):
+            model.seek(tick)
+            assert state(model) == history[tick]
@@ -0,0 +1,46 @@
+import pytest
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import EMPTY_COUNTS, Resource
+from components.grid import Grid
+from const import DIRECTION
+from model.memory import MemoryReport, entity_bytes
+
+
+class TestCompactEntities:
+    def test_entities_have_no_attribute_dict(self):
+        for entity in (Robot(), Factory(), Conveyor()):
+            assert not hasattr(entity, "__dict__")
+            with pytest.raises(AttributeError):
+                entity.colour = "red"
+
+    def test_empty_inventories_are_shared(self):
+        robot, conveyor = Robot(), Conveyor()
+        assert conveyor.resources._counts is EMPTY_COUNTS
+        assert not robot.resources.remove(Resource.WOOD)
+        robot.add_resource(Resource.WOOD)
+        assert robot.count_resource(Resource.WOOD) == 1
+        assert conveyor.resources._counts is EMPTY_COUNTS
+        robot.resources.clear()
+        assert robot.resources._counts is EMPTY_COUNTS
+
+
+class TestMemoryReport:
+    def test_bytes_per_type(self):
+        g = Grid()
+        for col in range(10):
+            g.add_entity_at(0, col, Conveyor())
+        g.add_entity_at(1, 0, Robot(path=[DIRECTION.RIGHT] * 50))
+        report = MemoryReport.from_grid(g)
+        assert report.counts == {"Conveyor": 10, "Robot": 1}
+        # the robot carries its own path list
+        assert report.bytes_per_entity("Robot") > report.bytes_per_entity("Conveyor")
+        assert report.total_bytes > sum(report.bytes_by_type.values())
+        assert "Conveyor: 10 x" in report.summary()
+
+    def test_shared_objects_count_once(self):
+        seen: set = set()
+        first = entity_bytes(Conveyor(), seen)
+        assert entity_bytes(Conveyor(), seen) < first
+        assert MemoryReport.from_grid(Grid()).bytes_per_entity("Robot") == 0.0
@@ -0,0 +1,119 @@
+import pytest
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.grid import Grid
+from const import DIRECTION, Command
+from model.pathfinding import DistanceFields
+
+
+class TestDistanceFields:
+    def test_open_grid_is_manhattan(self):
+        grid = Grid()
+        grid.add_entity_at(0, 0, Factory())
+        fields = DistanceFields(grid)
+        field = fields.field_to(0, 0, (3, 2))
+        assert field.distance(3, 2) == 5
+        assert fields.route(3, 2, 0, 0) == [DIRECTION.UP] * 3 + [DIRECTION.LEFT] * 2
+
+    def test_conveyors_carry_robots(self):
+        grid = Grid()
+        for col in range(1, 4):
+            grid.add_entity_at(0, col, Conveyor(direction=DIRECTION.RIGHT))
+        fields = DistanceFields(grid)
+        # the belt gets the robot there without path entries
+        assert fields.route(0, 1, 0, 4) == []
+        # and it can't walk back against it: off the end, then around
+        field = fields.field_to(0, 0, (0, 2))
+        assert field.distance(0, 2) == 8
+        assert fields.route(0, 2, 0, 0) == (
+            [DIRECTION.UP] + [DIRECTION.LEFT] * 4 + [DIRECTION.DOWN]
+        )
+
+    def test_unreachable(self):
+        grid = Grid()
+        loop = [
+            (0, 0, DIRECTION.RIGHT),
+            (0, 1, DIRECTION.DOWN),
+            (1, 1, DIRECTION.LEFT),
+            (1, 0, DIRECTION.UP),
+        ]
+        for row, col, direction in loop:
+            grid.add_entity_at(row, col, Conveyor(direction=direction))
+        with pytest.raises(ValueError, match="No route"):
+            DistanceFields(grid).route(0, 0, 5, 5)
+
+    def test_fields_are_shared_and_invalidated(self):
+        grid = Grid()
+        grid.add_entity_at(0, 0, Factory())
+        fields = DistanceFields(grid)
+        for row in range(1, 4):
+            fields.route(row, 3, 0, 0)
+        assert fields.searches == 1
+        grid.add_entity_at(0, 1, Conveyor(direction=DIRECTION.RIGHT))
+        assert len(fields) == 0
+        assert fields.route(1, 1, 0, 0) == [DIRECTION.LEFT, DIRECTION.UP]
+        assert fields.searches == 2
+
+    def test_edits_elsewhere_keep_the_field(self):
+        grid = Grid()
+        grid.add_entity_at(0, 0, Factory())
+        fields = DistanceFields(grid)
+        fields.route(3, 3, 0, 0)
+        grid.add_entity_at(200, 200, Conveyor(direction=DIRECTION.RIGHT))
+        assert len(fields) == 1
+        fields.route(2, 2, 0, 0)
+        assert fields.searches == 1
+
+    def test_field_grows_around_a_wall(self):
+        grid = Grid()
+        # a belt pushing down across every column the robot could use nearby
+        for col in range(-10, 11):
+            grid.add_entity_at(2, col, Conveyor(direction=DIRECTION.DOWN))
+        fields = DistanceFields(grid)
+        path = fields.route(4, 0, 0, 0)
+        assert len(path) == 1 + 11 + 3 + 11
+        assert fields.searches > 1
+
+    def test_far_start_grows_the_field(self):
+        grid = Grid()
+        grid.add_entity_at(0, 0, Factory())
+        fields = DistanceFields(grid)
+        fields.field_to(0, 0)
+        assert len(fields.route(40, 0, 0, 0)) == 40
+        assert fields.searches == 2
+
+
+class TestGotoCommand:
+    def test_robot_parks_on_target(self, make_model):
+        model = make_model()
+        model.execute_command(Command("factory 2 4 wood"))
+        model.execute_command(Command("robot 0 0"))
+        robot = model.grid.get_entities(Robot)[0]
+        model.execute_command(Command(f"goto {robot.id} 2 4"))
+        model.run_ticks(10)
+        assert model.grid.get_coord_of_entity(robot) == (2, 4)
+        assert robot.count_resource(Factory().resource_type) > 0
+
+    def test_vectorized_robot_parks_too(self, make_model):
+        pytest.importorskip("numpy")
+        model = make_model(vectorized=True)
+        model.execute_command(Command("robot 3 3"))
+        robot = model.grid.get_entities(Robot)[0]
+        model.execute_command(Command(f"goto {robot.id} 1 0"))
+        model.run_ticks(8)
+        assert model.grid.get_coord_of_entity(robot) == (1, 0)
+
+    def test_blocked_robot_still_parks_on_target(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 0 0"))
+        model.execute_command(Command("robot 0 3"))
+        robot, blocker = model.grid.get_entities(Robot)
+        # the blocker sits on the route for a few ticks, then steps aside
+        blocker.set_path(
+            [DIRECTION.WAIT] * 4 + [DIRECTION.DOWN, DIRECTION.WAIT], repeat=False
+        )
+        model.execute_command(Command(f"goto {robot.id} 0 6"))
+        model.run_ticks(12)
+        assert model.grid.get_coord_of_entity(robot) == (0, 6)
+        assert model.grid.get_coord_of_entity(blocker) == (1, 3)
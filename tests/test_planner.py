@@ -0,0 +1,107 @@
+import random
+
+from components import Robot
+from components.conveyor import Conveyor
+from const import DIRECTION, Command
+from model import DataModel
+
+
+def add_robots(model: DataModel, *cells: tuple[int, int]):
+    robots = []
+    for row, col in cells:
+        robot = Robot()
+        model.grid.add_entity_at(row, col, robot)
+        robots.append(robot)
+    return robots
+
+
+def coords(model: DataModel, robots):
+    return [model.grid.get_coord_of_entity(robot) for robot in robots]
+
+
+class TestFleetPlanner:
+    def test_head_on_robots_pass_each_other(self, make_model):
+        model = make_model()
+        left, right = add_robots(model, (0, 0), (0, 4))
+        assert model.planner.plan({left: (0, 4), right: (0, 0)}) == 2
+        model.run_ticks(8)
+        assert coords(model, [left, right]) == [(0, 4), (0, 0)]
+        assert model.planner.replans == 0
+
+    def test_plans_are_followed_exactly(self, make_model):
+        rng = random.Random(7)
+        model = make_model()
+        for row, col in rng.sample([(r, c) for r in range(8) for c in range(8)], 6):
+            model.grid.add_entity_at(row, col, Conveyor(direction=DIRECTION.DOWN))
+        cells = [(r, c) for r in range(8) for c in range(8)]
+        free = [cell for cell in cells if not model.grid.get_entities_at(*cell)]
+        starts = rng.sample(free, 12)
+        goals = rng.sample(free, 12)
+        robots = add_robots(model, *starts)
+        assert model.planner.plan(dict(zip(robots, goals))) == 12
+        model.run_ticks(40)
+        assert coords(model, robots) == goals
+        assert model.planner.replans == 0
+
+    def test_only_disturbed_robots_are_replanned(self, make_model):
+        model = make_model()
+        first, second = add_robots(model, (0, 0), (5, 0))
+        model.planner.plan({first: (0, 6), second: (5, 6)})
+        model.step()
+        # a robot the planner doesn't know about parks on the first route
+        model.grid.add_entity_at(0, 2, Robot())
+        model.run_ticks(12)
+        assert coords(model, [first, second]) == [(0, 6), (5, 6)]
+        assert model.planner.replans == 1
+
+    def test_static_change_on_route_replans(self, make_model):
+        model = make_model()
+        (robot,) = add_robots(model, (2, 0))
+        model.planner.plan({robot: (2, 5)})
+        model.execute_command(Command("conveyor 2 3 up"))
+        model.run_ticks(12)
+        assert coords(model, [robot]) == [(2, 5)]
+        assert model.planner.replans == 1
+
+    def test_plan_command(self, capsys, make_model):
+        model = make_model()
+        model.execute_command(Command("factory 3 3 metal"))
+        model.execute_command(Command("conveyor 0 5 left"))
+        model.execute_command(Command("robot 0 0"))
+        robot = model.grid.get_entities(Robot)[0]
+        model.execute_command(Command(f"plan {robot.id} 3 3"))
+        model.run_ticks(6)
+        assert coords(model, [robot]) == [(3, 3)]
+        model.execute_command(Command(f"plan {robot.id} 0 5"))
+        assert "waiting for a route" in capsys.readouterr().out
+
+    def test_parked_robots_are_released(self, make_model):
+        model = make_model()
+        (robot,) = add_robots(model, (0, 0))
+        model.planner.plan({robot: (0, 3)})
+        model.run_ticks(6)
+        assert len(model.planner) == 0
+        assert coords(model, [robot]) == [(0, 3)]
+
+    def test_new_path_after_plan_sticks(self, make_model):
+        model = make_model()
+        model.execute_command(Command("robot 0 0"))
+        (robot,) = model.grid.get_entities(Robot)
+        model.execute_command(Command(f"plan {robot.id} 0 3"))
+        model.run_ticks(6)
+        model.execute_command(Command(f"set path {robot.id} d"))
+        model.run_ticks(5)
+        assert coords(model, [robot]) == [(5, 3)]
+        model.execute_command(Command(f"goto {robot.id} 4 0"))
+        model.run_ticks(10)
+        assert coords(model, [robot]) == [(4, 0)]
+
+    def test_new_path_mid_route_sticks(self, make_model):
+        model = make_model()
+        (robot,) = add_robots(model, (0, 0))
+        model.planner.plan({robot: (0, 9)})
+        model.run_ticks(2)
+        robot.set_path([DIRECTION.DOWN])
+        model.run_ticks(3)
+        assert coords(model, [robot]) == [(3, 2)]
+        assert len(model.planner) == 0
@@ -0,0 +1,164 @@
+import pytest
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import Resource
+from components.grid import Grid
+from components.program import compile_program
+from const import DIRECTION, Command
+from model.snapshot import dump_snapshot, load_snapshot_bytes
+
+
+def trace(robot: Robot, ticks: int) -> list:
+    moves = []
+    for _ in range(ticks):
+        row, col = robot.next_position(10, 10, [])
+        moves.append((row - 10, col - 10))
+    return moves
+
+
+class TestCompile:
+    def test_moves_compile_to_pairs(self):
+        program = compile_program("rr d")
+        assert len(program) == 7  # three moves and a halt
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "repeat 0 r end",
+            "repeat r end",
+            "forever r",
+            "r end",
+            "else r",
+            "if has gold 1 r end",
+            "if on robot r end",
+            "jump",
+        ],
+    )
+    def test_errors(self, source):
+        with pytest.raises(ValueError):
+            compile_program(source)
+
+
+class TestRun:
+    def test_repeat_then_halt(self):
+        robot = Robot()
+        robot.set_program(compile_program("repeat 2 rd end l"))
+        assert trace(robot, 6) == [(0, 1), (1, 0), (0, 1), (1, 0), (0, -1), (0, 0)]
+        assert robot.counters == []
+
+    def test_nested_forever(self):
+        robot = Robot()
+        robot.set_program(compile_program("forever repeat 2 r end u end"))
+        assert trace(robot, 6) == [(0, 1), (0, 1), (-1, 0)] * 2
+
+    def test_if_has(self):
+        robot = Robot()
+        robot.set_program(compile_program("forever if has wood 2 u else d end end"))
+        robot.add_resource(Resource.WOOD)
+        assert trace(robot, 1) == [(1, 0)]
+        robot.add_resource(Resource.WOOD)
+        assert trace(robot, 1) == [(-1, 0)]
+
+    def test_if_on(self):
+        robot = Robot()
+        robot.set_program(compile_program("forever if on factory w else r end end"))
+        assert robot.next_position(0, 0, [robot]) == (0, 1)
+        assert robot.next_position(0, 1, [robot, Factory()]) == (0, 1)
+
+    def test_if_on_matches_subclasses(self):
+        class Mill(Factory):
+            pass
+
+        robot = Robot()
+        robot.set_program(compile_program("forever if on factory w else r end end"))
+        assert robot.next_position(0, 1, [robot, Mill()]) == (0, 1)
+
+    def test_budget_bounds_empty_loops(self):
+        robot = Robot()
+        robot.set_program(compile_program("forever if has wood 1 r end end", budget=8))
+        # never moves, but each tick stops after the budget and resumes later
+        assert trace(robot, 3) == [(0, 0)] * 3
+
+    def test_set_path_drops_program(self):
+        robot = Robot()
+        robot.set_program(compile_program("forever r end"))
+        robot.set_path([DIRECTION.DOWN])
+        assert trace(robot, 1) == [(1, 0)]
+
+
+class TestInModel:
+    def test_command_programs_all_robots(self, make_model):
+        grid = Grid()
+        grid.add_entity_at(0, 0, Robot())
+        grid.add_entity_at(2, 0, Robot())
+        model = make_model(grid)
+        model.execute_command(Command("program all repeat 3 r end"))
+        programs = {robot.program for robot in grid.get_entities(Robot)}
+        assert len(programs) == 1
+        for _ in range(4):
+            model.step()
+        assert sorted(
+            grid.get_coord_of_entity(r) for r in grid.get_entities(Robot)
+        ) == [
+            (0, 3),
+            (2, 3),
+        ]
+
+    def test_conveyor_pauses_program(self, make_model):
+        grid = Grid()
+        grid.add_entity_at(0, 0, Conveyor(direction=DIRECTION.DOWN))
+        robot = Robot()
+        robot.set_program(compile_program("r u"))
+        grid.add_entity_at(0, 0, robot)
+        model = make_model(grid)
+        model.step()
+        model.step()
+        assert grid.get_coord_of_entity(robot) == (1, 1)
+        assert robot.pc == 2
+
+    def test_vectorized_matches(self, make_model):
+        pytest.importorskip("numpy")
+        results = []
+        for vectorized in (False, True):
+            grid = Grid()
+            grid.add_entity_at(1, 2, Conveyor(direction=DIRECTION.LEFT))
+            grid.add_entity_at(0, 4, Factory())
+            program = compile_program(
+                "forever if on factory d else repeat 2 r end end u end"
+            )
+            for row in range(3):
+                robot = Robot()
+                robot.set_program(program)
+                grid.add_entity_at(row, 0, robot)
+            grid.add_entity_at(3, 0, Robot(path=[DIRECTION.RIGHT]))
+            model = make_model(grid, vectorized=vectorized)
+            states = []
+            for _ in range(12):
+                model.step()
+                states.append(
+                    sorted(
+                        (grid.get_coord_of_entity(robot), robot.pc)
+                        for robot in grid.get_entities(Robot)
+                    )
+                )
+            results.append(states)
+        assert results[0] == results[1]
+
+    def test_snapshot_keeps_vm_state(self, make_model):
+        grid = Grid()
+        program = compile_program("repeat 3 repeat 2 r end d end")
+        robots = [Robot(), Robot()]
+        for col, robot in enumerate(robots):
+            robot.set_program(program)
+            grid.add_entity_at(0, col * 10, robot)
+        model = make_model(grid)
+        model.step()
+
+        loaded = load_snapshot_bytes(dump_snapshot(grid))
+        copies = sorted(loaded.get_entities(Robot), key=lambda robot: robot.id)
+        assert copies[0].program is copies[1].program
+        assert copies[0].program.source == program.source
+        for robot, copy in zip(robots, copies):
+            assert (copy.pc, copy.counters) == (robot.pc, robot.counters)
+            assert trace(copy, 8) == trace(robot, 8)
@@ -0,0 +1,62 @@
+from components import Robot, Entity
+from components.conveyor import Conveyor
+from components.registry import EntityRegistry, generation_of, index_of
+from const import DIRECTION, Command
+
+
+class TestEntityRegistry:
+    def test_ids_count_up_without_recycling(self):
+        registry = EntityRegistry()
+        first = registry.allocate()
+        registry.release(first)
+        assert [first, registry.allocate(), registry.allocate()] == [1, 2, 3]
+
+    def test_recycled_ids_get_a_new_generation(self):
+        registry = EntityRegistry(recycle=True)
+        old = registry.allocate()
+        registry.allocate()
+        registry.release(old)
+        new = registry.allocate()
+        assert index_of(new) == index_of(old)
+        assert generation_of(new) == generation_of(old) + 1
+        assert registry.is_current(new)
+        assert not registry.is_current(old)
+        # releasing a stale id does nothing
+        registry.release(old)
+        assert registry.allocate() == 3
+
+    def test_state_round_trip(self):
+        registry = EntityRegistry(recycle=True)
+        ids = [registry.allocate() for _ in range(3)]
+        registry.release(ids[1])
+        state = registry.state()
+        expected = registry.allocate()
+        registry.restore(state)
+        assert registry.allocate() == expected
+
+    def test_bulk_create(self):
+        conveyors = Entity.registry.create(Conveyor, 5, direction=DIRECTION.UP)
+        assert [c.id for c in conveyors] == [1, 2, 3, 4, 5]
+        assert all(c.direction == DIRECTION.UP for c in conveyors)
+
+    def test_bulk_create_uses_its_own_ids(self):
+        registry = EntityRegistry(recycle=True)
+        robots = registry.create(Robot, 3)
+        assert [robot.id for robot in robots] == [1, 2, 3]
+        assert registry.counter == 3
+        assert Entity.registry.counter == 0
+
+
+class TestIdRecycling:
+    def test_delete_recycles_and_seek_replays_same_ids(self, monkeypatch, make_model):
+        monkeypatch.setattr(Entity, "registry", EntityRegistry(recycle=True))
+        model = make_model()
+        model.execute_command(Command("robot 0 0"))
+        model.execute_command(Command("robot 1 1"))
+        model.run_ticks(2)
+        model.execute_command(Command("delete 1"))
+        model.execute_command(Command("robot 2 2"))
+        ids = sorted(robot.id for robot in model.grid.get_entities(Robot))
+        assert index_of(ids[-1]) == 1 and generation_of(ids[-1]) == 1
+        model.seek(model.current_tick)
+        assert sorted(robot.id for robot in model.grid.get_entities(Robot)) == ids
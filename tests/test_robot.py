@@ -124,6 +124,15 @@ class TestRobot:
         robot.update_move_index()
         assert robot.current_move_index == 0  # Should wrap around
 
+    def test_path_without_repeat_stops_at_end(self):
+        robot = Robot()
+        robot.set_path([DIRECTION.UP, DIRECTION.WAIT], repeat=False)
+        robot.update_move_index()
+        robot.update_move_index()
+        assert robot.current_move_index == 1
+        robot.set_path([DIRECTION.UP, DIRECTION.WAIT])
+        assert robot.repeat_path
+
     def test_set_path(self):
         path = [DIRECTION.UP, DIRECTION.DOWN]
         robot = Robot(path=path)
@@ -0,0 +1,85 @@
+import copy
+import random
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.grid import Grid
+from const import DIRECTION
+from model import DataModel
+from model.modules import CommandDispatcher, TerminalEmulator
+from model.sharding import ShardedSimulation, split_rows
+
+
+def build_world(seed: int) -> Grid:
+    rng = random.Random(seed)
+    g = Grid()
+    cells = [(r, c) for r in range(10) for c in range(6)]
+    for r, c in rng.sample(cells, 20):
+        g.add_entity_at(r, c, Conveyor(direction=rng.choice(list(DIRECTION)[:4])))
+    for r, c in rng.sample(cells, 6):
+        g.add_entity_at(r, c, Factory())
+    for r, c in rng.sample(cells, rng.randint(1, 20)):
+        path = [rng.choice(list(DIRECTION)) for _ in range(rng.randint(1, 4))]
+        g.add_entity_at(r, c, Robot(path=path))
+    return g
+
+
+def snapshot(grid: Grid):
+    return sorted(
+        (entity.id, grid.get_coord_of_entity(entity), len(entity.resources))
+        for entity in grid.get_entities()
+    )
+
+
+class TestShardedSimulation:
+    def test_split_rows(self):
+        g = Grid()
+        g.add_entity_at(0, 0, Conveyor())
+        g.add_entity_at(9, 0, Conveyor())
+        assert split_rows(g, 1) == []
+        assert split_rows(g, 2) == [5]
+        assert split_rows(g, 4) == [3, 6, 9]
+        assert split_rows(g, 20) == [2, 4, 6, 8]
+
+    def test_matches_single_model(self):
+        for seed in range(60):
+            world = build_world(seed)
+            simulation = ShardedSimulation(
+                copy.deepcopy(world), shards=2 + seed % 3, processes=False
+            )
+            model = DataModel(CommandDispatcher(TerminalEmulator()), world)
+            for _ in range(8):
+                model.step()
+                simulation.step()
+                assert snapshot(simulation.gather()) == snapshot(model.grid)
+
+    def test_robot_crosses_into_next_band(self):
+        g = Grid()
+        g.add_entity_at(0, 0, Conveyor())
+        g.add_entity_at(9, 0, Conveyor())
+        robot = Robot(path=[DIRECTION.DOWN])
+        g.add_entity_at(3, 2, robot)
+        with ShardedSimulation(g, shards=2) as simulation:
+            simulation.run_ticks(4)
+            gathered = simulation.gather()
+        moved = gathered.get_entity_by_id(robot.id)
+        assert gathered.get_coord_of_entity(moved) == (7, 2)
+
+    def test_swap_across_band_edge_stays(self):
+        g = Grid()
+        g.add_entity_at(0, 0, Conveyor())
+        g.add_entity_at(9, 0, Conveyor())
+        upper = Robot(path=[DIRECTION.DOWN])
+        lower = Robot(path=[DIRECTION.UP])
+        follower = Robot(path=[DIRECTION.DOWN])
+        g.add_entity_at(4, 2, upper)
+        g.add_entity_at(5, 2, lower)
+        g.add_entity_at(4, 3, follower)
+        with ShardedSimulation(g, shards=2, processes=False) as simulation:
+            simulation.step()
+            gathered = simulation.gather()
+        coords = [
+            gathered.get_coord_of_entity(gathered.get_entity_by_id(robot.id))
+            for robot in (upper, lower, follower)
+        ]
+        assert coords == [(4, 2), (5, 2), (5, 3)]
@@ -0,0 +1,103 @@
+import pytest
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.entity import Entity, Resource
+from components.grid import Grid
+from const import DIRECTION
+from model.snapshot import (
+    dump_snapshot,
+    load_snapshot,
+    load_snapshot_bytes,
+    save_snapshot,
+)
+
+
+def build_world() -> Grid:
+    g = Grid()
+    robot = Robot(name="bit", path=[DIRECTION.RIGHT, DIRECTION.DOWN], capacity=3)
+    robot.current_move_index = 1
+    robot.add_resource(Resource.STONE)
+    robot.add_resource(Resource.STONE)
+    g.add_entity_at(0, 0, Conveyor(name="Belt", direction=DIRECTION.LEFT))
+    g.add_entity_at(0, 0, robot)
+    g.add_entity_at(-4, 7, Factory(name="Zap", resource_type=Resource.METAL))
+    parked = Robot(name="zip")
+    parked.set_path([DIRECTION.UP, DIRECTION.WAIT], repeat=False)
+    g.add_entity_at(3, 2, parked)
+    return g
+
+
+def describe(grid: Grid):
+    cells = []
+    for row, col, entities in grid:
+        for e in entities:
+            cells.append(
+                (
+                    row,
+                    col,
+                    type(e).__name__,
+                    e.id,
+                    e.name,
+                    getattr(e, "path", None),
+                    getattr(e, "current_move_index", None),
+                    getattr(e, "repeat_path", None),
+                    getattr(e, "direction", None),
+                    getattr(e, "resource_type", None),
+                    list(e.resources.items()),
+                    e.resources.capacity,
+                )
+            )
+    return sorted(cells, key=lambda cell: cell[3])
+
+
+class TestSnapshot:
+    def test_round_trip_file(self, tmp_path):
+        g = build_world()
+        path = str(tmp_path / "world.snap")
+        save_snapshot(g, path)
+        loaded = load_snapshot(path)
+        assert describe(loaded) == describe(g)
+        assert loaded.get_entity_by_id(1).path == [DIRECTION.RIGHT, DIRECTION.DOWN]
+
+    def test_loaded_world_keeps_running(self):
+        g = build_world()
+        loaded = load_snapshot_bytes(dump_snapshot(g))
+        robot = loaded.get_entity_by_id(4)
+        assert robot.add_resource(Resource.WOOD)
+        assert robot.count_resource(Resource.WOOD) == 1
+
+    def test_id_counter(self):
+        data = dump_snapshot(build_world())
+        Entity.registry.reset()
+        load_snapshot_bytes(data)
+        assert Entity.registry.counter == 4
+        Entity.registry.counter = 10
+        load_snapshot_bytes(data)
+        assert Entity.registry.counter == 10
+        load_snapshot_bytes(data, restore_ids=True)
+        assert Entity.registry.counter == 4
+
+    def test_non_ascii_names(self):
+        g = Grid()
+        g.add_entity_at(0, 0, Robot(name="Zoë"))
+        g.add_entity_at(0, 1, Robot(name="bob"))
+        loaded = load_snapshot_bytes(dump_snapshot(g))
+        assert [robot.name for robot in loaded.get_entities(Robot)] == ["Zoë", "bob"]
+
+    def test_id_collisions_are_rejected(self):
+        data = dump_snapshot(build_world())
+        Entity.registry.reset()
+        g = Grid()
+        g.add_entity_at(9, 9, Robot())
+        with pytest.raises(ValueError, match="id"):
+            load_snapshot_bytes(data, g)
+        assert g.entity_count() == 1
+        assert g.get_entity_by_id(1) is g.get_entities_at(9, 9)[0]
+
+    def test_empty_world(self):
+        assert load_snapshot_bytes(dump_snapshot(Grid())).entity_count() == 0
+
+    def test_rejects_other_data(self):
+        with pytest.raises(ValueError):
+            load_snapshot_bytes(b"\0" * 64)
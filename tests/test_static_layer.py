@@ -0,0 +1,75 @@
+import pytest
+
+from components import Factory
+from components.conveyor import Conveyor
+from components.grid import Grid
+from model import DataModel
+from model.frames import FramePublisher
+from model.modules import CommandDispatcher, TerminalEmulator
+
+pytest.importorskip("pyxel")
+
+from view.camera import Camera  # noqa: E402
+from view.static_layer import StaticLayer  # noqa: E402
+
+
+def make_publisher() -> FramePublisher:
+    return FramePublisher(DataModel(CommandDispatcher(TerminalEmulator()), Grid()))
+
+
+def lit(layer: StaticLayer, row: int, col: int) -> bool:
+    size = layer.camera.cell_size
+    left, top = layer.camera.to_screen(row, col)
+    return any(
+        layer.image.pget(left + x, top + y) for x in range(size) for y in range(size)
+    )
+
+
+class TestStaticLayer:
+    def test_draws_once_then_only_dirty_cells(self):
+        publisher = make_publisher()
+        grid = publisher.model.grid
+        grid.add_entity_at(0, 0, Conveyor())
+        grid.add_entity_at(1, 1, Factory())
+        layer = StaticLayer(Camera(40, 40))
+        assert layer.refresh(publisher.publish()) == 2
+        assert lit(layer, 0, 0) and lit(layer, 1, 1)
+        assert layer.refresh(publisher.publish()) == 0
+
+        grid.remove_entity(grid.get_entities_at(0, 0)[0])
+        grid.add_entity_at(3, 3, Conveyor())
+        assert layer.refresh(publisher.publish()) == 2
+        assert not lit(layer, 0, 0)
+        assert lit(layer, 3, 3)
+
+    def test_missed_frames_redraw_everything(self):
+        publisher = make_publisher()
+        grid = publisher.model.grid
+        layer = StaticLayer(Camera(40, 40))
+        layer.refresh(publisher.publish())
+        grid.add_entity_at(0, 0, Factory())
+        publisher.publish()
+        grid.add_entity_at(1, 1, Factory())
+        assert layer.refresh(publisher.publish()) == 2
+
+    def test_cells_off_the_image_are_skipped(self):
+        publisher = make_publisher()
+        publisher.model.grid.add_entity_at(-1, 0, Factory())
+        publisher.model.grid.add_entity_at(100, 100, Factory())
+        layer = StaticLayer(Camera(20, 20))
+        assert layer.refresh(publisher.publish()) == 0
+
+    def test_camera_move_redraws_view(self):
+        publisher = make_publisher()
+        publisher.model.grid.add_entity_at(0, 0, Factory())
+        publisher.model.grid.add_entity_at(10, 10, Factory())
+        camera = Camera(20, 20)
+        layer = StaticLayer(camera)
+        frame = publisher.publish()
+        assert layer.refresh(frame) == 1
+        camera.pan(8, 8)
+        assert layer.refresh(frame) == 1
+        assert lit(layer, 10, 10)
+        camera.zoom(-3)
+        assert camera.cell_size == 1
+        assert layer.refresh(frame) == 2
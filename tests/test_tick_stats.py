@@ -0,0 +1,44 @@
+import logging
+
+from components import Robot, Factory
+from const import DIRECTION, Command
+from model.tick_stats import TickStats
+
+
+class TestTickStats:
+    def test_phase_counts(self, make_model):
+        model = make_model()
+        model.grid.add_entity_at(0, 0, Robot(path=[DIRECTION.RIGHT]))
+        model.grid.add_entity_at(0, 1, Factory())
+        model.grid.add_entity_at(5, 5, Robot())
+        model.run_ticks(2)
+        stats = model.stats
+        assert stats.ticks == 2
+        assert stats.last_counts == {"move": 2, "resolve": 2, "apply": 1, "process": 2}
+        assert stats.total_counts["process"] == 5
+        assert stats.total_counts["apply"] == 2
+        assert stats.phase_ms("move") >= 0
+
+    def test_watchdog_logs_slow_ticks(self, caplog, make_model):
+        model = make_model(tick_budget_ms=0)
+        model.grid.add_entity_at(0, 0, Robot())
+        with caplog.at_level(logging.WARNING):
+            model.run_ticks(1)
+        assert model.stats.over_budget == 1
+        assert "over the 0.00ms budget" in caplog.text
+        assert "process=" in caplog.text
+
+    def test_commands(self, capsys, make_model):
+        model = make_model()
+        model.run_ticks(3)
+        model.execute_command(Command("budget 25"))
+        assert model.stats.budget_ms == 25
+        model.execute_command(Command("stats"))
+        assert "ticks=3" in capsys.readouterr().out
+        model.execute_command(Command("stats reset"))
+        assert model.stats.ticks == 0
+
+    def test_no_ticks(self):
+        stats = TickStats()
+        assert stats.phase_ms("resolve") == 0.0
+        assert "ticks=0" in stats.summary()
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from components import Robot, Factory
+from components.conveyor import Conveyor
+from components.grid import Grid
+from const import DIRECTION
+from model import DataModel
+from model.modules import CommandDispatcher, TerminalEmulator
+
+pytest.importorskip("numpy")
+
+
+def build_world(seed: int, robots: int = 12) -> Grid:
+    rng = random.Random(seed)
+    g = Grid()
+    cells = [(r, c) for r in range(6) for c in range(6)]
+    for r, c in rng.sample(cells, 10):
+        g.add_entity_at(r, c, Conveyor(direction=rng.choice(list(DIRECTION)[:4])))
+    for r, c in rng.sample(cells, 4):
+        g.add_entity_at(r, c, Factory())
+    for r, c in rng.sample(cells, rng.randint(1, robots)):
+        path = [rng.choice(list(DIRECTION)) for _ in range(rng.randint(1, 4))]
+        g.add_entity_at(r, c, Robot(path=path))
+    return g
+
+
+def snapshot(grid: Grid):
+    return [
+        (grid.get_coord_of_entity(robot), robot.current_move_index)
+        for robot in grid.get_entities(Robot)
+    ]
+
+
+def run(vectorized: bool, seed: int, ticks: int, robots: int = 12):
+    model = DataModel(
+        CommandDispatcher(TerminalEmulator()),
+        build_world(seed, robots),
+        vectorized=vectorized,
+    )
+    states = []
+    for _ in range(ticks):
+        model.step()
+        states.append(snapshot(model.grid))
+    return states
+
+
+class TestVectorizedMover:
+    def test_matches_python_mover(self):
+        for seed in range(150):
+            expected = run(False, seed, 10)
+            assert run(True, seed, 10) == expected
+
+    def test_matches_python_mover_when_crowded(self):
+        for seed in range(50):
+            expected = run(False, seed, 10, robots=30)
+            assert run(True, seed, 10, robots=30) == expected
+
+    def test_cycle_and_swap_stay(self):
+        model = DataModel(
+            CommandDispatcher(TerminalEmulator()), Grid(), vectorized=True
+        )
+        moves = [DIRECTION.RIGHT, DIRECTION.DOWN, DIRECTION.LEFT, DIRECTION.UP]
+        for (row, col), move in zip([(0, 0), (0, 1), (1, 1), (1, 0)], moves):
+            model.grid.add_entity_at(row, col, Robot(path=[move]))
+        model.grid.add_entity_at(5, 0, Robot(path=[DIRECTION.RIGHT]))
+        model.grid.add_entity_at(5, 1, Robot(path=[DIRECTION.LEFT]))
+        before = snapshot(model.grid)
+        model.step()
+        assert [coord for coord, _ in snapshot(model.grid)] == [
+            coord for coord, _ in before
+        ]
+
+    def test_conveyor_and_path(self):
+        model = DataModel(
+            CommandDispatcher(TerminalEmulator()), Grid(), vectorized=True
+        )
+        rider = Robot(path=[DIRECTION.LEFT, DIRECTION.WAIT])
+        walker = Robot(path=[DIRECTION.DOWN, DIRECTION.RIGHT])
+        model.grid.add_entity_at(0, 0, Conveyor(direction=DIRECTION.RIGHT))
+        model.grid.add_entity_at(0, 0, rider)
+        model.grid.add_entity_at(3, 3, walker)
+        model.step()
+        assert model.grid.get_coord_of_entity(rider) == (0, 1)
+        assert model.grid.get_coord_of_entity(walker) == (4, 3)
+        model.step()
+        assert model.grid.get_coord_of_entity(rider) == (0, 0)
+        assert model.grid.get_coord_of_entity(walker) == (4, 4)
+        assert rider.current_move_index == 1
+        assert walker.current_move_index == 0
+
+    def test_set_path_refreshes_store(self):
+        model = DataModel(
+            CommandDispatcher(TerminalEmulator()), Grid(), vectorized=True
+        )
+        r = Robot(path=[DIRECTION.RIGHT])
+        model.grid.add_entity_at(0, 0, r)
+        model.step()
+        r.set_path([DIRECTION.DOWN])
+        model.step()
+        assert model.grid.get_coord_of_entity(r) == (1, 1)
@@ -0,0 +1,49 @@
+from typing import Optional
+
+# cell sizes in pixels, smallest to largest; glyphs need at least 5
+ZOOM_LEVELS = [1, 2, 3, 5, 8, 12]
+DEFAULT_ZOOM = 5
+
+
+class Camera:
+    def __init__(self, width: int, height: int, row: int = 0, col: int = 0):
+        self.width = width
+        self.height = height
+        # grid cell drawn at the top-left corner of the screen
+        self.row = row
+        self.col = col
+        self.cell_size = DEFAULT_ZOOM
+
+    # (row0, col0, row1, col1) of the cells at least partly on screen
+    def visible_rect(self) -> tuple[int, int, int, int]:
+        rows = -(-self.height // self.cell_size)
+        cols = -(-self.width // self.cell_size)
+        return self.row, self.col, self.row + rows - 1, self.col + cols - 1
+
+    def to_screen(self, row: int, col: int) -> tuple[int, int]:
+        return (col - self.col) * self.cell_size, (row - self.row) * self.cell_size
+
+    def to_cell(self, x: int, y: int) -> tuple[int, int]:
+        return self.row + y // self.cell_size, self.col + x // self.cell_size
+
+    def pan(self, rows: int, cols: int) -> None:
+        self.row += rows
+        self.col += cols
+
+    # Steps through ZOOM_LEVELS, keeping the cell under (x, y) in place.
+    def zoom(
+        self, steps: int, x: Optional[int] = None, y: Optional[int] = None
+    ) -> None:
+        index = ZOOM_LEVELS.index(self.cell_size)
+        index = max(0, min(len(ZOOM_LEVELS) - 1, index + steps))
+        if ZOOM_LEVELS[index] == self.cell_size:
+            return
+        x = self.width // 2 if x is None else x
+        y = self.height // 2 if y is None else y
+        row, col = self.to_cell(x, y)
+        self.cell_size = ZOOM_LEVELS[index]
+        self.row = row - y // self.cell_size
+        self.col = col - x // self.cell_size
+
+    def state(self) -> tuple[int, int, int]:
+        return self.row, self.col, self.cell_size
@@ -1,87 +1,69 @@
-from components.conveyor import Conveyor
-from const import DIRECTION
-from model import DataModel
-from components import Robot, Factory, Entity
+from typing import Optional
+
 import pyxel
-from components.entity import Resource
+
+from model.frames import WorldFrame
+from .camera import Camera
+from .static_layer import StaticLayer, draw_glyph
 
 
 class DataView:
     def __init__(self):
-        pass
+        # created on the first draw, once pyxel knows the screen size
+        self.camera: Optional[Camera] = None
+        self.static_layer: Optional[StaticLayer] = None
+
+    def pan(self, rows: int, cols: int) -> None:
+        if self.camera is not None:
+            self.camera.pan(rows, cols)
+
+    def zoom(self, steps: int, x: int, y: int) -> None:
+        if self.camera is not None:
+            self.camera.zoom(steps, x, y)
 
-    def draw(self, model: DataModel):
+    # draws the latest published frame; never touches the live model
+    def draw(self, frame: WorldFrame, frame_count: int):
         pyxel.cls(0)
-        self.draw_grid(model)
-        self.draw_entities(model)
-        self.draw_terminal(model)
-        self.draw_stats(model)
+        self.draw_grid(frame)
+        self.draw_entities(frame)
+        self.draw_terminal(frame)
+        self.draw_stats(frame, frame_count)
 
-    def draw_stats(self, model: DataModel):
-        if model.is_playing:
-            pyxel.text(5, 120, "Running " + "." * (model.current_tick % 3 + 1), 7)
+    def draw_stats(self, frame: WorldFrame, frame_count: int):
+        if frame.is_playing:
+            pyxel.text(5, 120, "Running " + "." * (frame.tick % 3 + 1), 7)
         else:
             pyxel.text(5, 120, "paused", 7)
-        pyxel.text(5, 140, "Frame " + str(model.current_frame), 7)
-        pyxel.text(5, 130, "Tick " + str(model.current_tick), 7)
+        pyxel.text(5, 140, "Frame " + str(frame_count), 7)
+        pyxel.text(5, 130, "Tick " + str(frame.tick), 7)
 
-    def draw_terminal(self, model: DataModel):
-        pyxel.text(5, 150, model.get_terminal_text(), 7)
+    def draw_terminal(self, frame: WorldFrame):
+        pyxel.text(5, 150, frame.terminal_text, 7)
 
-    def draw_entities(self, model: DataModel):
+    def draw_entities(self, frame: WorldFrame):
         current_x = 100
         current_y = 0
-
-        for entity in model.grid.get_entities(Entity):
-            entity_type = None
-            if isinstance(entity, Robot):
-                entity_type = "R"
-            elif isinstance(entity, Factory):
-                entity_type = "F"
-            elif isinstance(entity, Conveyor):
-                continue
-
-            pyxel.text(
-                current_x, current_y, f"({entity.id}) {entity_type} - {entity.name}", 7
-            )
+        for title, resources in frame.panel:
+            pyxel.text(current_x, current_y, title, 7)
             current_y += 7
-            num_wood = entity.count_resource(Resource.WOOD)
-            num_metal = entity.count_resource(Resource.METAL)
-            num_stone = entity.count_resource(Resource.STONE)
-            pyxel.text(
-                current_x, current_y, f"  W:{num_wood} M:{num_metal} S:{num_stone}", 7
-            )
+            pyxel.text(current_x, current_y, resources, 7)
             current_y += 7
 
-    def draw_grid(self, model: DataModel):
-        inc = 5
-        for row, col, entities in model.grid:
-            robots = 0
-            factory = 0  # should only be one
-            conveyor = 0  # should only be one
-            for entity in entities:
-                if isinstance(entity, Robot):
-                    robots += 1
-                elif isinstance(entity, Factory):
-                    factory += 1
-                elif isinstance(entity, Conveyor):
-                    conveyor += 1
-            if factory and robots:
-                pyxel.text(col * inc, row * inc, "F", 7)
-            elif factory and not robots:
-                pyxel.text(col * inc, row * inc, "f", 7)
-            elif robots == 1 and not factory:
-                pyxel.text(col * inc, row * inc, "o", 7)
-            elif robots and not factory:
-                pyxel.text(col * inc, row * inc, "O", 7)  # more than one
-            elif conveyor:
-                if isinstance(entity, Conveyor):
-                    direction = entity.direction
-                    if direction == DIRECTION.RIGHT:
-                        pyxel.text(col * inc, row * inc, ">", 7)
-                    if direction == DIRECTION.LEFT:
-                        pyxel.text(col * inc, row * inc, "<", 7)
-                    if direction == DIRECTION.UP:
-                        pyxel.text(col * inc, row * inc, "^", 7)
-                    if direction == DIRECTION.DOWN:
-                        pyxel.text(col * inc, row * inc, "v", 7)
+    # Static entities come from the cached layer; only cells holding robots
+    # in view are drawn every frame.
+    def draw_grid(self, frame: WorldFrame):
+        if self.static_layer is None:
+            self.camera = Camera(pyxel.width, pyxel.height)
+            self.static_layer = StaticLayer(self.camera)
+        camera = self.camera
+        layer = self.static_layer
+        layer.refresh(frame)
+        pyxel.blt(0, 0, layer.image, 0, 0, camera.width, camera.height)
+
+        size = camera.cell_size
+        row0, col0, row1, col1 = camera.visible_rect()
+        for row, col, glyph in frame.robots:
+            if row0 <= row <= row1 and col0 <= col <= col1:
+                x, y = camera.to_screen(row, col)
+                pyxel.rect(x, y, size, size, 0)
+                draw_glyph(pyxel, x, y, size, glyph)
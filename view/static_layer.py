@@ -0,0 +1,71 @@
+from typing import Optional
+
+import pyxel
+
+from components.grid import unpack_coord
+from model.frames import WorldFrame
+from .camera import Camera
+
+# below this cell size glyphs don't fit and cells are drawn as blocks
+MIN_GLYPH_SIZE = 5
+BLOCK_COLORS = {"f": 9, "F": 9, "o": 7, "O": 7}
+CONVEYOR_COLOR = 5
+
+
+def draw_glyph(image, x: int, y: int, size: int, glyph: str) -> None:
+    if size >= MIN_GLYPH_SIZE:
+        image.text(x, y, glyph, 7)
+    else:
+        image.rect(x, y, size, size, BLOCK_COLORS.get(glyph, CONVEYOR_COLOR))
+
+
+# Factories and conveyors in view, drawn once into an offscreen image. Each
+# frame says which cells changed since the previous static version, and only
+# those get redrawn; moving the camera or missing a version redraws the view.
+class StaticLayer:
+    def __init__(self, camera: Camera):
+        self.camera = camera
+        self.image = pyxel.Image(camera.width, camera.height)
+        self._camera_state = camera.state()
+        self._version: Optional[int] = None
+
+    # brings the image up to date and returns how many cells were redrawn
+    def refresh(self, frame: WorldFrame) -> int:
+        camera = self.camera
+        dirty = frame.static_dirty
+        redraw_all = (
+            self._version is None
+            or self._camera_state != camera.state()
+            or (
+                self._version != frame.static_version
+                and (dirty is None or self._version != frame.static_version - 1)
+            )
+        )
+        if not redraw_all and self._version == frame.static_version:
+            return 0
+        self._version = frame.static_version
+        self._camera_state = camera.state()
+
+        static = frame.static
+        drawn = 0
+        if redraw_all:
+            self.image.cls(0)
+            for row, col, glyph in static.query_rect(*camera.visible_rect()):
+                drawn += self._draw_cell(row, col, glyph)
+            return drawn
+
+        for key in dirty or ():
+            row, col = unpack_coord(key)
+            drawn += self._draw_cell(row, col, static.glyph_at(key))
+        return drawn
+
+    def _draw_cell(self, row: int, col: int, glyph: Optional[str]) -> int:
+        camera = self.camera
+        x, y = camera.to_screen(row, col)
+        if x < 0 or y < 0 or x >= camera.width or y >= camera.height:
+            return 0
+        size = camera.cell_size
+        self.image.rect(x, y, size, size, 0)
+        if glyph is not None:
+            draw_glyph(self.image, x, y, size, glyph)
+        return 1